@@ -7,32 +7,35 @@
 依赖：PyQt6, pandas, opencv-python, pyzbar, requests, qdarkstyle, numpy
 """
 
-import json
 import logging
 import os
 import sys
 import time
-import math
 
 import cv2 as cv
 import numpy as np
 import pandas as pd
 import pyzbar.pyzbar as pyzbar
 
-import requests
 from PyQt6 import QtCore, QtWidgets  # , QtGui
 from PyQt6.QtCore import pyqtSignal, pyqtSlot, QModelIndex, QObject, QPoint, Qt, QThread, QVariant
-from PyQt6.QtGui import QIcon, QImage, QPixmap
+from PyQt6.QtGui import QIcon
 from PyQt6.QtWidgets import QApplication, QFileDialog, QMainWindow, QMenu
 
 from Ui_BookList import Ui_mainWindow
 import BookSearch
 import BookInfo
+from doubanapi import DOUBAN_CONCURRENCY, DouBanApi, IsbnResolver
+from doubancache import get_cache
+from bookindex import FIELDS, BookIndex
+from bookstore import FILE_FILTER, BookStore, RowJournal
+from barcodescan import FILE_FILTER as SCAN_FILTER, IMAGE_EXTS, BarcodeScanner
+from bookcover import CoverFetcher
+from bookrank import TOP_BOOKS, BookRanker, recommend
+from bookmerge import POLICIES, merge_catalogs
 
 import qdarkstyle
 
-from typing import List, Optional, Dict, Any
-
 # 初始化日志对象（确保全局已定义，若未定义可补充：LOG = logging.getLogger(__name__)）
 LOG = logging.getLogger(os.path.basename(sys.argv[0]))
 logging.basicConfig(
@@ -80,17 +83,58 @@ class TableModel(QtCore.QAbstractTableModel):
     实现数据的增删改查、筛选、导出等核心操作
     """
 
-    def __init__(self, data):
+    def __init__(self, data, source=None):
         """
         初始化模型
         :param data: 初始数据（DataFrame），默认空DataFrame
-        :param parent: 父组件
+        :param source: 数据加载自的存储文件（增量保存的基准），新建数据为None
         """
         super(TableModel, self).__init__()
-        # 原始数据（未筛选）
+        # 全部数据（筛选不修改数据，只改变显示的行），新增行先暂存在_pending中，见_data
         self._data = data
-        # 筛选后的数据（用于UI显示）
-        self.backdata = data
+        # 显示的行号（numpy数组，按显示顺序），None表示按原顺序显示全部行
+        self._view = None
+        # 筛选结果：匹配的行号（升序numpy数组），None表示未筛选
+        self._filter = None
+        # 推荐度排序方式：None不排序，0全部排序，N只显示推荐度最高的N本
+        self._ranking = None
+        # 推荐度排序器（首次排序时建立，行删除/数据替换后重建）
+        self._ranker = None
+        # 全文检索索引（首次筛选时建立，行删除/数据替换后重建）
+        self._index = None
+        # ISBN → 行号列表（行号为位置序号；ISBN重复时对应多行）
+        self._rows = {}
+        # 显示缓存：列号 → 该列所有单元格的显示字符串（按需逐列生成，数据变化时失效）
+        self._columns = {}
+        # 行表头显示缓存（DataFrame索引的字符串列表）
+        self._labels = None
+        # 行修改日志（按DataFrame索引记录修改/新增/删除的行，保存时只写入变化的行）
+        self.journal = RowJournal(source)
+        self._invalidate()
+
+    @property
+    def _data(self):
+        """全部数据（DataFrame）；有暂存的新增行时先一次性合并"""
+        if self._pending:
+            self._frame = pd.concat([self._frame, *self._pending])
+            self._pending = []
+            self._pendingRows = 0
+        return self._frame
+
+    @_data.setter
+    def _data(self, data):
+        self._frame = data
+        self._pending = []      # 暂存的新增行（DataFrame列表），避免每批新增都复制全部数据
+        self._pendingRows = 0   # 暂存的新增行数
+
+    @property
+    def backdata(self):
+        """兼容旧接口：与_data为同一对象"""
+        return self._data
+
+    def _length(self):
+        """全部数据的行数（含暂存的新增行，不触发合并）"""
+        return len(self._frame) + self._pendingRows
 
     def data(self, index, role):
         """
@@ -100,10 +144,32 @@ class TableModel(QtCore.QAbstractTableModel):
         :return: 单元格数据（字符串/数字）
         """
         if role == Qt.ItemDataRole.DisplayRole:
-            # 获取筛选后数据的指定单元格值
-            value = self._data.iloc[index.row(), index.column()]
-            # 处理空值显示
-            return str(value) if not pd.isna(value) else ""
+            # 从按列缓存的显示字符串中取值（避免每次绘制单元格都调用iloc/isna/str）
+            return self._column(index.column())[self._source(index.row())]
+
+    def _source(self, row):
+        """视图行 → 数据行号（筛选时经筛选结果映射）"""
+        return row if self._view is None else int(self._view[row])
+
+    @staticmethod
+    def _display(value):
+        """单元格值 → 显示字符串（空值显示为空）"""
+        return "" if pd.isna(value) is True else str(value)
+
+    def _column(self, column):
+        """
+        获取一列的显示字符串（首次访问时整列向量化生成并缓存）
+        :param column: 列号
+        :return: 显示字符串列表（按行号排列）
+        """
+        values = self._columns.get(column)
+        if values is None:
+            series = self._data.iloc[:, column]
+            values = series.astype(str).to_numpy(dtype=object)
+            values[series.isna().to_numpy()] = ""
+            values = values.tolist()
+            self._columns[column] = values
+        return values
 
     def rowCount(self, parent=None):  # index):
         """
@@ -120,14 +186,16 @@ class TableModel(QtCore.QAbstractTableModel):
             2. 若需返回「筛选后/过滤后」的行数，需先更新 self._data 为筛选后的 DataFrame；
             3. 空 DataFrame 时返回 0，QTableView 会显示空表格，无异常。
         """
-        # 核心逻辑：返回 DataFrame 的行数（shape[0] 等价于 len(self._data)，但性能更优）
-        # shape 返回元组 (行数, 列数)，shape[0] 取行数，shape[1] 取列数
-        return self._data.shape[0]
+        # 筛选时返回筛选结果的行数
+        if self._view is not None:
+            return len(self._view)
+        # 核心逻辑：返回 DataFrame 的行数（含暂存的新增行，不触发合并）
+        return self._length()
 
     def appendRow(self, arowdata):
         """
         核心方法：向表格模型中新增一行数据，并通知视图刷新
-        适配PyQt模型规范：通过beginResetModel/endResetModel触发视图重新渲染，保证数据同步
+        适配PyQt模型规范：通过beginInsertRows/endInsertRows通知视图只渲染新增行，保证数据同步
         
         :param arowdata: 待新增的行数据，支持两种格式（兼容设计）：
                          1. 字典（推荐）：key为列名，value为对应列的值（如{"ISBN":"978xxx", "书名":"Python编程"}）
@@ -137,16 +205,21 @@ class TableModel(QtCore.QAbstractTableModel):
         :raises ValueError: 若数据类型与列的 dtype 不兼容时触发
         """
         try:
-            # ===================== PyQt模型刷新通知 =====================
-            # 通知视图：模型数据即将重置（必须配对begin/end，否则视图不刷新）
-            # 作用：暂停视图更新，避免多次触发刷新，提升性能；结束后视图重新读取模型数据
-            self.beginResetModel()
+            # ===================== PyQt模型插入通知 =====================
+            # 通知视图：即将在末尾插入一行（必须配对begin/end，否则视图不刷新）
+            # 作用：视图只处理新增的一行，无需重建整个表格
+            position = len(self._data)
+            self.beginInsertRows(QModelIndex(), self.rowCount(), self.rowCount())
 
             # ===================== DataFrame追加数据 =====================
-            # self._data.shape[0]：获取当前DataFrame的行数（作为新行的索引）
+            # 新行索引取现有最大索引+1（加载CSV时删除了空行，索引可能不连续，不能直接用行数）
             # loc赋值：按索引追加一行，自动对齐列名（字典格式）或按列顺序填充（列表/元组）
-            # 示例：若当前有5行，新行索引为5，直接赋值实现追加
-            self._data.loc[self._data.shape[0]] = arowdata
+            label = self._nextLabel()
+            self._data.loc[label] = arowdata
+            self.journal.touch([label])
+            self._rows.setdefault(self._data.iat[position, 0], []).append(position)
+            self._extendCache(self._data.iloc[position:])
+            self._appendView(position, self._data.iloc[position:])
 
         except KeyError as e:
             # 列名不匹配时的异常提示（便于调试）
@@ -155,9 +228,10 @@ class TableModel(QtCore.QAbstractTableModel):
             # 数据类型不兼容时的异常提示
             raise ValueError(f"新增行失败：数据类型不兼容 - {e}")
         finally:
-            # ===================== 结束模型刷新通知 =====================
-            # 必须调用，通知视图：模型数据已重置，立即刷新展示新数据
-            self.endResetModel()
+            # ===================== 结束模型插入通知 =====================
+            # 必须调用，通知视图：新行已插入，立即展示新数据
+            self.endInsertRows()
+        self._rerank()
 
     def updateData(self, data):
         """
@@ -166,6 +240,9 @@ class TableModel(QtCore.QAbstractTableModel):
         """
         self.beginResetModel()
         self._data = data
+        self._view = self._filter = self._ranking = None
+        self.journal.invalidate()
+        self._invalidate()
         self.endResetModel()
 
     def updateItem(self, row):
@@ -174,33 +251,198 @@ class TableModel(QtCore.QAbstractTableModel):
         :param isbn: 图书ISBN（唯一标识）
         :param row_data: 待更新的行数据字典
         """
-        isbnlist = self._data.iloc[:, 0].unique()
-        LOG.info(f'更新记录 {len(row)} 项:  {row}')
-        if row[0] in isbnlist:
-            self.beginResetModel()
-            # self._data[self._data.iloc[:, 0] == row[0]] = row
-            if len(row) == 9:
-                self._data.loc[
-                    self._data.iloc[:, 0] == row[0],
-                    ['书名', '作者', '出版', '价格', '评分', '人数', '分类', '书柜']] = [
-                        row[1], row[2], row[3], row[4], row[5], row[6], row[7],
-                        row[8]
-                ]
+        self.updateItems([row])
+
+    def updateItems(self, rows):
+        """
+        批量更新数据（存在则更新，不存在则新增）
+        - 通过ISBN索引定位行，无需扫描整列
+        - 已有行按列批量写入，相邻的行合并为区间发出dataChanged，只刷新变化的行
+        - 新增行一次性追加到末尾，通过beginInsertRows/endInsertRows通知视图
+        :param rows: 图书信息列表的列表，每项格式同updateItem
+        """
+        updates = {}   # 已有行：{ISBN: 图书信息}
+        inserts = {}   # 新增行：{ISBN: 图书信息}（同一批中ISBN重复时以最后一条为准）
+        for row in rows:
+            if row[0] in self._rows:
+                updates[row[0]] = row
             else:
-                self._data.loc[self._data.iloc[:, 0] == row[0],
-                               ['书名', '作者', '出版', '价格', '评分', '人数']] = [
-                                   row[1], row[2], row[3], row[4], row[5],
-                                   row[6]
-                ]
-            self.endResetModel()
-        else:
+                inserts[row[0]] = row
+        LOG.debug(f'批量更新记录：{len(rows)} 条，更新 {len(updates)} 本，新增 {len(inserts)} 本')
+
+        # ===================== 1. 更新已有行 =====================
+        # 9项为完整记录（含分类/书柜），否则为豆瓣数据（只更新书名~人数，保留用户的分类/书柜）
+        changed = []
+        for names, group in ((['书名', '作者', '出版', '价格', '评分', '人数', '分类', '书柜'],
+                              [row for row in updates.values() if len(row) == 9]),
+                             (['书名', '作者', '出版', '价格', '评分', '人数'],
+                              [row for row in updates.values() if len(row) != 9])):
+            if not group:
+                continue
+            positions = []
+            values = []
+            for row in group:
+                for position in self._rows[row[0]]:
+                    positions.append(position)
+                    values.append(row[1:len(names) + 1])
+            # 按列写入（每列一次赋值），代价与本批行数成正比
+            for i, column in enumerate(self._data.columns.get_indexer(names)):
+                self._data.iloc[positions, column] = [value[i] for value in values]
+                # 同步更新已缓存的显示字符串
+                cached = self._columns.get(column)
+                if cached is not None:
+                    for position, value in zip(positions, values):
+                        cached[position] = self._display(value[i])
+            changed.extend(positions)
+            self._reindex(positions, names)
+            self._rescore(positions)
+        if changed:
+            self.journal.touch(self._data.index[changed])
+        last_column = self.columnCount() - 1
+        for first, last in self._ranges(self._viewRows(changed)):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, last_column))
+
+        # ===================== 2. 追加新增行 =====================
+        if inserts:
+            # 新增行追加在数据末尾；筛选时同时追加到筛选结果末尾（新刷新的图书保持可见）
+            first = self._length()
+            label = self._nextLabel()
+            new = pd.DataFrame([row[0:9] for row in inserts.values()], columns=self._frame.columns,
+                               index=range(label, label + len(inserts)), dtype=object)
+            self.beginInsertRows(QModelIndex(), self.rowCount(), self.rowCount() + len(inserts) - 1)
+            # 新增行先暂存，访问全部数据时再一次性合并（连续刷新时不必每批都复制整个DataFrame）
+            self._pending.append(new)
+            self._pendingRows += len(new)
+            self.journal.touch(new.index)
+            for offset, isbn in enumerate(inserts):
+                self._rows[isbn] = [first + offset]
+            self._extendCache(new)
+            self._appendView(first, new)
+            self.endInsertRows()
+        if changed or inserts:
+            self._rerank()
+
+    @staticmethod
+    def _ranges(positions):
+        """将行号合并为连续区间 [(起始行, 结束行), ...]"""
+        ranges = []
+        for position in sorted(set(positions)):
+            if ranges and position == ranges[-1][1] + 1:
+                ranges[-1][1] = position
+            else:
+                ranges.append([position, position])
+        return ranges
+
+    def _inverse(self):
+        """数据行号 → 视图行的映射数组（不在视图中的行为-1；视图可为任意顺序）"""
+        inverse = np.full(self._length(), -1, dtype=np.int64)
+        inverse[self._view] = np.arange(len(self._view), dtype=np.int64)
+        return inverse
+
+    def _viewRows(self, positions):
+        """数据行号 → 视图行（筛选/排序时只保留显示中的行）"""
+        if self._view is None:
+            return positions
+        rows = self._inverse()[np.asarray(positions, dtype=np.int64)]
+        return rows[rows >= 0].tolist()
+
+    def _appendView(self, first, rows):
+        """
+        在末尾追加行后：登记到检索索引和排序器；筛选时把新行追加到筛选结果
+        :param first: 第一个新增行的行号
+        :param rows: 新增行（DataFrame）
+        """
+        positions = range(first, first + len(rows))
+        self._reindex(positions, list(rows.columns), rows)
+        self._rescore(positions, rows)
+        new = np.arange(first, first + len(rows), dtype=np.int64)
+        if self._filter is not None:
+            self._filter = np.append(self._filter, new)
+        if self._view is not None:
+            self._view = np.append(self._view, new)
+
+    def _reindex(self, positions, names, rows=None):
+        """行被修改/追加后登记到检索索引（索引未建立时无需处理）；rows为对应的行数据，默认从全部数据中取"""
+        if self._index is None:
+            return
+        names = [name for name in names if name in self._index.fields]
+        rows = self._data.iloc[list(positions)] if rows is None else rows
+        for position, values in zip(positions, rows[names].to_numpy(dtype=object).tolist()):
+            self._index.update(position, dict(zip(names, values)))
+
+    def _rescore(self, positions, rows=None):
+        """行被修改/追加后登记到推荐度排序器（排序器未建立时无需处理）；rows为对应的行数据，默认从全部数据中取"""
+        if self._ranker is None or not len(positions):
+            return
+        positions = list(positions)
+        rows = self._data.iloc[positions] if rows is None else rows
+        self._ranker.update(positions, *(rows[name].tolist() if name in rows.columns
+                                         else [''] * len(positions) for name in ('评分', '人数')))
+
+    def _rankView(self):
+        """按筛选结果和推荐度排序方式生成显示的行号"""
+        if self._ranking is None:
+            return self._filter
+        if self._ranker is None:
+            self._ranker = BookRanker(*(self._data[name] if name in self._data.columns
+                                        else [''] * len(self._data) for name in ('评分', '人数')))
+        if self._ranking:
+            return self._ranker.top(self._ranking, self._filter)
+        return self._ranker.order(self._filter)
+
+    def _relayout(self, view):
+        """
+        更换显示顺序（layoutChanged），选中/当前行随数据行移动，不重置视图
+        :param view: 新的显示行号数组
+        """
+        if (len(self._data) if view is None else len(view)) != self.rowCount():
+            # 行数变化（如只显示前N本）不能作为布局变化通知，重置视图
             self.beginResetModel()
-            self._data.loc[self._data.shape[0] + 1] = row[0:9]
+            self._view = view
             self.endResetModel()
+            return
+        self.layoutAboutToBeChanged.emit()
+        indexes = self.persistentIndexList()
+        positions = [self._source(index.row()) for index in indexes]
+        self._view = view
+        rows = self._viewRows(positions) if view is None else self._inverse()[positions].tolist()
+        self.changePersistentIndexList(indexes, [
+            self.index(row, index.column()) if row >= 0 else QModelIndex()
+            for row, index in zip(rows, indexes)])
+        self.layoutChanged.emit()
+
+    def _rerank(self):
+        """数据变化后重新排序（推荐度排序时）"""
+        if self._ranking is not None:
+            self._relayout(self._rankView())
+
+    def _invalidate(self):
+        """行发生删除/整体替换后调用：重建 ISBN → 行号 索引，清空显示缓存、检索索引和排序器"""
+        self._columns = {}
+        self._labels = None
+        self._index = None
+        self._ranker = None
+        self._rows = {}
+        for position, isbn in enumerate(self._data.iloc[:, 0].tolist()):
+            self._rows.setdefault(isbn, []).append(position)
+
+    def _extendCache(self, rows):
+        """在末尾追加行（DataFrame）后，为已缓存的列和行表头补充新行的显示字符串"""
+        for column, cached in self._columns.items():
+            cached.extend(self._display(value) for value in rows.iloc[:, column].tolist())
+        if self._labels is not None:
+            self._labels.extend(str(label) for label in rows.index)
+
+    def _nextLabel(self):
+        """新增行的DataFrame索引：现有最大索引+1（空表时从1开始）"""
+        if self._pending:
+            # 暂存的新增行索引递增，最后一行即最大索引
+            return int(self._pending[-1].index[-1]) + 1
+        return int(self._frame.index.max()) + 1 if len(self._frame) else 1
 
     def columnCount(self, parent=None):  # index):
         """返回表格列数"""
-        return self._data.shape[1]
+        return self._frame.shape[1]
 
     def headerData(self, section, orientation, role):
         """
@@ -213,20 +455,28 @@ class TableModel(QtCore.QAbstractTableModel):
         # section is the index of the column/row.
         if role == Qt.ItemDataRole.DisplayRole:
             if orientation == Qt.Orientation.Horizontal:
-                return str(self._data.columns[section])
+                return str(self._frame.columns[section])
 
             if orientation == Qt.Orientation.Vertical:
-                return str(self._data.index[section])
+                # 行表头（DataFrame索引）整体转换一次并缓存
+                if self._labels is None:
+                    self._labels = [str(label) for label in self._data.index]
+                return self._labels[self._source(section)]
 
     def clear(self):
         """
         清空记录
         """
+        self.beginResetModel()
         self._data.drop(self._data.index, inplace=True)
+        self._view = self._filter = self._ranking = None
+        self.journal.invalidate()
+        self._invalidate()
+        self.endResetModel()
 
     def dataexport(self):
         """
-        导出当前所有原始数据（未筛选）
+        导出当前所有原始数据（筛选不影响导出）
         """
         return self._data
 
@@ -234,15 +484,16 @@ class TableModel(QtCore.QAbstractTableModel):
         """ 
         返回一条记录
         """
-        df = self._data.iloc[index]
+        df = self._data.iloc[self._source(index)]
         LOG.info(df.values.tolist())
         return df.values.tolist()
 
     def getlist(self, index):
         """ 
-        返回图书列表
+        返回图书列表（筛选时只返回显示中的行）
         """
-        collist = self._data.iloc[:, index].unique()
+        rows = slice(None) if self._view is None else self._view
+        collist = self._data.iloc[rows, index].unique()
         return collist
 
     def deleteItem(self, isbn):
@@ -250,36 +501,66 @@ class TableModel(QtCore.QAbstractTableModel):
         删除指定行数据
         :param rows: 待删除行的索引列表（基于筛选后数据）
         """
-        self.beginResetModel()
-        # 筛选后数据的行 → 原始数据的行索引
-        self._data.drop(self._data[self._data.iloc[:, 0] == isbn].index,
-                        inplace=True)
-        self.endResetModel()
+        positions = self._rows.get(isbn)
+        if not positions:
+            return
+        self.journal.remove(self._data.index[positions])
+        if self._view is None:
+            # 从后往前按连续区间删除，前面区间的行号不受影响
+            for first, last in reversed(self._ranges(positions)):
+                self.beginRemoveRows(QModelIndex(), first, last)
+                self._data.drop(self._data.index[first:last + 1], inplace=True)
+                self.endRemoveRows()
+        else:
+            # 筛选时：先从筛选结果中移除显示中的行（按视图行区间通知视图），再删除数据
+            for first, last in reversed(self._ranges(self._viewRows(positions))):
+                self.beginRemoveRows(QModelIndex(), first, last)
+                self._view = np.delete(self._view, np.s_[first:last + 1])
+                self.endRemoveRows()
+            positions = np.array(sorted(positions), dtype=np.int64)
+            self._data.drop(self._data.index[positions], inplace=True)
+            # 被删除行之后的行号前移
+            self._view = self._view - np.searchsorted(positions, self._view)
+            if self._filter is not None:
+                kept = self._filter[~np.isin(self._filter, positions)]
+                self._filter = kept - np.searchsorted(positions, kept)
+        # 删除行之后的行号整体前移，重建索引
+        self._invalidate()
+        # 只显示前N本时补足删除的行
+        if self._ranking:
+            self._rerank()
 
     def search(self, search):
         """
-        根据关键词筛选数据（支持多字段模糊匹配）
-        :param keyword: 搜索关键词
+        根据关键词筛选数据（全文检索索引，只改变显示的行，不修改/复制数据）
+        查询语法见BookIndex.parse：空白分隔多个词（“与”），
+        “作者:鲁迅”限定字段，“词*”前缀匹配，“词~”模糊匹配
+        :param search: 查询语句，为空时显示全部数据
         """
+        if self._index is None or self._index.stale:
+            self._index = BookIndex()
+            self._index.build({field: self._data[field].tolist()
+                               for field in FIELDS if field in self._data.columns})
         self.beginResetModel()
-        # 多字段模糊匹配（ISBN/书名/作者/出版/分类）
-        self._data = self._data[
-            self._data['ISBN'].astype(str).str.contains(search)
-            | self._data['书名'].astype(str).str.contains(search)
-            | self._data['作者'].astype(str).str.contains(search)
-            | self._data['出版'].astype(str).str.contains(search)
-            | self._data['分类'].astype(str).str.contains(search)]
-
+        self._filter = self._index.search(search)
+        self._view = self._rankView()
         self.endResetModel()
 
+    def sortByRecommend(self, top=None):
+        """
+        按推荐度从高到低显示（筛选时只排序筛选结果；之后评分变化/新增图书时自动重新排序）
+        推荐度公式见bookrank.recommend，整列向量化计算
+        :param top: 只显示推荐度最高的前N本，None为全部排序
+        """
+        self._ranking = top or 0
+        self._relayout(self._rankView())
+
     def reset(self):
         """
-        重置筛选状态，显示全部数据
+        重置筛选和排序状态，显示全部数据
         """
         self.beginResetModel()
-
-        self._data = self.backdata
-
+        self._view = self._filter = self._ranking = None
         self.endResetModel()
 
 # ===================== 多线程批量刷新类 =====================
@@ -288,30 +569,60 @@ class TableModel(QtCore.QAbstractTableModel):
 class RefreshBookinfoList(QObject):  # https://mathpretty.com/13641.html
     """
     多线程批量刷新图书信息类
-    避免UI线程阻塞，通过信号传递进度和完成状态
+    在子线程中通过IsbnResolver并发查询豆瓣API（共享连接池 + 共享限流 + 退避重试），
+    解析后的结果按批通过信号交回主线程更新模型，避免UI线程阻塞
     """
-    # 自定义信号：发送待刷新的ISBN
     # 自定义信号：刷新完成
     finished = pyqtSignal()  # 结束的信号
-    # 自定义信号对象。参数str就代表这个信号可以传一个字符串
-    progress = pyqtSignal(str)
+    # 自定义信号：一批刷新结果（图书信息列表的列表）
+    results = pyqtSignal(list)
+    # 自定义信号：已完成的ISBN数量
+    progress = pyqtSignal(int)
 
-    def __init__(self, isbn):
+    def __init__(self, isbn, api=None, workers=DOUBAN_CONCURRENCY, batch_size=50, interval=0.5):
         """
         初始化刷新线程
-        :param isbn_list: 需要刷新的ISBN列表
+        :param isbn: 需要刷新的ISBN列表
+        :param api: DouBanApi实例（带缓存时未过期的图书不再请求），默认新建
+        :param workers: 并发请求数
+        :param batch_size: 每批结果的最大条数
+        :param interval: 两次提交结果的最长间隔（秒），保证进度及时刷新
         """
         super(RefreshBookinfoList, self).__init__()
         self.isbn = isbn
+        self.api = api
+        self.workers = workers
+        self.batch_size = batch_size
+        self.interval = interval
+        self.stopped = False
+
+    def stop(self):
+        """停止刷新（尚未发出的请求直接取消）"""
+        self.stopped = True
 
     def run(self):
         # 重写线程执行的run函数
-        # 触发自定义信号
-        # LOG.info("thread : isbn " + self.isbn)
-
-        for i in self.isbn:
-            self.progress.emit(i)   # 发送当前刷新的ISBN
-            time.sleep(1)  # 延迟避免API限流
+        batch = []
+        done = 0
+        last = time.monotonic()
+        resolver = IsbnResolver(self.api, concurrency=self.workers)
+        for isbn, bookinfo in resolver.iter_resolve(self.isbn):
+            if self.stopped:
+                break
+            done += 1
+            # 校验返回的图书信息至少包含7个核心字段，避免无效数据更新
+            if bookinfo and len(bookinfo) >= 7:
+                batch.append(bookinfo)
+            now = time.monotonic()
+            if len(batch) >= self.batch_size or now - last >= self.interval:
+                if batch:
+                    self.results.emit(batch)
+                    batch = []
+                self.progress.emit(done)
+                last = now
+        if batch:
+            self.results.emit(batch)
+        self.progress.emit(done)
         self.finished.emit()  # 发出结束的信号
 
 # ===================== 多线程类 =====================
@@ -343,6 +654,8 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
     3. 配置表格视图的布局规则（列宽自适应/可手动调整）、上下文菜单策略
     4. 初始化全局状态变量（批量刷新计数、进度前缀、版本号），设置状态栏初始显示
     """
+    # 后台保存结束的信号（文件路径, 错误信息；成功时错误信息为空）
+    saved_signal = pyqtSignal(str, str)
 
     def __init__(self, parent=None):
         """
@@ -386,6 +699,26 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
         # 显示表格的垂直表头（行号列），便于用户查看行序号
         self.tv_booklist.verticalHeader().setVisible(True)
 
+        # 豆瓣接口（带本地缓存：重复查询不访问网络，过期数据后台刷新）
+        self.douban = DouBanApi(cache=get_cache())
+        # 图书目录存储（CSV/Parquet/SQLite读写，后台增量保存）
+        self.store = BookStore()
+        self.saved_signal.connect(self.savefinished)
+        # 批量条形码识别：识别线程、待查询豆瓣的ISBN队列、正在查询的线程
+        self.scanthread = None
+        self.lookupqueue = []
+        self.lookupthread = None
+        # 封面服务（内存/磁盘缓存 + 后台并发下载）；详情窗口当前显示的封面URL
+        self.covers = CoverFetcher(self.douban, parent=self)
+        self.covers.cover_ready.connect(self.showcover)
+        self.coverurl = ''
+        # 表格滚动停止200ms后预取可见行的封面
+        self.prefetchtimer = QtCore.QTimer(self)
+        self.prefetchtimer.setSingleShot(True)
+        self.prefetchtimer.setInterval(200)
+        self.prefetchtimer.timeout.connect(self.prefetchvisible)
+        self.tv_booklist.verticalScrollBar().valueChanged.connect(self.prefetchtimer.start)
+
         # ===================== 4. 注释掉的历史代码（保留供参考） =====================
         # 旧逻辑：使用QStandardItemModel（已替换为自定义TableModel，适配DataFrame）        
         # self.model = QtGui.QStandardItemModel()
@@ -423,6 +756,9 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
         # 替代默认的系统菜单，实现右键删除、导出等自定义功能
         self.tv_booklist.setContextMenuPolicy(
             Qt.ContextMenuPolicy.CustomContextMenu)  # 对象的上下文菜单的策略
+        # “识别”按钮右键菜单：选择文件夹批量识别
+        self.pb_scan.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.pb_scan.setToolTip("识别ISBN图片/视频，获取ISBN编码（右键可选择文件夹批量识别）")
         
 
         # ===================== 7. 初始化全局状态变量 =====================
@@ -440,7 +776,7 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
         """
         槽函数：响应“加载CSV”按钮点击事件，加载本地CSV格式的图书数据到表格
         核心逻辑：
-        1. 打开文件选择对话框，筛选CSV格式文件（兼容所有文件兜底）
+        1. 打开文件选择对话框，筛选CSV格式文件（兼容所有文件兜底）；选择多个文件时合并导入（见mergefiles）
         2. 读取CSV文件并做数据预处理：
            - 强制所有字段为字符串类型（避免ISBN/评分等字段类型异常）
            - 填充空值为空字符串（避免表格显示NaN）
@@ -455,30 +791,36 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
         # - "选择存储文件"：对话框标题
         # - "."：默认打开路径（当前工作目录）
         # - "*.csv;;All Files(*)"：文件类型过滤（优先显示CSV，兜底显示所有文件）
-        # 返回值：csvNamepath=选中的CSV文件路径，csvType=选中的文件类型（如"*.csv"）
-        csvNamepath, csvType = QFileDialog.getOpenFileName(
-            self, "选择存储文件", ".", "*.csv;;All Files(*)")
+        # 返回值：csvNamepaths=选中的文件路径列表，csvType=选中的文件类型（如"*.csv"）
+        csvNamepaths, csvType = QFileDialog.getOpenFileNames(
+            self, "选择存储文件", ".", FILE_FILTER)
+        # 选择多个文件：合并为一个图书目录后加载
+        if len(csvNamepaths) > 1:
+            self.mergefiles(csvNamepaths)
+            return
         # ===================== 2. 校验是否选中有效文件（空路径则跳过处理） =====================
+        if csvNamepaths:
+            self.loadcatalog(csvNamepaths[0])
+
+    def loadcatalog(self, csvNamepath):
+        """
+        加载图书目录文件到表格
+        @param csvNamepath: 文件路径（CSV/Parquet/SQLite）
+        """
         if csvNamepath != "":
             # ===================== 3. 读取CSV文件并进行数据预处理 =====================
-            # 读取CSV：
-            # - dtype='object'：强制所有字段为字符串类型（关键！避免ISBN前导零丢失、数字字段被识别为数值型）
-            # - 默认UTF-8编码（适配大多数CSV文件，若有乱码可补充encoding='gbk'等）
-            df = pd.read_csv(csvNamepath, dtype='object')  # 数据全部转换为字符串型
-            # 注释掉的历史逻辑：手动插入评分/人数列（已由CSV文件自带字段替代）
-            # df.insert(loc=5, column='评分', value=0)
-            # df.insert(loc=6, column='人数', value=0)
-            # 索引重置：将pandas默认的0起始索引改为1起始（符合用户对“第1行”的直观认知）
-            df = df.dropna(axis=0, subset=["ISBN"])
-            df.index = df.index + 1
-            # 空值填充：将DataFrame中的NaN/空值替换为空字符串（避免表格显示“NaN”，提升UI体验）
-            df.fillna('', inplace=True)
+            # 按扩展名读取CSV/Parquet/SQLite（见BookStore.load）：
+            # - 所有字段为字符串类型（避免ISBN前导零丢失、数字字段被识别为数值型）
+            # - 空值为空字符串（避免表格显示“NaN”），去掉ISBN为空的行
+            # - 索引从1开始（符合用户对“第1行”的直观认知），同时作为增量保存的行标识
+            df = self.store.load(csvNamepath)
 
             # ===================== 4. 初始化表格模型并绑定到表格视图 =====================
-            # 实例化自定义表格模型（TableModel），传入预处理后的DataFrame
-            self.model = TableModel(df)
+            # 实例化自定义表格模型（TableModel），传入预处理后的DataFrame及其来源文件
+            self.model = TableModel(df, source=csvNamepath)
             # 将模型绑定到图书列表表格（tv_booklist），完成数据展示
             self.tv_booklist.setModel(self.model)  # 填充csv数据
+            self.prefetchtimer.start()
             
             # ===================== 5. 记录文件路径 & 更新状态栏反馈 =====================
             # 将加载的CSV文件路径填充到输入框（le_booklist），便于用户查看当前加载的文件
@@ -492,6 +834,41 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
             self.statusBar.showMessage(
                 "共 " + str(rowscount) + " 条记录" + self.appver)
 
+    def mergefiles(self, paths):
+        """
+        合并多个图书目录（如各分馆的书目）：后台分块读取，ISBN规范化后去重，合并结果保存为新文件后加载
+        @param paths: 图书目录文件路径列表（按顺序合并）
+        """
+        policy, ok = QtWidgets.QInputDialog.getItem(
+            self, "合并图书目录", "重复ISBN的合并方式：", list(POLICIES.values()), 0, False)
+        if not ok:
+            return
+        output, _ = QFileDialog.getSaveFileName(
+            self, "保存合并结果", os.path.join(os.path.dirname(paths[0]), "merged.sqlite"), FILE_FILTER)
+        if output == "":
+            return
+        self.mergethread = MergeCatalogList(paths, output, list(POLICIES)[list(POLICIES.values()).index(policy)])
+        self.mergethread.progress_signal.connect(lambda number, total, rows: self.statusBar.showMessage(
+            f"合并图书目录:{total}/{number}，已读取 {rows} 行"))
+        self.mergethread.merged_signal.connect(self.mergefinished)
+        self.mergethread.finished.connect(lambda: self.pb_load.setEnabled(True))
+        self.mergethread.start()
+        self.pb_load.setEnabled(False)
+
+    def mergefinished(self, output, report, error):
+        """
+        合并结束（主线程）：加载合并结果并显示合并报告，失败时提示错误
+        @param output: 合并结果文件路径
+        @param report: 合并报告文本
+        @param error: 错误信息，成功时为空
+        """
+        if error:
+            QtWidgets.QMessageBox.warning(self, "错误", f"合并失败：\n{error}",
+                                          QtWidgets.QMessageBox.StandardButton.Ok)
+            return
+        self.loadcatalog(output)
+        QtWidgets.QMessageBox.information(self, "合并报告", report, QtWidgets.QMessageBox.StandardButton.Ok)
+
     @pyqtSlot()
     def on_pb_save_clicked(self):
         """
@@ -501,20 +878,31 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
         # bookinfo = self.get_douban_isbn(isbn)
         # self.model.appendRow(bookinfo)
         
-        try:
-            csvNamepath, csvType = QFileDialog.getSaveFileName(
-                self, "保存存储文件", "E:\\minipan\\Seafile\\资料", "*.csv;;All Files(*)")
-            if csvNamepath != "":
-                df = self.model._data
-                df.to_csv(csvNamepath, index=False)
-                
-        except PermissionError as e:
+        csvNamepath, csvType = QFileDialog.getSaveFileName(
+            self, "保存存储文件", self.model.journal.source or "E:\\minipan\\Seafile\\资料", FILE_FILTER)
+        if csvNamepath != "":
+            # 后台保存：保存到加载/上次保存的SQLite文件时只写入变化的行，其他格式写临时文件后原子替换
+            future = self.store.save(self.model.dataexport(), csvNamepath, self.model.journal)
+            future.add_done_callback(lambda f: self.saved_signal.emit(
+                csvNamepath, "" if f.exception() is None else str(f.exception())))
+            self.statusBar.showMessage("正在保存 " + csvNamepath)
+
+    def savefinished(self, path, error):
+        """
+        后台保存结束（主线程）：失败时提示错误
+        @param path: 文件路径
+        @param error: 错误信息，成功时为空
+        """
+        if error:
             QtWidgets.QMessageBox.warning(
                 self,                # 父窗口（主窗口）
                 "错误",              # 提示框标题
-                f"文件写入失败：\n{str(e)} \n\n\n请检查文件是否被其他程序占用或以管理员身份运行本程序！",    # 提示内容
+                f"文件写入失败：\n{error} \n\n\n请检查文件是否被其他程序占用或以管理员身份运行本程序！",    # 提示内容
                 QtWidgets.QMessageBox.StandardButton.Ok  # 确认按钮
             )
+        else:
+            self.statusBar.showMessage(
+                "已保存 " + path + "，共 " + str(len(self.model.dataexport())) + " 条记录" + self.appver)
                 
     @pyqtSlot()
     def on_pb_scan_clicked(self):
@@ -535,9 +923,16 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
         # - "."：默认打开路径（当前目录）
         # - "*.png;;*.jpg;;All Files(*)"：文件类型过滤（仅显示png/jpg/所有文件）
         # 返回值：picNamepath=选中文件的路径，picType=选中的文件类型
-        picNamepath, picType = QFileDialog.getOpenFileName(
-            self, "选择条形码图片", ".", "*.png;;*.jpg;;All Files(*)")
-        
+        picNamepaths, picType = QFileDialog.getOpenFileNames(
+            self, "选择条形码图片/视频", ".", SCAN_FILTER)
+        if not picNamepaths:
+            return
+        # 选中多个文件或视频时批量识别，识别到的ISBN依次查询豆瓣并加入图书列表
+        if len(picNamepaths) > 1 or (picNamepaths and not picNamepaths[0].lower().endswith(IMAGE_EXTS)):
+            self.scanbatch(picNamepaths)
+            return
+        picNamepath = picNamepaths[0] if picNamepaths else ""
+
         # ===================== 2. 校验是否选中图片（空路径则不处理） =====================
         if picNamepath != "":
             # image = cv.imread(img_path)
@@ -576,6 +971,95 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
             # self.model.insertRow(self.model.rowCount(),data)
             # self.tv_booklist.setModel(self.model)
 
+    @pyqtSlot(QPoint)
+    def on_pb_scan_customContextMenuRequested(self, pos):
+        """槽函数：“识别”按钮右键菜单，选择文件夹批量识别"""
+        menu = QMenu()
+        folder = menu.addAction("识别文件夹...")
+        if menu.exec(self.pb_scan.mapToGlobal(pos)) == folder:
+            self.scanfolder()
+
+    def scanfolder(self):
+        """选择文件夹，批量识别其中（含子文件夹）的全部图片和视频，取消则不识别"""
+        folder = QFileDialog.getExistingDirectory(self, "选择条形码图片/视频所在文件夹", ".")
+        if folder:
+            self.scanbatch([folder])
+
+    def scanbatch(self, sources):
+        """
+        批量识别条形码（进程池解码，不阻塞界面）
+        已在图书列表中的ISBN不再查询；新识别到的ISBN进入豆瓣查询队列
+        @param sources: 图片/视频文件或文件夹路径列表
+        """
+        self.stopscan()
+        self.scanthread = ScanBarcodeList(sources, known=self.model.getlist(0))
+        self.scanthread.isbn_signal.connect(self.scanqueue)
+        self.scanthread.progress_signal.connect(lambda done, total: self.statusBar.showMessage(
+            f"条码识别:{done}/{total}，待查询 {len(self.lookupqueue)} 本"))
+        self.scanthread.finished.connect(lambda: self.pb_scan.setEnabled(True))
+        self.scanthread.start()
+        self.pb_scan.setEnabled(False)
+
+    def stopscan(self):
+        """停止正在进行的批量识别并等待其进程池关闭"""
+        if self.scanthread is not None and self.scanthread.isRunning():
+            self.scanthread.stop()
+            self.scanthread.wait()
+
+    def stoprefresh(self):
+        """停止批量刷新与识别结果的豆瓣查询：通知worker停止，再结束并等待其线程"""
+        for worker, thread in ((getattr(self, 'worker', None), getattr(self, 'thread', None)),
+                               (getattr(self, 'lookupworker', None), self.lookupthread)):
+            # 已结束的worker/线程会被deleteLater删除，访问时抛出RuntimeError
+            try:
+                if isinstance(worker, RefreshBookinfoList):
+                    worker.stop()
+            except RuntimeError:
+                pass
+            try:
+                if isinstance(thread, QThread) and thread.isRunning():
+                    thread.quit()
+                    thread.wait()
+            except RuntimeError:
+                pass
+
+    def closeEvent(self, event):
+        """关闭窗口：停止批量识别与豆瓣查询，进程池和查询线程不在窗口关闭后继续运行"""
+        self.stopscan()
+        self.stoprefresh()
+        super().closeEvent(event)
+
+    def scanqueue(self, isbns):
+        """识别到新的ISBN：加入豆瓣查询队列"""
+        self.lookupqueue.extend(isbns)
+        self.lookupnext()
+
+    def lookupnext(self):
+        """
+        查询队列中的ISBN（同时只运行一个查询线程，查询期间新识别的ISBN在其结束后继续查询）
+        查询结果通过refreshbookinfolist写入图书列表（不存在的ISBN新增为一行）
+        """
+        if self.lookupthread is not None or not self.lookupqueue:
+            return
+        isbnlist, self.lookupqueue = self.lookupqueue, []
+        self.lookupthread = QThread()
+        self.lookupworker = RefreshBookinfoList(isbnlist, self.douban)
+        self.lookupworker.moveToThread(self.lookupthread)
+        self.lookupthread.started.connect(self.lookupworker.run)
+        self.lookupworker.finished.connect(self.lookupthread.quit)
+        self.lookupworker.finished.connect(self.lookupworker.deleteLater)
+        self.lookupthread.finished.connect(self.lookupthread.deleteLater)
+        self.lookupworker.results.connect(self.refreshbookinfolist)
+        self.lookupthread.finished.connect(self.lookupfinished)
+        self.lookupthread.start()
+
+    def lookupfinished(self):
+        """一批查询结束：继续查询队列中剩余的ISBN"""
+        self.lookupthread = None
+        self.statusBar.showMessage(
+            "共 " + str(self.model.rowCount()) + " 条记录，待查询 " + str(len(self.lookupqueue)) + " 本" + self.appver)
+        self.lookupnext()
+
     def get_douban_isbn(self, isbn):
 
         """
@@ -599,90 +1083,11 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
                  12: 豆瓣详情页URL 13: 推荐度（计算值）
         @rtype: list
         """
-        # ===================== 1. 初始化返回值 & ISBN有效性校验 =====================
-        # 初始化图书信息列表（最终返回）
-        bookinfo = []
         # 校验ISBN长度：豆瓣API仅识别13位标准ISBN，17位为特殊格式（如带分隔符），其他长度直接返回空列表
         if len(isbn) != 13 and len(isbn) != 17:
-            return bookinfo
-        # ===================== 2. 配置豆瓣API请求参数 =====================
-        # 豆瓣图书API地址（按ISBN查询的固定路径）
-        url = "https://api.douban.com/v2/book/isbn/" + isbn
-
-        # API密钥（apikey）：豆瓣开放平台申请，用于提升API调用限额，避免请求被拦截
-        # apikey=0df993c66c0c636e29ecbb5344252a4a
-        # apikey=0ac44ae016490db2204ce0a042db2916
-        payload = {'apikey': '0ab215a8b1977939201640fa14c66bab'}
-        # 请求头：模拟iPhone移动端浏览器，规避豆瓣API的反爬机制（PC端请求易被限制）
-        headers = {
-            "Referer":
-            "https://m.douban.com/tv/american", # 模拟移动端来源页，提升请求合法性
-            "User-Agent":
-            "Mozilla/5.0 (iPhone; CPU iPhone OS 13_2_3 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/13.0.3 Mobile/15E148 Safari/604.1"
-        }
-
-        # {"content-type": "multipart/form-data;","User-Agent": "MicroMessenger/","Referer": "https://servicewechat.com/wx2f9b06c1de1ccfca/91/page-frame.html"}
-        
-        # ===================== 3. 发送API请求并解析响应 =====================
-        # 发送POST请求（豆瓣该API支持POST，相比GET更不易被反爬拦截）
-        response = requests.post(url, data=payload, headers=headers)
-        
-        # 解析JSON响应为字典
-        book_dict = json.loads(response.text)
-
-        # ===================== 4. 数据有效性校验 =====================
-        # 校验响应数据是否完整（字典长度>5，避免返回空/残缺数据
-        if len(book_dict) > 5:
-            # ===================== 5. 数据清洗与格式化 =====================
-            # 处理作者+译者：作者用/分隔，有译者则追加“译者:XXX”
-            author = '/'.join(book_dict['author'])
-            if len(book_dict['translator']) > 0:
-                author += ' 译者: '
-                author += '/'.join(book_dict['translator'])
-            # 提取评分信息（包含平均分、评价人数）
-            rating = book_dict['rating']
-            # 清洗价格：移除CNY/元符号，去除首尾空格（兼容不同格式的价格字符串）
-            price = book_dict['price']
-            price = price.replace('CNY', '').replace('元', '').strip()
-
-            # ===================== 6. 填充图书信息列表（按固定索引） =====================
-            bookinfo.append(isbn)                          # 0: ISBN
-            bookinfo.append(book_dict['title'])            # 1: 书名
-            bookinfo.append(author)                        # 2: 作者+译者
-            bookinfo.append(book_dict['publisher'])        # 3: 出版社
-            bookinfo.append(price)                         # 4: 价格（清洗后）
-            bookinfo.append(rating['average'])             # 5: 豆瓣平均分
-            bookinfo.append(rating['numRaters'])           # 6: 评价人数
-            bookinfo.append('计划')                        # 7: 分类（默认值）
-            bookinfo.append('未设置')                      # 8: 书柜位置（默认值）
-            bookinfo.append(book_dict['images']['small'])  # 9: 封面小图URL（替代原image字段）
-            bookinfo.append(book_dict['pubdate'])          # 10: 出版日期
-            bookinfo.append(book_dict['rating'])           # 11: 完整评分字典（含平均分/人数）
-            bookinfo.append(book_dict['alt'])              # 12: 豆瓣图书详情页URL
-    
-            # ===================== 7. 计算图书推荐度（自定义公式） =====================
-            # 日志记录评分信息（便于调试推荐度计算）
-            LOG.info(f"ISBN {isbn} 评分信息：{rating}")
-            LOG.info(f"ISBN {isbn} 完整图书信息：{book_dict}")
-            
-            # 推荐度公式：(平均分 - 2.5) × ln(评价人数 + 1)
-            # 设计逻辑：
-            # - 减2.5：过滤低分图书（平均分<2.5时推荐度为负）
-            # - +1：避免评价人数为0时ln(0)抛出数学异常
-            # - round：四舍五入取整
-            recommend = round((float(rating['average']) - 2.5) *
-                              math.log(float(rating['numRaters']) + 1)) 
-            bookinfo.append(str(recommend)) # 13: 推荐度（字符串格式）
-            bookinfo.append(book_dict['pages']) # 14: 页数
-        else:
-            # ===================== 8. 无效数据处理（返回固定长度空值） =====================
-            # 响应数据残缺时，填充13个空格，保证返回列表长度统一，避免调用方索引越界
-            # for i in range(13):
-            #     bookinfo.append(" ")
-            return None
-        
-        # ===================== 9. 返回格式化后的图书信息 =====================        
-        return bookinfo
+            return []
+        # 先查本地缓存，未命中再访问豆瓣API；请求失败/数据残缺时返回空列表
+        return self.douban.get_bookinfo_by_isbn(isbn) or []
 
     @pyqtSlot()
     def on_pb_insert_clicked(self):
@@ -835,34 +1240,26 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
         # ===================== 6. 填充书柜位置输入框 =====================
         self.le_bookshelf.setText(bookinfo[8])
 
-    def refreshonebookinfo(self, arow):
+    def refreshbookinfolist(self, bookinfos):
         """
-        核心方法：单本图书信息刷新（多线程批量刷新的回调方法）
-        核心逻辑：
-        1. 根据传入的ISBN调用豆瓣API，获取最新图书信息
-        2. 校验返回数据的有效性（核心字段≥7个），避免无效数据更新
-        3. 记录关键图书信息日志（便于调试），更新表格模型中的对应记录
-        4. 递增刷新计数，更新状态栏显示当前刷新进度
-        注：该方法由多线程的progress信号触发，逐本刷新图书信息，避免UI阻塞
-    
-        @param arow: 待刷新图书的ISBN（唯一标识），由多线程传递
-        @type arow: str
-        """
-        # ===================== 1. 调用豆瓣API获取单本图书最新信息 =====================
-        # get_douban_isbn：自定义方法，传入ISBN返回图书信息列表（含ISBN、书名、作者等）
-        bookinfo = self.get_douban_isbn(arow)
-
-        # ===================== 2. 数据有效性校验（避免无效数据更新） =====================
-        # 校验返回的图书信息至少包含7个核心字段（ISBN、书名、作者、出版社、价格、评分、评价人数）
-        if len(bookinfo) >= 7:
-            # 日志记录：拼接前5个核心字段（ISBN、书名、作者、出版社、价格），便于调试
-            LOG.info('-'.join(bookinfo[:5]))
-            # 更新表格模型中的对应记录（ISBN为唯一标识，存在则更新，不存在则新增）
-            self.model.updateItem(bookinfo)
-        # ===================== 3. 递增刷新计数，更新进度反馈 =====================
-        # self.number：批量刷新的全局计数，每刷新一本+1    
-        self.number += 1
+        核心方法：批量图书信息刷新（多线程批量刷新的回调方法）
+        子线程已完成请求与解析，这里只把一批结果写入表格模型（整批只刷新一次视图）
 
+        @param bookinfos: 一批图书信息列表（每项格式同get_douban_isbn的返回值），由多线程传递
+        @type bookinfos: list
+        """
+        # 更新表格模型中的对应记录（ISBN为唯一标识，存在则更新，不存在则新增）
+        self.model.updateItems(bookinfos)
+
+    def refreshprogress(self, number):
+        """
+        更新批量刷新进度
+
+        @param number: 已完成刷新的数量
+        @type number: int
+        """
+        # self.number：批量刷新的全局计数
+        self.number = number
         # 更新状态栏：显示当前刷新进度（格式：信息更新:总数量/当前数量）
         # self.barstr：预定义进度前缀（如"信息更新:100/"），拼接当前计数后显示
         self.statusBar.showMessage(self.barstr + str(self.number))
@@ -872,7 +1269,7 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
         """
         槽函数：响应“批量刷新”按钮点击事件，多线程批量更新表格中所有ISBN的图书信息
         核心设计：
-        1. 避免UI线程阻塞：将耗时的API调用放到子线程执行
+        1. 避免UI线程阻塞：API请求与解析在子线程的线程池中并发执行（共享连接池，令牌桶限流），结果按批交回主线程
         2. 生命周期管理：线程/工作对象完成后自动销毁，避免内存泄漏
         3. 状态反馈：禁用刷新按钮防止重复点击，线程结束后恢复按钮并更新状态栏
         4. 进度传递：通过自定义信号逐本刷新图书信息，实时反馈进度
@@ -890,7 +1287,7 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
         # Step 1: 创建QThread线程对象（管理子线程生命周期）
         self.thread = QThread()
         # Step 2: 创建工作对象（封装批量刷新逻辑，不含UI操作）
-        self.worker = RefreshBookinfoList(isbnlist)
+        self.worker = RefreshBookinfoList(isbnlist, self.douban)
         # Step 3: 将工作对象移动到子线程（PyQt6要求：UI相关操作必须在主线程，耗时操作在子线程）
         self.worker.moveToThread(self.thread)
 
@@ -904,9 +1301,10 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
         self.worker.finished.connect(self.worker.deleteLater)  # 完成后删除对象
         # 线程退出 → 销毁线程对象（释放内存）
         self.thread.finished.connect(self.thread.deleteLater)  # 完成后删除对象
-        # 工作对象的progress信号 → 绑定到单本图书刷新方法（逐本更新UI）
-        self.worker.progress.connect(
-            self.refreshonebookinfo)  # 绑定 progress 的信号
+        # 工作对象的results信号 → 绑定到批量刷新方法（按批更新模型）
+        self.worker.results.connect(self.refreshbookinfolist)
+        # 工作对象的progress信号 → 更新状态栏进度
+        self.worker.progress.connect(self.refreshprogress)  # 绑定 progress 的信号
         
         # ===================== 4. 启动线程 & 控制UI状态 =====================
         # 启动子线程（触发thread.started信号，进而执行worker.run）
@@ -976,11 +1374,14 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
 
     def genLoveMenu(self, pos):
         """
-        自定义右键菜单，添加删除选项
+        自定义右键菜单，添加删除、推荐度排序选项
         """
         menu = QMenu(self)
         ico_del = QIcon('delete.png')
         self.dele = menu.addAction(ico_del, u"删除")
+        menu.addSeparator()
+        self.rank = menu.addAction(u"按推荐度排序")
+        self.rank_top = menu.addAction(f"推荐度前{TOP_BOOKS}本")
         self.action = menu.exec(self.tv_booklist.mapToGlobal(pos))
 
     @pyqtSlot(QPoint)
@@ -1048,11 +1449,16 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
                     for isbn in isbnlist:
                         self.model.deleteItem(isbn)
                         LOG.info(f"删除信息： {isbn}")
-                    # ===================== 7. 更新状态栏（反馈删除结果） =====================
-                    # 状态栏显示当前剩余记录数 + 软件版本信息
-                    self.statusBar.showMessage("共 " +
-                                               str(self.model.rowCount()) +
-                                               " 条记录" + self.appver)
+                # 推荐度排序（筛选时只排序筛选结果，重置后恢复原顺序）
+                elif self.action in (self.rank, self.rank_top):
+                    self.model.sortByRecommend(TOP_BOOKS if self.action == self.rank_top else None)
+                else:
+                    return
+                # ===================== 7. 更新状态栏（反馈删除/排序结果） =====================
+                # 状态栏显示当前显示的记录数 + 软件版本信息
+                self.statusBar.showMessage("共 " +
+                                           str(self.model.rowCount()) +
+                                           " 条记录" + self.appver)
 
     @pyqtSlot()
     def on_pb_search_clicked(self):
@@ -1155,6 +1561,40 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
         #                                          tb_y+move_y, self.CW_bookinfo.tb_bookinfo.width(),
         #                                          self.CW_bookinfo.tb_bookinfo.height())
 
+    def showcover(self, url, pixmap):
+        """
+        封面下载完成：仍是详情窗口当前图书的封面时显示
+        @param url: 封面URL
+        @param pixmap: 封面图片
+        """
+        if url == self.coverurl and hasattr(self, 'CW_bookinfo'):
+            self.CW_bookinfo.lb_bookcover.setPixmap(pixmap)
+
+    def prefetchcovers(self, isbns):
+        """
+        预取封面：只使用本地缓存中已有的图书信息取得封面URL（不为预取访问豆瓣API）
+        @param isbns: ISBN列表
+        """
+        if self.douban.cache is None:
+            return
+        urls = []
+        for isbn in isbns:
+            bookinfo, fresh = self.douban.cache.get(str(isbn))
+            if bookinfo:
+                urls.append(bookinfo[9])
+        self.covers.prefetch(urls)
+
+    def prefetchvisible(self):
+        """预取表格可见行的封面"""
+        first = self.tv_booklist.rowAt(0)
+        if first < 0:
+            return
+        last = self.tv_booklist.rowAt(self.tv_booklist.viewport().height() - 1)
+        if last < 0:
+            last = self.model.rowCount() - 1
+        self.prefetchcovers(self.model.data(self.model.index(row, 0), Qt.ItemDataRole.DisplayRole)
+                            for row in range(first, last + 1))
+
     def refreshBookInfo(self, ISBN):
         """
         核心方法：根据ISBN从豆瓣接口获取图书完整信息，刷新图书详情子窗口的内容与布局
@@ -1179,27 +1619,22 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
                 QtWidgets.QMessageBox.StandardButton.Ok  # 确认按钮
                 )
             return   
-        # ===================== 2. 下载图书封面图片（处理反爬限制） =====================
+        # ===================== 2. 显示图书封面（看过的封面立即显示，否则后台下载） =====================
         # 提取封面图片URL（douban_bookinfo[9]为封面小图URL）
-        url = douban_bookinfo[9]
-        # 构造Referer请求头：豆瓣图片防盗链，需指定来源域名（从封面URL提取域名）
-        ref = 'https://' + url.split('/')[2]
-        
-        # 请求头：模拟浏览器，避免图片请求被拒绝（403 Forbidden）
-        header = {
-            'User-Agent':
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36 Edg/114.0.1823.79'
-        }
-        header['Referer'] = ref
-        # 发送GET请求下载封面图片数据
-
-        res = requests.get(douban_bookinfo[9], headers=header, timeout=5)
-        # 将图片二进制数据转换为QImage（PyQt6可识别的图片格式）
-        img = QImage.fromData(res.content)
-
-        # self.CW_bookinfo = BookInfo.BookInfo(parent=self)
-        # 将QImage转换为QPixmap，设置到详情窗口的封面标签（lb_bookcover）
-        self.CW_bookinfo.lb_bookcover.setPixmap(QPixmap.fromImage(img))
+        self.coverurl = douban_bookinfo[9]
+        pixmap = self.covers.pixmap(self.coverurl)
+        if pixmap is not None:
+            # 将封面设置到详情窗口的封面标签（lb_bookcover）
+            self.CW_bookinfo.lb_bookcover.setPixmap(pixmap)
+        else:
+            # 下载完成后由showcover显示
+            self.CW_bookinfo.lb_bookcover.clear()
+            self.covers.request(self.coverurl)
+        # 预取前后两本图书的封面，切换时无需等待
+        isbn_list = self.CW_bookinfo.isbn_list
+        if isbn_list:
+            indx = self.CW_bookinfo.indx
+            self.prefetchcovers([isbn_list[(indx + 1) % len(isbn_list)], isbn_list[indx - 1]])
 
         # ===================== 3. 构建富文本信息，填充到文本框（tb_bookinfo） =====================
         # 清空文本框（可选，若需保留历史可注释）
@@ -1231,25 +1666,14 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
             '<br><b>链接: &emsp;&emsp;&emsp;&emsp;&emsp; </b>[<a style="color: #FFFFFF;" href="' + douban_bookinfo[12] + '"> 豆瓣 </a>]')
         
         # ===================== 4. 计算图书推荐度（自定义公式） =====================
-        # 推荐度公式：(豆瓣平均分 - 2.5) × ln(评价人数) → 兼顾评分和评价人数的综合推荐值
-        # 注：2.5为基础分（过滤低分图书），ln为自然对数（放大评价人数的权重）
-        
-        try:
-            avg_score = float(douban_bookinfo[11]['average'])  # 豆瓣平均分
-            raters_count = float(douban_bookinfo[11]['numRaters'])  # 评价人数
-            # 避免对数计算异常（评价人数为0时ln无意义，默认推荐度0）
-            if raters_count <= 0:
-                recommend_score = 0.0
-            else:
-                recommend_score = (avg_score - 2.5) * math.log(raters_count)
-            # 四舍五入取整，追加到文本框
-            self.CW_bookinfo.tb_bookinfo.append(
-                '<br><b>推荐: </b>' + str(round(recommend_score))
-            )
-        except Exception as e:
-            # 异常处理：评分/人数格式错误时显示推荐度0
-            LOG.warning(f"计算推荐度失败（ISBN：{ISBN}）：{e}")
-            self.CW_bookinfo.tb_bookinfo.append('<br><b>推荐: </b>0')
+        # 推荐度公式：(豆瓣平均分 - 2.5) × ln(评价人数 + 1) → 兼顾评分和评价人数的综合推荐值
+        # 注：公式统一由bookrank.recommend计算（与豆瓣查询结果中的推荐度、表格的推荐度排序一致）
+        rating = douban_bookinfo[11] if isinstance(douban_bookinfo[11], dict) else {}
+        recommend_score = recommend(rating.get('average'), rating.get('numRaters'))
+        # 四舍五入取整，追加到文本框
+        self.CW_bookinfo.tb_bookinfo.append(
+            '<br><b>推荐: </b>' + str(round(recommend_score))
+        )
         
         
         
@@ -1404,26 +1828,33 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
      
         self.pb_export.setEnabled(False)
         
-        self.worker = ExportBookinfoList(isbnlist)
+        self.worker = ExportBookinfoList(isbnlist, self.douban)
 
         self.worker.finished.connect((lambda: self.pb_export.setEnabled(True)))  # 结束后通知结束
         self.worker.finished.connect(lambda: self.statusBar.showMessage(
             "共 " + str(self.model.rowCount()) + " 条记录" + self.appver))
         self.worker.finished.connect(self.exportlist)
-        # 工作对象完成 → 销毁工作对象（释放内存，避免泄漏）
-        self.worker.progress_signal.connect(self.getBookInfo)  # 完成后删除对象
-        # 线程退出 → 销毁线程对象（释放内存）
+        # 子线程查询到一本图书 → 加入导出列表
+        self.worker.bookinfo_signal.connect(self.getBookInfo)
+        # 查询进度 → 更新状态栏
+        self.worker.progress_signal.connect(lambda number: self.statusBar.showMessage(
+            '信息导出:' + str(len(isbnlist)) + '/' + str(number)))
         self.worker.start()
 
-    def getBookInfo(self,isbn):
-
-        bookinfo = self.get_douban_isbn(isbn)
+    def getBookInfo(self, index, bookinfo):
+        """
+        接收子线程查询到的图书信息
+        :param index: ISBN在导出列表中的位置（用于恢复导出顺序）
+        :param bookinfo: 图书信息列表（格式同get_douban_isbn）
+        """
         del bookinfo[11]
-        self.bookinfolist.append(bookinfo)
+        self.bookinfolist.append((index, bookinfo))
+
     def exportlist(self):
         try:
             if self.csvNamepath != "":                
-                df = pd.DataFrame(self.bookinfolist,columns = bcollong)
+                rows = [bookinfo for index, bookinfo in sorted(self.bookinfolist, key=lambda item: item[0])]
+                df = pd.DataFrame(rows,columns = bcollong)
                 df.to_csv(self.csvNamepath, index=False)
                 QtWidgets.QMessageBox.information(self, "提示", "保存成功！",
                     QtWidgets.QMessageBox.StandardButton.Ok  # 确认按钮
@@ -1438,304 +1869,107 @@ class BLmainWindow(QMainWindow, Ui_mainWindow):
 
         
 class ExportBookinfoList(QThread):
-    
-    progress_signal = pyqtSignal(str)
-    
-    def __init__(self, isbnlist):
+    """
+    批量导出图书信息线程：通过IsbnResolver并发查询，结果按完成顺序逐条交回主线程
+    """
+    # 自定义信号：(ISBN在导出列表中的位置, 图书信息列表)
+    bookinfo_signal = pyqtSignal(int, list)
+    # 自定义信号：已完成的ISBN数量
+    progress_signal = pyqtSignal(int)
+
+    def __init__(self, isbnlist, api=None, workers=DOUBAN_CONCURRENCY):
         """
-        初始化刷新线程
-        :param isbn_list: 需要刷新的ISBN列表
+        初始化导出线程
+        :param isbnlist: 需要导出的ISBN列表
+        :param api: DouBanApi实例（带缓存时未过期的图书不再请求），默认新建
+        :param workers: 并发请求数
         """
         super(ExportBookinfoList, self).__init__()
-        self.isbnlist = isbnlist
+        self.isbnlist = list(isbnlist)
+        self.api = api
+        self.workers = workers
 
     def run(self):
-        for isbn in self.isbnlist:
-
-            self.progress_signal.emit(isbn)   # 发送当前刷新的ISBN
-        self.finished.emit()  # 发出结束的信号
- 
-class DouBanApi:
+        # 同一ISBN只查询一次，结果按原列表位置交回，保证导出顺序不变
+        position = {isbn: i for i, isbn in reversed(list(enumerate(self.isbnlist)))}
+        done = 0
+        resolver = IsbnResolver(self.api, concurrency=self.workers)
+        for isbn, bookinfo in resolver.iter_resolve(list(position)):
+            done += 1
+            if bookinfo:
+                self.bookinfo_signal.emit(position[isbn], bookinfo)
+            self.progress_signal.emit(done)
+        # run返回后QThread自动发出finished信号
+
+
+class ScanBarcodeList(QThread):
     """
-    豆瓣图书API封装类
-    功能：
-        1. 通过ISBN精准查询单本图书信息
-        2. 通过书名模糊搜索多本图书信息
-        3. 自动清洗图书数据（价格、作者/译者格式）
-        4. 计算图书推荐度（基于评分和评价人数）
-    依赖：
-        - requests: 发送HTTP请求（需提前安装：pip install requests）
-        - math: 推荐度计算（自然对数）
-        - logging: 日志记录
-        - json: 响应数据解析
-    豆瓣API文档参考：https://developers.douban.com/wiki/?title=book_v2
+    批量条形码识别线程：图片/视频在进程池中并行解码，新识别到的ISBN按批交回主线程
     """
-    """
-    豆瓣图书API封装类
-    核心特性：
-        - 自动处理API请求头（模拟移动端，规避反爬）
-        - 全字段容错（避免KeyError/TypeError）
-        - 数据清洗（价格、作者/译者格式统一）
-        - 异常捕获（网络错误、解析错误、计算错误）
-        - 连接复用（Session减少TCP握手开销）
-    """    
-    def __init__(self, value:str):
-        self.value = value
-        self.url_isbn = "https://api.douban.com/v2/book/isbn/"
-        self.url_search = "https://api.douban.com/v2/book/search"
-        self.key='0ab215a8b1977939201640fa14c66bab'
-        # API密钥（apikey）：豆瓣开放平台申请，用于提升API调用限额，避免请求被拦截
-        # apikey=0df993c66c0c636e29ecbb5344252a4a
-        # apikey=0ac44ae016490db2204ce0a042db2916
-        self.payload_isbn = {'apikey': '0ab215a8b1977939201640fa14c66bab'}
-        self.payload_search = {'apikey': '0ab215a8b1977939201640fa14c66bab'}
-        # 请求头：模拟iPhone移动端浏览器，规避豆瓣API的反爬机制（PC端请求易被限制）
-        self.headers = {
-            "Referer":
-            "https://m.douban.com/tv/american", # 模拟移动端来源页，提升请求合法性
-            "User-Agent":
-            "Mozilla/5.0 (iPhone; CPU iPhone OS 13_2_3 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/13.0.3 Mobile/15E148 Safari/604.1"
-        } 
-            
-            
-    def _get_safe_value(self, data: Dict[str, Any], keys: List[str], default: Any = "") -> Any:
-        """
-        安全获取嵌套字典的值，避免KeyError
-        :param data: 源字典
-        :param keys: 嵌套键列表（如['images', 'small']）
-        :param default: 默认值
-        :return: 目标值或默认值
-        """
-        current = data
-        for key in keys:
-            if isinstance(current, dict) and key in current:
-                current = current[key]
-            else:
-                return default
-        return current            
-
-    def _clean_price(self, price: str) -> str:
-        """
-        价格字段清洗（统一格式）
-        处理场景：
-            - 原始价格可能包含"CNY"（如"CNY 99.00"）
-            - 原始价格可能包含"元"（如"99.00元"）
-            - 原始价格可能有首尾空格（如" 99.00 "）
-        :param price: 原始价格字符串
-        :return: 清洗后的价格（如"99.00"）
-        """
-        if not price:
-            return ""
-        return price.replace("CNY", "").replace("元", "").strip()
-
-    def _calculate_recommend(self, average: str, num_raters: str) -> int:
-        """
-        计算图书推荐度（自定义公式，带全量容错）
-        公式逻辑：
-            - (平均分 - 2.5)：过滤低分图书（平均分<2.5时推荐度为负/0）
-            - × ln(评价人数 + 1)：评价人数越多，权重越高（+1避免ln(0)异常）
-            - round：四舍五入为整数，便于展示
-        :param average: 豆瓣平均分（可能为字符串/空值/非数字）
-        :param num_raters: 评价人数（可能为字符串/空值/非数字）
-        :return: 推荐度（整数，异常时返回0）
+    # 自定义信号：一批新识别到的ISBN
+    isbn_signal = pyqtSignal(list)
+    # 自定义信号：(已完成任务数, 任务总数)
+    progress_signal = pyqtSignal(int, int)
+
+    def __init__(self, sources, known=(), workers=None):
         """
-        try:
-            avg = float(average) if average else 0.0
-            num = float(num_raters) if num_raters else 0.0
-            if avg < 2.5 or num < 0:
-                return 0
-            # 推荐度公式：(平均分 - 2.5) × ln(评价人数 + 1)
-            recommend = (avg - 2.5) * math.log(num + 1)
-            return round(recommend)
-        except (ValueError, math.DomainError):
-            LOG.error(f"计算推荐度失败：平均分={average}，评价人数={num_raters}")
-            return 0
-    
-    def get_bookinfo_by_isbn(self,isbn:str) -> Optional[List[str]]:
-        """
-        通过ISBN精准查询单本图书信息（核心方法）
-        :param isbn: 图书ISBN编号（如"9787115428028"）
-        :return: 格式化图书信息列表（固定15个元素）/None（无效数据/异常）
-        返回列表索引说明：
-            0: ISBN编号
-            1: 书名
-            2: 作者+译者（格式："作者1/作者2 译者: 译者1/译者2"）
-            3: 出版社
-            4: 价格（清洗后）
-            5: 豆瓣平均分
-            6: 评价人数
-            7: 分类（默认"计划"）
-            8: 书柜位置（默认"未设置"）
-            9: 封面小图URL
-            10: 出版日期
-            11: 完整评分信息（字符串化字典）
-            12: 豆瓣图书详情页URL
-            13: 推荐度（整数转字符串）
-            14: 页数
-        """
-        # 前置校验：ISBN为空直接返回None
-        if not isbn:
-            LOG.warning("ISBN为空")
-            return None
-        # 拼接完整请求URL：基础URL + ISBN（豆瓣ISBN接口要求ISBN拼在URL后）
-        self.url_isbn = self.url_isbn + isbn
-        url = f"{self.url_isbn}{isbn}"
-        
-        try:
-            # 发送GET请求（豆瓣ISBN接口仅支持GET，原代码误用POST）
-            # 参数说明：params传递API Key，timeout避免网络卡死
-
-            response = requests.post(url, data=self.payload_isbn, headers=self.headers)
-            # 解析JSON响应（豆瓣API返回UTF-8编码的JSON）
-            book_dict = json.loads(response.text)
-        except requests.exceptions.RequestException as e:
-            LOG.error(f"ISBN {isbn} 请求失败：{str(e)}")
-            return None
-        except json.JSONDecodeError:
-            LOG.error(f"ISBN {isbn} 响应解析失败：{response.text}")
-            return None
-        
-        bookinfo =[]
-        
-        # 过滤残缺数据：字段数<最小阈值 → 返回None 
-        if len(book_dict) > 5:
-            # ===================== 5. 数据清洗与格式化 =====================
-            # 处理作者+译者：作者用/分隔，有译者则追加“译者:XXX”
-            author = '/'.join(book_dict['author'])
-            if len(book_dict['translator']) > 0:
-                author += ' 译者: '
-                author += '/'.join(book_dict['translator'])
-            # 提取评分信息（包含平均分、评价人数）
-            rating = book_dict['rating']
-            # 清洗价格：移除CNY/元符号，去除首尾空格（兼容不同格式的价格字符串）
-            price = book_dict['price']
-            price = price.replace('CNY', '').replace('元', '').strip()
-
-            # ===================== 6. 填充图书信息列表（按固定索引） =====================
-            bookinfo.append(isbn)                          # 0: ISBN
-            bookinfo.append(book_dict['title'])            # 1: 书名
-            bookinfo.append(author)                        # 2: 作者+译者
-            bookinfo.append(book_dict['publisher'])        # 3: 出版社
-            bookinfo.append(price)                         # 4: 价格（清洗后）
-            bookinfo.append(rating['average'])             # 5: 豆瓣平均分
-            bookinfo.append(rating['numRaters'])           # 6: 评价人数
-            bookinfo.append('计划')                        # 7: 分类（默认值）
-            bookinfo.append('未设置')                      # 8: 书柜位置（默认值）
-            bookinfo.append(book_dict['images']['small'])  # 9: 封面小图URL（替代原image字段）
-            bookinfo.append(book_dict['pubdate'])          # 10: 出版日期
-            bookinfo.append(book_dict['rating'])           # 11: 完整评分字典（含平均分/人数）
-            bookinfo.append(book_dict['alt'])              # 12: 豆瓣图书详情页URL
-    
-            # ===================== 7. 计算图书推荐度（自定义公式） =====================
-            # 日志记录评分信息（便于调试推荐度计算）
-            LOG.info(f"ISBN {isbn} 评分信息：{rating}")
-            LOG.info(f"ISBN {isbn} 完整图书信息：{book_dict}")
-            
-            # 推荐度公式：(平均分 - 2.5) × ln(评价人数 + 1)
-            # 设计逻辑：
-            # - 减2.5：过滤低分图书（平均分<2.5时推荐度为负）
-            # - +1：避免评价人数为0时ln(0)抛出数学异常
-            # - round：四舍五入取整
-            # recommend = round((float(rating['average']) - 2.5) *
-            #                   math.log(float(rating['numRaters']) + 1)) 
-            recommend = self._calculate_recommend(rating['average'], rating['numRaters'])
-            bookinfo.append(str(recommend)) # 13: 推荐度（字符串格式）
-            bookinfo.append(book_dict['pages']) # 14: 页数
-        else:
-            # ===================== 8. 无效数据处理（返回固定长度空值） =====================
-            # 响应数据残缺时，填充13个空格，保证返回列表长度统一，避免调用方索引越界
-            # for i in range(13):
-            #     bookinfo.append(" ")
-            LOG.info(f"ISBN {isbn} 图书信息不完整！")
-            return []
-        
-        # ===================== 9. 返回格式化后的图书信息 =====================        
-        return bookinfo        
+        初始化识别线程
+        :param sources: 图片/视频文件或文件夹路径列表
+        :param known: 已在图书列表中的ISBN（不再返回）
+        :param workers: 解码进程数，默认CPU核数
+        """
+        super(ScanBarcodeList, self).__init__()
+        self.sources = list(sources)
+        self.known = set(known)
+        self.workers = workers
+        self.stopped = False
 
-        
-    def search_bookinfo_by_name(self, bookname:str)  -> Optional[List[str]]:
+    def stop(self):
+        """停止识别（未开始的任务取消）"""
+        self.stopped = True
+
+    def run(self):
+        with BarcodeScanner(self.workers) as scanner:
+            for isbns, done, total in scanner.iter_scan(self.sources, self.known, stop=lambda: self.stopped):
+                if self.stopped:
+                    break
+                if isbns:
+                    LOG.info(f"识别到ISBN {len(isbns)} 个: {isbns}")
+                    self.isbn_signal.emit(isbns)
+                self.progress_signal.emit(done, total)
+
+
+class MergeCatalogList(QThread):
+    """
+    图书目录合并线程：多个文件分块流式合并（见bookmerge），完成后把合并报告交回主线程
+    """
+    # 自定义信号：(当前文件序号, 文件总数, 已读取行数)
+    progress_signal = pyqtSignal(int, int, int)
+    # 自定义信号：(合并结果文件, 合并报告, 错误信息（成功时为空）)
+    merged_signal = pyqtSignal(str, str, str)
+
+    def __init__(self, paths, output, policy='first'):
         """
-        通过书名模糊搜索多本图书信息
-        :param bookname: 图书名称（支持模糊匹配，如"Python编程"）
-        :return: 图书信息列表的列表（每个子列表格式同get_bookinfo_by_isbn）
+        初始化合并线程
+        :param paths: 图书目录文件路径列表
+        :param output: 合并结果文件路径
+        :param policy: 重复ISBN的冲突策略（见bookmerge.POLICIES）
         """
-        # 前置校验：书名为空直接返回空列表
-        if not bookname:
-            LOG.warning("搜索书名为空")
-            return []
-        
-        self.payload_search['q']= bookname
+        super(MergeCatalogList, self).__init__()
+        self.paths = list(paths)
+        self.output = output
+        self.policy = policy
+
+    def run(self):
         try:
-            # 发送GET请求（豆瓣搜索接口仅支持GET）
-            response = requests.get(self.url_search, params=self.payload_search, headers=self.headers)
-            # 解析搜索结果（豆瓣返回格式：{"count":20, "start":0, "total":3000, "books":[...]}）
-            """
-            {
-              "count": 20,
-              "start": 0,
-              "total": 3000,
-              "books": [
-                  {},
-                  {},
-                  ....
-            }
-            """
-            booklist = response.json()['books']
-        except requests.exceptions.RequestException as e:
-            LOG.error(f"搜索书名 {bookname} 请求失败：{str(e)}")
-            return []
-        except json.JSONDecodeError:
-            LOG.error(f"搜索书名 {bookname} 响应解析失败：{response.text}")
-            return []
-        books = []
-        
-        for book_dict in booklist:
-            # 单本图书的信息列表（按字段顺序整理）
-            bookinfo = []
-            # 过滤无效数据（字段过少的图书）
-            if len(book_dict) > 5:
-                # print('==='*30)
-                # print(book_dict)
-                # 过滤无ISBN13的图书（ISBN13是唯一标识，必须存在）
-                # 过滤无ISBN13的图书（ISBN13是唯一标识，必须存在）
-                if ('isbn13' not in book_dict):
-                    LOG.debug(f"跳过无ISBN13的图书：书名={self._get_safe_value(book_dict, ['title'])}")
-                    continue
-                # 1. 处理作者+译者：作者用/分隔，有译者则追加“译者:XXX”
-                author = '/'.join(book_dict['author'])  # 作者列表转字符串
-                if len(book_dict['translator']) > 0:
-                    author += ' 译者: '
-                    author += '/'.join(book_dict['translator'])  # 存在译者时
-                 # 2. 处理评分、价格等字段
-                rating = book_dict['rating']  # 评分信息（包含平均分、评价人数）
-                price = book_dict['price'] # 价格（可能为空）
-                # 清洗价格：移除CNY/元符号，去除首尾空格
-                price = price.replace('CNY', '').replace('元', '').strip()
-                # 3. 按顺序填充核心字段（与表格列对应）
-                bookinfo.append(book_dict['isbn13'])          # 0: ISBN13
-                bookinfo.append(book_dict['title'])           # 1: 书名
-                bookinfo.append(author)                       # 2: 作者+译者
-                bookinfo.append(book_dict['publisher'])       # 3: 出版社
-                bookinfo.append(price)                        # 4: 价格（清洗后）
-                bookinfo.append(rating['average'])            # 5: 豆瓣平均分
-                bookinfo.append(rating['numRaters'])          # 6: 评价人数
-                bookinfo.append('计划')                       # 7: 分类（默认“计划”）
-                bookinfo.append('未设置')                     # 8: 书柜位置（默认“未设置”）
-                # 补充扩展字段（不展示在表格，但用于传递给父窗口）
-                bookinfo.append(book_dict['images']['small']) # 9: 图书封面小图URL
-                bookinfo.append(book_dict['pubdate'])         # 10: 出版日期
-                bookinfo.append(book_dict['rating'])          # 11: 完整评分信息
-                bookinfo.append(book_dict['alt'])             # 12: 豆瓣图书详情页URL
-
-                # 将单本图书信息加入总列表
-                books.append(bookinfo)        
-        
-        return books
-    
-    def __del__(self):
-        pass
+            report = merge_catalogs(self.paths, self.output, self.policy, progress=self.progress_signal.emit)
+        except Exception as e:
+            LOG.warning(f"合并图书目录失败：{e}")
+            self.merged_signal.emit(self.output, "", str(e))
+        else:
+            self.merged_signal.emit(self.output, report.summary(), "")
+
 
-        
 if __name__ == "__main__":
     # 创建应用程序
     app = QApplication(sys.argv)
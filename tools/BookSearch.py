@@ -4,14 +4,14 @@
 Module: BookSearch.py
 功能：实现豆瓣图书搜索对话框，支持关键词搜索豆瓣图书API、展示搜索结果表格、双击选中图书并发送信息到父窗口
 依赖：
-    - PyQt6（UI组件、信号槽、表格模型）
+    - PyQt6（UI组件、信号槽、表格模型、后台线程）
     - requests（HTTP请求调用豆瓣API）
-    - pandas/numpy（数据处理）
+说明：搜索结果分页并发获取，逐页追加到表格；重新搜索或关闭对话框时取消未完成的搜索
 """
 
 # PyQt6核心模块：槽函数装饰器、模型索引、自定义信号
 
-from PyQt6.QtCore import pyqtSlot, QModelIndex, pyqtSignal
+from PyQt6.QtCore import pyqtSlot, QModelIndex, pyqtSignal, QAbstractTableModel, Qt, QThread
 # PyQt6UI组件：应用程序、对话框
 from PyQt6.QtWidgets import QApplication, QDialog, QMessageBox
 
@@ -19,14 +19,91 @@ from PyQt6.QtWidgets import QApplication, QDialog, QMessageBox
 from Ui_BooSearch import Ui_Dialog
 # 系统模块：程序入口、命令行参数
 import sys
-# HTTP请求模块：调用豆瓣API
-import requests
-# PyQt6表格模型：标准项模型（用于构建搜索结果表格）
-from PyQt6.QtGui import QStandardItemModel, QStandardItem
-# 数据处理模块：DataFrame、数组操作
-import pandas as pd
-import numpy as np
+import threading
 from doubanapi import DouBanApi
+from doubancache import get_cache
+
+# 搜索结果表格的列（图书信息列表的前9项）
+HEADERS = ['ISBN', '书名', '作者', '出版', '价格', '评分', '人数', '分类', '书柜']
+
+
+class SearchResultModel(QAbstractTableModel):
+    """
+    搜索结果表格模型：直接引用图书信息列表显示，按页追加行（只通知新增的行），按ISBN去重
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._books = []     # 图书信息列表的列表
+        self._isbns = set()  # 已显示的ISBN
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._books)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(self._books[index.row()][index.column()])
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def appendBooks(self, books):
+        """
+        追加一页搜索结果（跳过已显示的ISBN）
+        :param books: 图书信息列表的列表
+        """
+        books = [book for book in books if book[0] not in self._isbns]
+        if not books:
+            return
+        first = len(self._books)
+        self.beginInsertRows(QModelIndex(), first, first + len(books) - 1)
+        self._books.extend(books)
+        self._isbns.update(book[0] for book in books)
+        self.endInsertRows()
+
+    def clear(self):
+        """清空搜索结果"""
+        self.beginResetModel()
+        self._books = []
+        self._isbns = set()
+        self.endResetModel()
+
+    def bookinfo(self, row):
+        """返回指定行的完整图书信息列表"""
+        return self._books[row]
+
+
+class SearchThread(QThread):
+    """
+    分页搜索线程：按页顺序交回搜索结果，stop()后不再请求新的页
+    """
+    # 自定义信号：(搜索序号, 结果总数, 本页图书信息列表的列表)
+    page_signal = pyqtSignal(int, int, list)
+
+    def __init__(self, api, bookname, generation, parent=None):
+        """
+        :param api: DouBanApi实例
+        :param bookname: 搜索关键词
+        :param generation: 搜索序号（对话框据此丢弃已取消搜索的结果）
+        :param parent: 父对象
+        """
+        super().__init__(parent)
+        self.api = api
+        self.bookname = bookname
+        self.generation = generation
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        """取消搜索（进行中的请求结束后丢弃，未开始的页不再请求）"""
+        self.stop_event.set()
+
+    def run(self):
+        for total, books in self.api.iter_search(self.bookname, stop=self.stop_event):
+            self.page_signal.emit(self.generation, total, books)
 
 
 class BookSearch(QDialog, Ui_Dialog):
@@ -56,6 +133,14 @@ class BookSearch(QDialog, Ui_Dialog):
         # 加载UI界面（初始化对话框的控件：搜索框、按钮、表格视图等）
         self.setupUi(self)
         self.setFixedSize(self.width(), self.height())
+        # 豆瓣接口（带本地缓存）
+        self.douban = DouBanApi(cache=get_cache())
+        # 搜索结果模型：各页结果到达后追加
+        self.table_model = SearchResultModel(self)
+        self.tv_booksearch.setModel(self.table_model)
+        # 当前搜索线程及其序号（新的搜索开始时序号加1，旧搜索的结果直接丢弃）
+        self.search_thread = None
+        self.generation = 0
 
     @pyqtSlot()
     def on_pb_search_douban_clicked(self):
@@ -63,15 +148,12 @@ class BookSearch(QDialog, Ui_Dialog):
         槽函数：响应“豆瓣搜索”按钮（pb_search_douban）的点击事件
         核心逻辑：
         1. 获取搜索框中的关键词
-        2. 调用豆瓣图书搜索API，传递关键词和请求头（模拟移动端避免反爬）
-        3. 清洗、整理API返回的图书数据（补全作者/译者、处理价格、过滤无效ISBN）
-        4. 将整理后的数据填充到表格模型，绑定到表格视图展示
+        2. 取消上一次未完成的搜索，清空结果表格
+        3. 启动后台分页搜索（DouBanApi.iter_search：第一页取得总数后，其余各页并发请求）
+        4. 各页结果按页顺序到达后追加到表格模型（append_page），不阻塞界面
         """
-        # 豆瓣图书搜索API地址（公开接口）
-        url = "https://api.douban.com/v2/book/search"
         # 获取搜索框中用户输入的关键词
         search_str = self.le_search_douban.text().strip()
-        douban_api = DouBanApi()
         
         # 跳过空关键词搜索
         if not search_str:
@@ -83,90 +165,38 @@ class BookSearch(QDialog, Ui_Dialog):
             )  
             
             return
-        # API请求参数：q=搜索关键词，apikey=豆瓣开放平台密钥（示例密钥，建议替换为自己的）
-        self.search_result = douban_api.search_bookinfo_by_name(search_str.strip())
-        
-        # params = {
-        #     'q': search_str,
-        #     'apikey': '0ac44ae016490db2204ce0a042db2916'}
-        
-        # # 请求头：模拟iPhone移动端浏览器，避免豆瓣API反爬限制
-        # headers = {
-        #     "Referer":
-        #     "https://m.douban.com/tv/american", # 来源页，模拟正常访问
-        #     "User-Agent":
-        #     "Mozilla/5.0 (iPhone; CPU iPhone OS 13_2_3 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/13.0.3 Mobile/15E148 Safari/604.1"
-        # }
-            
-        # # 发送GET请求调用豆瓣API
-        # response = requests.get(url, params=params, headers=headers)
-        
-        # # 解析API返回的JSON数据，提取图书列表
-        # booklist = response.json()['books']
-        # # 初始化清洗后的图书信息列表（存储最终要展示/传递的数据）
-        # self.books = []
-        # # 遍历每本图书，清洗和整理数据
-        # for book_dict in booklist:
-        #     # 单本图书的信息列表（按字段顺序整理）
-        #     bookinfo = []
-        #     # 过滤无效数据（字段过少的图书）
-        #     if len(book_dict) > 5:
-        #         # print('==='*30)
-        #         # print(book_dict)
-        #         # 过滤无ISBN13的图书（ISBN13是唯一标识，必须存在）
-        #         if ('isbn13' not in book_dict):
-        #             continue
-        #         # 1. 处理作者+译者：作者用/分隔，有译者则追加“译者:XXX”
-        #         author = '/'.join(book_dict['author'])  # 作者列表转字符串
-        #         if len(book_dict['translator']) > 0:
-        #             author += ' 译者: '
-        #             author += '/'.join(book_dict['translator'])  # 存在译者时
-        #          # 2. 处理评分、价格等字段
-        #         rating = book_dict['rating']  # 评分信息（包含平均分、评价人数）
-        #         price = book_dict['price'] # 价格（可能为空）
-        #         # 清洗价格：移除CNY/元符号，去除首尾空格
-        #         price = price.replace('CNY', '').replace('元', '').strip()
-        #         # 3. 按顺序填充核心字段（与表格列对应）
-        #         bookinfo.append(book_dict['isbn13'])          # 0: ISBN13
-        #         bookinfo.append(book_dict['title'])           # 1: 书名
-        #         bookinfo.append(author)                       # 2: 作者+译者
-        #         bookinfo.append(book_dict['publisher'])       # 3: 出版社
-        #         bookinfo.append(price)                        # 4: 价格（清洗后）
-        #         bookinfo.append(rating['average'])            # 5: 豆瓣平均分
-        #         bookinfo.append(rating['numRaters'])          # 6: 评价人数
-        #         bookinfo.append('计划')                       # 7: 分类（默认“计划”）
-        #         bookinfo.append('未设置')                     # 8: 书柜位置（默认“未设置”）
-        #         # 补充扩展字段（不展示在表格，但用于传递给父窗口）
-        #         bookinfo.append(book_dict['images']['small']) # 9: 图书封面小图URL
-        #         bookinfo.append(book_dict['pubdate'])         # 10: 出版日期
-        #         bookinfo.append(book_dict['rating'])          # 11: 完整评分信息
-        #         bookinfo.append(book_dict['alt'])             # 12: 豆瓣图书详情页URL
-
-        #         # 将单本图书信息加入总列表
-        #         self.books.append(bookinfo)
-
-        # # ========== 构建搜索结果表格 ==========
-        # # 1. 提取前9个核心字段（对应表格列），转换为DataFrame（方便批量处理）
-        # # np.array(self.books)[:, 0:9]：取所有行的0-8列（前9个字段）
-        # df = pd.DataFrame(np.array(self.books)[:, 0:9])
-        
-        df = pd.DataFrame(np.array(self.search_result)[:, 0:9])
-        # 2. 创建标准项表格模型（行数=DataFrame行数，列数=DataFrame列数）
-        self.table_model = QStandardItemModel(df.shape[0], df.shape[1])
-        # 3. 设置表格表头（与核心字段对应）
-        self.table_model.setHorizontalHeaderLabels(
-            ['ISBN', '书名', '作者', '出版', '价格', '评分', '人数', '分类', '书柜'])
-
-        # 4. 遍历DataFrame，将数据填充到表格模型
-        for i, row in df.iterrows():
-            for j in range(df.shape[1]):
-                self.table_model.setItem(i, j, QStandardItem(str(row[j])))
-
-         # 5. 将表格模型绑定到表格视图控件，展示数据
-        self.tv_booksearch.setModel(self.table_model)
+        # 取消上一次未完成的搜索，清空结果表格
+        self.cancel_search()
+        self.table_model.clear()
+        self.generation += 1
+        # 后台分页搜索：第一页返回后即显示，其余各页并发获取、按页顺序追加
+        self.search_thread = SearchThread(self.douban, search_str, self.generation, self)
+        self.search_thread.page_signal.connect(self.append_page)
+        self.search_thread.start()
+
+    def append_page(self, generation, total, books):
+        """
+        追加一页搜索结果（丢弃已取消搜索的结果）
+
+        @param generation: 搜索序号
+        @param total: 结果总数
+        @param books: 本页图书信息列表的列表
+        """
+        if generation != self.generation:
+            return
+        self.table_model.appendBooks(books)
+        self.setWindowTitle(f"豆瓣搜索 - {self.table_model.rowCount()}/{total}")
+
+    def cancel_search(self):
+        """取消进行中的搜索（线程在当前请求结束后退出）"""
+        if self.search_thread is not None:
+            self.search_thread.stop()
+            self.search_thread = None
 
-         # 强制刷新表格视图（确保数据显示）
-        self.tv_booksearch.show()
+    def done(self, result):
+        """关闭对话框时取消进行中的搜索"""
+        self.cancel_search()
+        super().done(result)
 
     @pyqtSlot(QModelIndex)
     def on_tv_booksearch_doubleClicked(self, index):
@@ -178,7 +208,7 @@ class BookSearch(QDialog, Ui_Dialog):
         @type index: QModelIndex
         """
         # 获取双击行的索引，提取对应的图书信息
-        bookinfo = self.search_result[index.row()]
+        bookinfo = self.table_model.bookinfo(index.row())
         # 调试用：打印选中的图书信息（可删除）
         print("选中的图书信息：", bookinfo)
         # 发射自定义信号，将图书信息传递给父窗口
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+模块说明：TXT→EPUB批量转换（无界面），基于Conver2epub
+功能：
+1. 输入为目录（递归查找*.txt）或清单文件（.json 或 每行一个路径的文本文件）；
+2. 使用有界进程池并行转换，逐个文件输出进度；
+3. 按修改时间与内容哈希跳过已是最新的文件；
+4. 输出JSON格式的汇总报告。
+
+用法示例：
+    python Batch2epub.py novels/ -o epub/ -j 8 --summary summary.json
+    python Batch2epub.py manifest.json --reg "^\\s*(Chapter\\s*\\d+.*)\\s*"
+    python Batch2epub.py novels/ --reg auto
+
+清单文件(.json)格式：
+    [
+        "a.txt",
+        {"txt": "b.txt", "epub": "out/b.epub", "title": "书名", "author": "作者",
+         "reg": "章节正则", "encode": "gb18030", "cover": "cover.jpg"}
+    ]
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from loguru import logger  # 日志库
+
+from Conver2epub import Conver2epub
+
+STATE_FILE = '.batch2epub.json'  # 输出目录下记录已转换文件状态的文件名
+JOB_OPTIONS = ('title', 'author', 'reg', 'encode', 'cover')  # 可按文件指定的转换参数
+
+
+def file_hash(path, block_size=1 << 20):
+    """
+    计算文件内容的SHA-256哈希（分块读取）
+
+    参数:
+        path (str): 文件路径
+        block_size (int): 每次读取的字节数
+
+    返回:
+        str: 十六进制哈希值
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def convert_job(job):
+    """
+    进程池任务：转换单个TXT文件
+
+    参数:
+        job (dict): 转换任务，含txt、epub及可选的title/author/reg/encode/cover，workers大于1时按章节并行转换
+
+    返回:
+        dict: 任务结果，含status（converted/failed）、elapsed、error
+    """
+    start = time.perf_counter()
+    result = {'txt': job['txt'], 'epub': job['epub']}
+    try:
+        os.makedirs(os.path.dirname(job['epub']) or '.', exist_ok=True)
+        conver2 = Conver2epub(job['txt'], job['epub'])
+        conver2.set_title(job.get('title') or os.path.splitext(os.path.basename(job['txt']))[0])
+        conver2.set_author(job.get('author') or conver2.title)
+        if job.get('encode'):
+            conver2.set_encode(job['encode'])
+        if job.get('reg') == 'auto':
+            conver2.detect_reg()  # 自动识别章节正则
+        elif job.get('reg'):
+            conver2.set_reg(job['reg'])
+        if job.get('cover'):
+            conver2.set_cover(job['cover'])
+        if job.get('workers', 1) > 1:
+            conver2.conver_parallel(job['workers'])  # 文件数少于进程数时，单个文件内按章节并行
+        else:
+            conver2.conver()
+        result['status'] = 'converted'
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f'{type(e).__name__}: {e}'
+    result['elapsed'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+class Batch2epub():
+    """
+    TXT→EPUB批量转换引擎
+    """
+    def __init__(self, output=None, workers=None, force=False, options=None):
+        """
+        初始化批量转换引擎
+
+        参数:
+            output (str): EPUB输出目录，默认与TXT文件同目录
+            workers (int): 并行进程数，默认CPU核数
+            force (bool): 是否忽略已是最新的判断，强制全部转换
+            options (dict): 所有文件共用的转换参数（title/author/reg/encode/cover）
+        """
+        self.output = output
+        self.workers = workers or os.cpu_count() or 1
+        self.force = force
+        self.options = {k: v for k, v in (options or {}).items() if v}
+        self.state = {}  # 状态记录：{状态文件路径: {TXT路径: 记录}}
+
+    def scan_dir(self, dir_path):
+        """
+        递归查找目录下的TXT文件，生成转换任务
+
+        参数:
+            dir_path (str): 目录路径
+
+        返回:
+            list: 转换任务列表
+        """
+        jobs = []
+        for root, dirs, files in os.walk(dir_path):
+            dirs.sort()
+            for file in sorted(files):
+                if os.path.splitext(file)[1].lower() == '.txt':
+                    txt = os.path.join(root, file)
+                    out_dir = root
+                    if self.output:
+                        # 在输出目录中保留原目录结构
+                        out_dir = os.path.join(self.output, os.path.relpath(root, dir_path))
+                    jobs.append(self._make_job({'txt': txt}, out_dir))
+        return jobs
+
+    def load_manifest(self, manifest):
+        """
+        读取清单文件，生成转换任务
+
+        参数:
+            manifest (str): 清单文件路径（.json 或 每行一个TXT路径的文本文件）
+
+        返回:
+            list: 转换任务列表
+        """
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, 'r', encoding='utf-8') as f:
+            if manifest.lower().endswith('.json'):
+                entries = json.load(f)
+            else:
+                entries = [line.strip() for line in f
+                           if line.strip() and not line.lstrip().startswith('#')]
+
+        jobs = []
+        for entry in entries:
+            entry = {'txt': entry} if isinstance(entry, str) else dict(entry)
+            # 清单中的相对路径以清单文件所在目录为基准
+            for key in ('txt', 'epub', 'cover'):
+                if entry.get(key):
+                    entry[key] = os.path.join(base, entry[key])
+            out_dir = self.output or os.path.dirname(entry['txt'])
+            jobs.append(self._make_job(entry, out_dir))
+        return jobs
+
+    def _make_job(self, entry, out_dir):
+        """合并共用参数，补全EPUB输出路径"""
+        job = dict(self.options)
+        job.update({k: v for k, v in entry.items() if v})
+        if not job.get('epub'):
+            name = os.path.splitext(os.path.basename(job['txt']))[0]
+            job['epub'] = os.path.normpath(os.path.join(out_dir, name + '.epub'))
+        return job
+
+    def _state_path(self, job):
+        """任务对应的状态文件路径（EPUB输出目录下）"""
+        return os.path.join(os.path.dirname(os.path.abspath(job['epub'])), STATE_FILE)
+
+    def _load_state(self, path):
+        """读取状态文件（带缓存）"""
+        if path not in self.state:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.state[path] = json.load(f)
+            except (OSError, ValueError):
+                self.state[path] = {}
+        return self.state[path]
+
+    def _save_state(self):
+        """写回所有状态文件"""
+        for path, records in self.state.items():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(records, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, path)
+
+    @staticmethod
+    def _fingerprint(job):
+        """转换参数指纹：参数变化时需重新转换"""
+        options = {k: job.get(k) for k in JOB_OPTIONS}
+        options['epub'] = os.path.abspath(job['epub'])
+        return options
+
+    def is_uptodate(self, job):
+        """
+        判断任务输出是否已是最新：
+        EPUB存在、转换参数与TXT大小未变，且TXT修改时间未变并早于EPUB；
+        修改时间变化时再比较内容哈希（仅touch过的文件不会重新转换）
+
+        参数:
+            job (dict): 转换任务（会补充txt_hash/txt_mtime/txt_size字段供记录状态）
+
+        返回:
+            bool: 是否可以跳过
+        """
+        stat = os.stat(job['txt'])
+        job['txt_mtime'], job['txt_size'] = stat.st_mtime, stat.st_size
+        record = self._load_state(self._state_path(job)).get(os.path.abspath(job['txt']))
+        if self.force or not record or not os.path.exists(job['epub']):
+            return False
+        if record.get('options') != self._fingerprint(job) or record.get('size') != stat.st_size:
+            return False
+        if record.get('mtime') == stat.st_mtime and stat.st_mtime <= os.path.getmtime(job['epub']):
+            return True
+        job['txt_hash'] = file_hash(job['txt'])
+        if job['txt_hash'] != record.get('sha256'):
+            return False
+        # 内容未变，仅更新修改时间，下次无需再计算哈希
+        record['mtime'] = stat.st_mtime
+        return True
+
+    def _record(self, job):
+        """记录转换成功的任务状态"""
+        records = self._load_state(self._state_path(job))
+        records[os.path.abspath(job['txt'])] = {
+            'sha256': job.get('txt_hash') or file_hash(job['txt']),
+            'mtime': job['txt_mtime'],
+            'size': job['txt_size'],
+            'options': self._fingerprint(job),
+        }
+
+    def run(self, jobs, summary=None):
+        """
+        执行批量转换
+
+        参数:
+            jobs (list): 转换任务列表
+            summary (str): JSON汇总报告的输出路径，None则不输出
+
+        返回:
+            dict: 汇总报告
+        """
+        start = time.perf_counter()
+        total = len(jobs)
+        results = []
+        todo = []
+        for job in jobs:
+            try:
+                if self.is_uptodate(job):
+                    results.append({'txt': job['txt'], 'epub': job['epub'], 'status': 'skipped', 'elapsed': 0})
+                    logger.info(f'[{len(results)}/{total}] 已是最新，跳过: {job["txt"]}')
+                    continue
+            except OSError as e:
+                results.append({'txt': job['txt'], 'epub': job['epub'], 'status': 'failed',
+                                'error': f'{type(e).__name__}: {e}', 'elapsed': 0})
+                logger.error(f'[{len(results)}/{total}] 读取失败: {job["txt"]} {e}')
+                continue
+            todo.append(job)
+
+        if todo:
+            # 文件数少于进程数时，把多余的进程分给每个文件做章节级并行（如只转换一本超大的书）
+            for job in todo:
+                job['workers'] = self.workers // len(todo)
+            # 进程池最多同时执行workers个转换，任务完成即汇报进度
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(todo))) as executor:
+                futures = {executor.submit(convert_job, job): job for job in todo}
+                for future in as_completed(futures):
+                    job = futures[future]
+                    result = future.result()
+                    results.append(result)
+                    if result['status'] == 'converted':
+                        self._record(job)
+                        logger.info(f'[{len(results)}/{total}] 转换完成({result["elapsed"]}s): {job["epub"]}')
+                    else:
+                        logger.error(f'[{len(results)}/{total}] 转换失败: {job["txt"]} {result["error"]}')
+        self._save_state()
+
+        report = {
+            'date': str(datetime.datetime.now()),
+            'total': total,
+            'converted': sum(r['status'] == 'converted' for r in results),
+            'skipped': sum(r['status'] == 'skipped' for r in results),
+            'failed': sum(r['status'] == 'failed' for r in results),
+            'elapsed': round(time.perf_counter() - start, 3),
+            'files': results,
+        }
+        if summary:
+            with open(summary, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f'批量转换完成: 共{total}个, 转换{report["converted"]}个, '
+                    f'跳过{report["skipped"]}个, 失败{report["failed"]}个, 用时{report["elapsed"]}s')
+        return report
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='TXT→EPUB批量转换')
+    parser.add_argument('source', nargs='+', help='TXT目录或清单文件（.json/.txt列表）')
+    parser.add_argument('-o', '--output', help='EPUB输出目录（默认与TXT同目录）')
+    parser.add_argument('-j', '--workers', type=int, help='并行进程数（默认CPU核数）')
+    parser.add_argument('-f', '--force', action='store_true', help='强制重新转换所有文件')
+    parser.add_argument('--summary', help='JSON汇总报告输出路径')
+    parser.add_argument('--reg', help='章节匹配正则表达式（auto为自动识别）')
+    parser.add_argument('--encode', help='TXT文件编码')
+    parser.add_argument('--author', help='作者（默认为文件名）')
+    parser.add_argument('--cover', help='封面图片路径')
+    args = parser.parse_args(argv)
+
+    options = {'reg': args.reg, 'encode': args.encode, 'author': args.author, 'cover': args.cover}
+    batch = Batch2epub(args.output, args.workers, args.force, options)
+    jobs = []
+    for source in args.source:
+        if os.path.isdir(source):
+            jobs.extend(batch.scan_dir(source))
+        else:
+            jobs.extend(batch.load_manifest(source))
+    report = batch.run(jobs, args.summary)
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+模块说明：章节标题正则的编译缓存与自动识别
+内置常见的中英文章节标题正则，读取文件开头的一段样本，
+逐行一次扫描即可为所有正则打分，自动选出最合适的章节正则。
+"""
+import re
+import statistics
+from functools import lru_cache
+
+# 默认章节正则（匹配以第/卷开头，包含数字/汉字的章节标题）
+DEFAULT_REG = r'^\s*([第卷][0123456789一二三四五六七八九十零〇百千两]*[章回部节集卷].*)\s*'
+
+# 常见章节标题正则（名称, 正则），第一个分组为章节标题；得分相同时靠前者优先
+# 标题内部的分隔只允许空格/制表符/全角空格（多行模式下\s会匹配换行，使标题跨行）
+CHAPTER_REGS = (
+    ('第X章', DEFAULT_REG),
+    ('第X章(含全角数字/序章/番外)',
+     r'^\s*((?:第[0-9０-９一二三四五六七八九十零〇百千万两壹贰叁肆伍陆柒捌玖拾佰仟]+[章回部节集卷篇]'
+     r'|序章|序言|楔子|引子|尾声|后记|番外).*)\s*'),
+    ('卷X 第X章',
+     r'^\s*((?:卷[0-9一二三四五六七八九十零〇百千两]+|第[0-9一二三四五六七八九十零〇百千两]+卷)[ \t\u3000]*'
+     r'第[0-9一二三四五六七八九十零〇百千两]+[章回节].*)\s*'),
+    ('数字序号(1、 / 001.)', r'^\s*([0-9０-９]{1,4}[ \t\u3000]*[、.．:：][ \t\u3000]*\S.{0,40})\s*$'),
+    ('Chapter N', r'^\s*((?:Chapter|CHAPTER|chapter)[ \t\u3000]+(?:[0-9]+|[IVXLCDM]+|[A-Z][a-z]+)\b.*)\s*'),
+    ('Part/Book N', r'^\s*((?:Part|PART|Book|BOOK)[ \t\u3000]+(?:[0-9]+|[IVXLCDM]+|[A-Z][a-z]+)\b.*)\s*'),
+)
+
+MAX_TITLE_LENGTH = 50  # 章节标题的最大长度，超过视为正文
+MAX_MATCH_RATIO = 0.3  # 匹配行占比上限，超过视为误匹配了正文
+
+
+@lru_cache(maxsize=64)
+def compile_reg(reg):
+    """
+    编译章节正则（多行模式，结果缓存，相同正则只编译一次）
+
+    参数:
+        reg (str): 章节匹配正则表达式
+
+    返回:
+        re.Pattern: 编译后的正则
+    """
+    return re.compile(reg, re.M)
+
+
+class ChapterDetect():
+    """
+    章节正则自动识别类：对样本文本逐行扫描一次，为所有候选正则打分
+    """
+    def __init__(self, regs=CHAPTER_REGS, sample_size=2 * 1024 * 1024):
+        """
+        初始化识别器
+
+        参数:
+            regs (tuple): 候选正则 ((名称, 正则), ...)，默认内置正则库
+            sample_size (int): 样本字符数（从文件开头读取），默认2M
+        """
+        self.regs = tuple(regs)
+        self.sample_size = sample_size
+        self.patterns = [compile_reg(reg) for name, reg in self.regs]
+        # 预筛选正则：任一候选能匹配的行才逐个正则打分
+        self.prefilter = compile_reg('|'.join(f'(?:{reg})' for name, reg in self.regs))
+
+    def read_sample(self, txtfile, encode='utf-8'):
+        """
+        读取文件开头的样本（按整行截断）
+
+        参数:
+            txtfile (str): TXT文件路径
+            encode (str): 文件编码
+
+        返回:
+            list: 样本行
+        """
+        lines = []
+        size = 0
+        with open(txtfile, 'r', encoding=encode, errors='replace') as f:
+            for line in f:
+                lines.append(line)
+                size += len(line)
+                if size >= self.sample_size:
+                    break
+        return lines
+
+    def score(self, lines):
+        """
+        逐行扫描一次，为每个候选正则打分
+
+        得分 = 匹配行数 / (1 + 章节间隔的变异系数)：章节越多、分布越均匀得分越高；
+        匹配少于2行、或匹配行占比过高（误匹配正文）得0分
+
+        参数:
+            lines (list): 文本行
+
+        返回:
+            list: [(名称, 正则, 得分, 匹配行数)]，按得分从高到低排序
+        """
+        hits = [[] for _ in self.patterns]  # 各正则匹配的行号
+        total = 0
+        for lineno, line in enumerate(lines):
+            line = line.rstrip('\n')
+            if not line.strip():
+                continue
+            total += 1
+            if not self.prefilter.match(line):
+                continue
+            for i, pattern in enumerate(self.patterns):
+                m = pattern.match(line)
+                if m and len(m.group(1).strip()) <= MAX_TITLE_LENGTH:
+                    hits[i].append(lineno)
+
+        result = []
+        for (name, reg), rows in zip(self.regs, hits):
+            score = 0.0
+            if len(rows) >= 2 and len(rows) <= total * MAX_MATCH_RATIO:
+                gaps = [b - a for a, b in zip(rows, rows[1:])]
+                cv = statistics.pstdev(gaps) / statistics.mean(gaps)
+                score = len(rows) / (1 + cv)
+            result.append((name, reg, score, len(rows)))
+        # 稳定排序：得分相同时保持正则库中的顺序
+        return sorted(result, key=lambda item: -item[2])
+
+    def detect(self, txtfile, encode='utf-8'):
+        """
+        识别文件最合适的章节正则
+
+        参数:
+            txtfile (str): TXT文件路径
+            encode (str): 文件编码
+
+        返回:
+            str: 得分最高的章节正则；均不匹配时返回默认正则
+        """
+        name, reg, score, count = self.score(self.read_sample(txtfile, encode))[0]
+        return reg if score > 0 else DEFAULT_REG
@@ -10,8 +10,17 @@ from ebooklib import epub
 from bs4 import BeautifulSoup
 import re
 import os
+import html
+from html.parser import HTMLParser
+import time
+import zlib
+import struct
+import zipfile
 import datetime
-from opencc import OpenCC  # 用于简繁体转换（需安装opencc-python-reimplemented）
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from Fanjian import FanjianService, get_converter  # 简繁体转换服务（基于OpenCC）
+from EncodeDetect import EncodeDetect  # 全文件抽样的编码检测
+from ChapterDetect import ChapterDetect, DEFAULT_REG, compile_reg  # 章节正则识别与编译缓存
 # from kindlestrip import KindleStrip
 # from pymobi import BookMobi
 ######
@@ -26,6 +35,253 @@ import  mobi
 ######
 
 
+# 章节内容转换表：换行符转<br>，去除不间断空格
+CHAPTER_TABLE = {10: '<br>', 160: None}
+
+
+def render_chapter(title, content):
+    """
+    生成章节的XHTML正文（标题用h2标签，内容用p标签）
+
+    参数:
+        title (str): 章节标题
+        content (str): 章节内容（纯文本，'<'、'&'等字符会被转义）
+
+    返回:
+        str: 章节正文HTML
+    """
+    return ('<h2>' + html.escape(title, quote=False) + '</h2><p>'
+            + html.escape(content, quote=False).translate(CHAPTER_TABLE) + '</p>')
+
+
+def _compress_chapter(task):
+    """
+    进程池任务：渲染章节XHTML并压缩（raw deflate，可直接写入zip条目）
+
+    参数:
+        task (tuple): (章节标题, 章节内容, 章节文件名, CSS文件路径, 书籍语言, 压缩级别)
+
+    返回:
+        tuple: (章节文件名, 压缩数据, CRC32, 原始大小)
+    """
+    title, content, file_name, css, language, level = task
+    book = epub.EpubBook()
+    book.set_language(language)
+    chapter = epub.EpubHtml(title=title, file_name=file_name, lang='hr')
+    chapter.book = book  # 渲染时需要书籍的页面模板
+    chapter.content = render_chapter(title, content)
+    chapter.add_link(href=css, rel='stylesheet', type='text/css')
+    data = chapter.get_content()
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    return file_name, compressed, zlib.crc32(data), len(data)
+
+
+class EpubZipStream():
+    """
+    EPUB压缩包流式写入器：条目写入后即落盘，可写入其他进程中已压缩好的数据
+    提供与 zipfile.ZipFile.writestr 兼容的接口，供ebooklib的写入器使用
+    """
+    def __init__(self, file_name):
+        """
+        初始化写入器
+
+        参数:
+            file_name (str): 输出的EPUB文件路径
+        """
+        self.fp = open(file_name, 'wb')
+        self.entries = []  # 已写入条目：(文件名, 压缩方式, CRC32, 压缩后大小, 原始大小, 偏移量)
+        now = time.localtime()
+        self.dostime = now.tm_hour << 11 | now.tm_min << 5 | now.tm_sec // 2
+        self.dosdate = (now.tm_year - 1980) << 9 | now.tm_mon << 5 | now.tm_mday
+
+    def write_raw(self, name, data, crc, size, compress_type=zipfile.ZIP_DEFLATED):
+        """
+        写入一个已压缩好的条目
+
+        参数:
+            name (str): 条目名称
+            data (bytes): 压缩后的数据（raw deflate或原始数据）
+            crc (int): 原始数据的CRC32
+            size (int): 原始数据大小
+            compress_type (int): 压缩方式，默认ZIP_DEFLATED
+        """
+        offset = self.fp.tell()
+        if max(offset, size, len(data)) > 0xFFFFFFFF:
+            raise ValueError(f'EPUB文件超过4G，不支持写入: {name}')
+        name = name.encode('utf-8')
+        self.fp.write(struct.pack('<4s5H3L2H', b'PK\x03\x04', 20, 0x800, compress_type,
+                                  self.dostime, self.dosdate, crc, len(data), size, len(name), 0))
+        self.fp.write(name)
+        self.fp.write(data)
+        self.entries.append((name, compress_type, crc, len(data), size, offset))
+
+    def writestr(self, name, data, compress_type=zipfile.ZIP_DEFLATED):
+        """写入一个条目（同 zipfile.ZipFile.writestr）"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        compressed = data
+        if compress_type == zipfile.ZIP_DEFLATED:
+            compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+            compressed = compressor.compress(data) + compressor.flush()
+        self.write_raw(name, compressed, zlib.crc32(data), len(data), compress_type)
+
+    def close(self):
+        """写入中央目录并关闭文件"""
+        if self.fp.closed:
+            return
+        start = self.fp.tell()
+        for name, compress_type, crc, csize, size, offset in self.entries:
+            self.fp.write(struct.pack('<4s6H3L5H2L', b'PK\x01\x02', 20, 20, 0x800, compress_type,
+                                      self.dostime, self.dosdate, crc, csize, size,
+                                      len(name), 0, 0, 0, 0, 0o644 << 16, offset))
+            self.fp.write(name)
+        end = self.fp.tell()
+        self.fp.write(struct.pack('<4s4H2LH', b'PK\x05\x06', 0, 0, len(self.entries),
+                                  len(self.entries), end - start, start, 0))
+        self.fp.close()
+
+
+class _StreamEpubWriter(epub.EpubWriter):
+    """
+    ebooklib写入器：章节已由进程池直接写入压缩包，
+    此处只写入其余部分（container、opf、目录、样式、封面）
+    """
+    def __init__(self, name, book, out, written):
+        """
+        参数:
+            name (str): 输出的EPUB文件路径
+            book (epub.EpubBook): 书籍对象
+            out (EpubZipStream): 已打开的压缩包写入器
+            written (set): 已写入压缩包的章节文件名
+        """
+        super().__init__(name, book, {})
+        self.out = out
+        self.written = written
+
+    def _write_items(self):
+        """写入除已写章节外的所有项目"""
+        items = self.book.items
+        self.book.items = [item for item in items if item.file_name not in self.written]
+        try:
+            super()._write_items()
+        finally:
+            self.book.items = items
+
+    def write(self):
+        """写入container、opf及其余项目（mimetype与章节已提前写入）"""
+        self._write_container()
+        self._write_opf()
+        self._write_items()
+
+
+class ChapterScanner():
+    """
+    TXT章节流式扫描器：逐行读取文件，按章节正则切分，逐个产出(章节标题, 章节内容)
+
+    切分结果与 re.split(reg, content, flags=re.M) 完全一致（首个章节前的内容丢弃），
+    但不再一次性读入整个文件，内存峰值约为最大章节的大小。
+    章节正则按行匹配：标题本身不能跨越多个非空行。
+    """
+    def __init__(self, txtfile, reg, encode='utf-8', errors=None, block_size=1 << 20):
+        """
+        初始化扫描器
+
+        参数:
+            txtfile (str): 输入的TXT文件路径
+            reg (str | re.Pattern): 章节匹配正则表达式（第一个分组为章节标题）
+            encode (str): 文件编码，默认utf-8
+            errors (str): 解码错误处理方式（同open的errors参数），默认None（严格模式）
+            block_size (int): 每次读入的字符数（按整行对齐），默认1M
+        """
+        self.txtfile = txtfile
+        self.encode = encode
+        self.errors = errors
+        self.block_size = block_size
+        # 预编译章节正则（多行模式，与re.split(..., flags=re.M)一致，相同正则复用缓存）
+        self.pattern = reg if isinstance(reg, re.Pattern) else compile_reg(reg)
+
+    def _read_blocks(self, f):
+        """按行读取文件，凑满block_size个字符后产出一个文本块（文本块总以完整行结尾）"""
+        lines = []
+        size = 0
+        for line in f:
+            lines.append(line)
+            size += len(line)
+            if size >= self.block_size:
+                yield ''.join(lines)
+                lines = []
+                size = 0
+        if lines:
+            yield ''.join(lines)
+
+    @staticmethod
+    def _last_line_start(buf):
+        """返回缓冲区中最后一个非空行的行首位置（新读入的内容只可能影响从此处开始的匹配）"""
+        end = len(buf)
+        while end > 0 and buf[end - 1].isspace():
+            end -= 1
+        return buf.rfind('\n', 0, end) + 1
+
+    def _title(self, match):
+        """从匹配结果中取章节标题（无分组时取整个匹配）"""
+        return match.group(1) if self.pattern.groups else match.group(0)
+
+    def __iter__(self):
+        """
+        逐个产出章节
+
+        返回:
+            generator: (章节标题, 章节内容) 元组
+        """
+        pattern = self.pattern
+        title = None     # 当前章节标题（None表示仍在首个章节之前）
+        buf = ''         # 缓冲区：从当前章节标题的匹配起点开始
+        body_start = 0   # 当前章节内容在缓冲区中的起始位置
+        scan_from = 0    # 下一次正则查找的起始位置
+
+        with open(self.txtfile, 'r', encoding=self.encode, errors=self.errors) as f:
+            blocks = self._read_blocks(f)
+            eof = False
+            while not eof:
+                block = next(blocks, None)
+                if block is None:
+                    eof = True
+                else:
+                    buf += block
+
+                while True:
+                    m = pattern.search(buf, scan_from)
+                    # 匹配延伸到缓冲区末尾时，其结果可能随后续内容变化，需继续读入
+                    if m is None or (not eof and m.end() >= len(buf)):
+                        break
+                    if m.end() == m.start():
+                        # 空匹配不作为章节分隔，跳过
+                        scan_from = m.end() + 1
+                        continue
+                    if title is not None:
+                        yield title, buf[body_start:m.start()]
+                    title = self._title(m)
+                    # 缓冲区从新章节的匹配起点开始，保证'^'的语义与整体切分一致
+                    buf = buf[m.start():]
+                    body_start = scan_from = m.end() - m.start()
+
+                if eof:
+                    break
+                resume = self._last_line_start(buf)
+                if m is not None:
+                    resume = min(resume, m.start())
+                scan_from = max(body_start, resume)
+                if title is None:
+                    # 首个章节之前的内容不会输出，直接丢弃
+                    buf = buf[scan_from:]
+                    body_start = scan_from = 0
+
+        if title is not None:
+            yield title, buf[body_start:]
+
+
 class Conver2epub():
     """
     TXT文件转换为EPUB格式的处理类
@@ -45,14 +301,24 @@ class Conver2epub():
         self.language = 'cn'  # 语言类型（中文）
         self.author = 'etony.an@gmail.com'  # 作者信息
         self.cover = 'cover.jpeg'  # 封面图片路径
-        self.encode = 'utf-8'  # 文件编码
+        self.encode = None  # 文件编码（None表示自动检测）
         # 章节匹配正则表达式（匹配以第/卷开头，包含数字/汉字的章节标题）
-        self.reg = r'^\s*([第卷][0123456789一二三四五六七八九十零〇百千两]*[章回部节集卷].*)\s*'
+        self.reg = DEFAULT_REG
 
     def set_reg(self, reg):
         """设置章节匹配的正则表达式"""
         self.reg = reg
 
+    def detect_reg(self):
+        """
+        从内置正则库中自动识别最合适的章节正则并设置
+
+        返回:
+            str: 识别出的章节正则
+        """
+        self.reg = ChapterDetect().detect(self.txtfile, self.get_encode())
+        return self.reg
+
     def set_cover(self, cover):
         """设置封面图片路径"""
         self.cover = cover
@@ -73,6 +339,17 @@ class Conver2epub():
         """设置文件编码格式"""
         self.encode = encode
 
+    def get_encode(self):
+        """
+        获取文件编码：未指定时自动检测（检测结果按文件内容缓存）
+
+        返回:
+            str: 文件编码
+        """
+        if not self.encode:
+            self.encode = EncodeDetect().detect(self.txtfile)['encoding']
+        return self.encode
+
     def get_dir(self):
         """
         解析TXT文件内容，按章节分割
@@ -80,26 +357,22 @@ class Conver2epub():
         返回:
             list: 章节标题列表（仅标题部分）
         """
-        text_file_path = self.txtfile
-
-        with open(text_file_path, 'r', encoding=self.encode, errors='replace') as f:
-            content = f.read().strip()  # 去除首尾空白
-            # 英文章节
-            # regex = "^\s*Chapter\s*[0123456789IVX]*"
-            # 中文章节
-            regex = self.reg # 使用预设的章节匹配正则
-            # 按正则分割内容，结果格式：['', '章节1标题', '章节1内容', '章节2标题', '章节2内容', ...]
-            splits = re.split(regex, content, flags=re.M)
-
-            # 按章节分组[(章节1标题,章节1内容）,(章节2标题,章节2内容),...]
-            # 提取章节标题（从分割结果中每隔一个元素取标题）
-            items = [splits[i]
-                     for i in range(1, len(splits) - 1, 2)]
+        # 英文章节
+        # regex = "^\s*Chapter\s*[0123456789IVX]*"
+        # 中文章节
+        # 流式扫描章节，仅保留标题
+        scanner = ChapterScanner(self.txtfile, self.reg, self.get_encode(), errors='replace')
+        items = [title for title, content in scanner]
 
         return items
 
-    def conver(self):
-        """执行TXT到EPUB的转换主流程"""
+    def _create_book(self):
+        """
+        创建EPUB书籍对象：设置元数据、封面、导航与CSS样式
+
+        返回:
+            tuple: (书籍对象, CSS样式项)
+        """
         # 创建EPUB书籍对象        
         book = epub.EpubBook()
 
@@ -199,50 +472,52 @@ class Conver2epub():
         # 初始化书籍装订顺序（先放封面）
         book.spine = ['cover']
 
-        text_file_path = self.txtfile
-
-        with open(text_file_path, 'r', encoding=self.encode) as f:
-            content = f.read()  # 章节匹配正则
-            # 分割内容为标题和内容交替的列表
-            
-            # 英文章节
-            # regex = "^\s*Chapter\s*[0123456789IVX]*"
-            # 中文章节
-            regex = self.reg
-            # 分割成［'','章节1标题','章节1内容','章节2标题','章节2内容',......］
-            splits = re.split(regex, content, flags=re.M)
-
-            # 按章节分组[(章节1标题,章节1内容）,(章节2标题,章节2内容),...]
-            # 组合成(标题, 内容)的元组列表
-            items = [(splits[i], splits[i + 1])
-                     for i in range(1, len(splits) - 1, 2)]
-
-            # 按step章节分组，组成　[[(章节标题,章节内容）,(章节标题,章节内容)],.....]
-            # 后续写入压缩文件时，按分组作为一个xhtml文件
-            # print(items[0][1].replace(chr(10), '<br>').replace(chr(160), ''))
-            # create chapter
-            # 遍历章节列表，创建EPUB章节
-            for item in items:
-                str_title = item[0]  # 章节标题
-                # 处理章节内容：换行符转<br>，去除不间断空格
-                str_content = item[1].replace(
-                    chr(10), '<br>').replace(chr(160), '')
-                # 创建XHTML格式的章节对象
-                chapter = epub.EpubHtml(
-                    title=str_title, file_name=str_title + '.xhtml', lang='hr')
-                # 设置章节内容（标题用h2标签，内容用p标签）
-                chapter.content = u'<h2>' + str_title + '</h2><p>' + str_content + '</p>'
-                # 应用CSS样式
-                chapter.add_item(nav_css)
-
-                # 将章节添加到书籍
-                book.add_item(chapter)
-                
-                # 添加到目录（TOC）
-                book.toc.append(
-                    epub.Link(str_title + '.xhtml', str_title, 'intro'))
-                # 添加到装订顺序
-                book.spine.append(chapter)
+        return book, nav_css
+
+    def _add_chapter(self, book, nav_css, str_title):
+        """
+        创建章节对象并加入书籍、目录（TOC）和装订顺序
+
+        参数:
+            book (epub.EpubBook): 书籍对象
+            nav_css (epub.EpubItem): CSS样式项
+            str_title (str): 章节标题
+
+        返回:
+            epub.EpubHtml: 章节对象（内容未设置）
+        """
+        # 创建XHTML格式的章节对象
+        chapter = epub.EpubHtml(
+            title=str_title, file_name=str_title + '.xhtml', lang='hr')
+        # 应用CSS样式
+        chapter.add_item(nav_css)
+
+        # 将章节添加到书籍
+        book.add_item(chapter)
+
+        # 添加到目录（TOC）
+        book.toc.append(
+            epub.Link(str_title + '.xhtml', str_title, 'intro'))
+        # 添加到装订顺序
+        book.spine.append(chapter)
+        return chapter
+
+    def conver(self):
+        """执行TXT到EPUB的转换主流程"""
+        book, nav_css = self._create_book()
+
+        # 英文章节
+        # regex = "^\s*Chapter\s*[0123456789IVX]*"
+        # 中文章节
+        # 流式扫描章节：逐个产出(章节标题, 章节内容)，不再整体读入并切分全文
+        scanner = ChapterScanner(self.txtfile, self.reg, self.get_encode())
+
+        # create chapter
+        # 遍历章节，创建EPUB章节
+        for str_title, str_content in scanner:
+            chapter = self._add_chapter(book, nav_css, str_title)
+            # 设置章节内容（标题用h2标签，内容用p标签）
+            chapter.content = render_chapter(str_title, str_content)
 
         # create chapter
         # for ch in range(10):
@@ -259,6 +534,153 @@ class Conver2epub():
         # 写入EPUB文件
         epub.write_epub(self.epubfile, book, {})
 
+    def conver_parallel(self, workers=None, level=zlib.Z_DEFAULT_COMPRESSION):
+        """
+        并行执行TXT到EPUB的转换：章节XHTML的渲染与压缩分发到进程池，
+        每完成一个章节即写入压缩包；目录（TOC）与装订顺序（spine）仍按原章节顺序生成
+
+        参数:
+            workers (int): 进程数，默认为CPU核数
+            level (int): 压缩级别（0-9），默认zlib默认级别
+        """
+        workers = workers or os.cpu_count() or 1
+        book, nav_css = self._create_book()
+        scanner = ChapterScanner(self.txtfile, self.reg, self.get_encode())
+
+        out = EpubZipStream(self.epubfile)
+        written = set()  # 已写入压缩包的章节文件名
+
+        def write_done(futures):
+            """将已完成的章节写入压缩包"""
+            for future in futures:
+                file_name, compressed, crc, size = future.result()
+                out.write_raw(f'{book.FOLDER_NAME}/{file_name}', compressed, crc, size)
+                written.add(file_name)
+
+        try:
+            # mimetype必须是第一个且不压缩的条目
+            out.writestr('mimetype', 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = set()
+                for str_title, str_content in scanner:
+                    chapter = self._add_chapter(book, nav_css, str_title)
+                    pending.add(executor.submit(
+                        _compress_chapter,
+                        (str_title, str_content, chapter.file_name, nav_css.file_name, self.language, level)))
+                    # 限制在途章节数量，避免内存随书籍大小增长
+                    if len(pending) >= workers * 4:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        write_done(done)
+                write_done(wait(pending).done)
+
+            # 写入opf、目录、样式和封面（章节已写入，跳过）
+            writer = _StreamEpubWriter(self.epubfile, book, out, written)
+            writer.process()
+            writer.write()
+        finally:
+            out.close()
+
+
+def _export_chapter(task):
+    """
+    进程池任务：提取章节文本（可选繁简转换），原子写入章节文件
+
+    参数:
+        task (tuple): (章节号, 章节内容bytes, 章节文件路径, 是否繁简转换)
+
+    返回:
+        dict: {'index': 章节号, 'file': 文件路径, 'chars': 字符数, 'elapsed': 耗时(秒)}
+    """
+    start = time.perf_counter()
+    index, content, file_charpter, fanjian = task
+    text = TextExtractor().extract(Conver2txt._decode(content))
+    if fanjian:
+        text = get_converter('t2s').convert(text)
+
+    # 先写临时文件再替换，中断时不会留下写了一半的章节文件
+    tmp = file_charpter + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, file_charpter)
+    return {'index': index, 'file': file_charpter, 'chars': len(text),
+            'elapsed': time.perf_counter() - start}
+
+
+class TextExtractor(HTMLParser):
+    """
+    轻量的增量HTML/XML文本提取器：只收集字符数据，不构建文档树
+    空白的处理与BeautifulSoup(doc, 'xml').text一致：标签之间只含空白的文本含换行时变为一个换行、否则变为一个空格，
+    根元素之外的空白丢弃
+    """
+    ASCII_SPACES = ' \n\t\f\r'
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.pending = []  # 尚未遇到下一个标签的文本片段（可能被分块拆开）
+        self.depth = 0     # 当前元素嵌套深度，0为根元素之外
+
+    def _flush(self):
+        """结束一段连续文本：只含空白时按BeautifulSoup的规则压缩"""
+        if not self.pending:
+            return
+        data = ''.join(self.pending)
+        self.pending = []
+        if not data.strip(self.ASCII_SPACES):
+            if self.depth <= 0:
+                return
+            data = '\n' if '\n' in data else ' '
+        self.parts.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        self.depth += 1
+
+    def handle_endtag(self, tag):
+        self._flush()
+        self.depth -= 1
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def handle_data(self, data):
+        """收集字符数据"""
+        self.pending.append(data)
+
+    def unknown_decl(self, data):
+        """收集CDATA段中的文本（与相邻文本合并）"""
+        if data.startswith('CDATA['):
+            self.pending.append(data[6:])
+
+    def extract(self, content, chunk_size=64 * 1024):
+        """
+        增量解析文档内容，返回其中的全部文本
+
+        参数:
+            content (str): HTML/XHTML文档内容
+            chunk_size (int): 每次送入解析器的字符数
+
+        返回:
+            str: 文档文本
+        """
+        self.reset()
+        self.parts = []
+        self.pending = []
+        self.depth = 0
+        for i in range(0, len(content), chunk_size):
+            self.feed(content[i:i + chunk_size])
+        self.close()
+        self._flush()
+        text = ''.join(self.parts)
+        self.parts = []
+        return text
+
 
 class Conver2txt():
     """EPUB文件转换为TXT格式的处理类"""
@@ -283,6 +705,23 @@ class Conver2txt():
     def set_code(self, code='utf-8'):
         """设置输出文件的编码格式"""
         self.code = code
+
+    @staticmethod
+    def _decode(data):
+        """
+        解码EPUB中的文档内容：默认UTF-8，解码失败时自动检测编码
+
+        参数:
+            data (bytes): 文档内容
+
+        返回:
+            str: 解码后的文本
+        """
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError:
+            encode = EncodeDetect().detect_bytes(data)['encoding']
+            return data.decode(encode, errors='replace')
         
     def set_sep(self, sep):
         """设置输出文件的章节分隔符"""
@@ -316,71 +755,78 @@ class Conver2txt():
         # 重新写入EPUB文件
         epub.write_epub(bookinfo['filename'], self.book, {})
 
+    def _save_cover(self):
+        """提取封面图片，保存到输出目录（cover+扩展名）"""
+        for item in self.book.get_items():
+            # 处理封面图片
+            if ((item.get_type() == ebooklib.ITEM_IMAGE)
+                or (item.get_type() == ebooklib.ITEM_COVER)
+                ) and ((item.get_name().find('cover') >= 0)
+                       or (item.id.find('cover') >= 0)):
+                # 解析封面文件扩展名
+                file_name, file_extension = os.path.splitext(
+                    item.get_name())
+                # 封面保存路径（输出目录下的cover+扩展名）
+                coverpath = os.path.join(
+                    self.dirname, 'cover'+file_extension)
+                # 写入封面图片
+                with open(coverpath, 'wb') as ff:
+                    ff.write(item.get_content())
+
+    def iter_documents(self):
+        """
+        按阅读顺序（spine）逐个产出文档项目；spine为空时按清单顺序
+
+        返回:
+            generator: 文档项目（ebooklib.ITEM_DOCUMENT）
+        """
+        seen = set()
+        for idref, linear in self.book.spine:
+            item = self.book.get_item_with_id(idref)
+            if item is None or item.id in seen or item.get_type() != ebooklib.ITEM_DOCUMENT:
+                continue
+            seen.add(item.id)
+            yield item
+        if not seen:
+            yield from self.book.get_items_of_type(ebooklib.ITEM_DOCUMENT)
+
     def conver(self, fanjian=False):
         """
-        将EPUB转换为单TXT文件
+        将EPUB转换为单TXT文件（按阅读顺序流式提取，不构建文档树）
         
         参数:
             fanjian (bool): 是否进行繁简转换（True为繁体转简体）
         """
-        # 以追加模式打开TXT文件
-        with open(self.txtfile, 'a', encoding='utf-8') as f:
-            # 遍历EPUB中的所有项目
-            for item in self.book.get_items():
-                # print(
-                #     f'item类型:  {item.get_type()} name: {item.get_name()} id: {item.get_id()}')
-                # 处理封面图片
-                if ((item.get_type() == ebooklib.ITEM_IMAGE)
-                    or (item.get_type() == ebooklib.ITEM_COVER)
-                    ) and ((item.get_name().find('cover') >= 0)
-                           or (item.id.find('cover') >= 0)):
-                    # 解析封面文件扩展名       
-                    file_name, file_extension = os.path.splitext(
-                        item.get_name())
-                    # 封面保存路径（输出目录下的cover+扩展名）
-                    coverpath = os.path.join(
-                        self.dirname, 'cover'+file_extension)
-                    # if  not os.path.exists(coverpath): os.mkdir(coverpath)
-                    # 写入封面图片
-                    with open(coverpath, 'wb') as ff:
-                        ff.write(item.get_content())
-                        # print('cover 已提取')
-                # 处理文档内容（章节文本）        
-                if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                    # 解析HTML内容
-                    soup = BeautifulSoup(
-                        item.get_content().decode('utf-8'), 'xml')
-                    # 繁简转换（如果需要）
-                    if fanjian:
-                        cc = OpenCC('t2s')  # 繁体转简体
-                        f.write(cc.convert(soup.text))
-
-                    else:
-                        f.write(soup.text)
-                    # 写入章节结束标记
-                    if len(self.sep)>=1:
-                        f.write(self.sep)
-                            
-                    '''
-                    ITEM_UNKNOWN = 0
-                    ITEM_IMAGE = 1
-                    ITEM_STYLE = 2
-                    ITEM_SCRIPT = 3
-                    ITEM_NAVIGATION = 4
-                    ITEM_VECTOR = 5
-                    ITEM_FONT = 6
-                    ITEM_VIDEO = 7
-                    ITEM_AUDIO = 8
-                    ITEM_DOCUMENT = 9
-                    ITEM_COVER = 10
-                    '''
-
-    def conver_chapter(self, fanjian=False):
+        self._save_cover()
+        extractor = TextExtractor()
+
+        # 以追加模式打开TXT文件（1M写缓冲）
+        with FanjianService('t2s') as service, \
+                open(self.txtfile, 'a', encoding='utf-8', buffering=1 << 20) as f:
+            # 逐个提取文档中的文本
+            texts = (extractor.extract(self._decode(item.get_content()))
+                     for item in self.iter_documents())
+            # 繁简转换（如果需要）：各文档并行转换，按阅读顺序写出
+            if fanjian:
+                texts = service.convert_stream(texts)
+            for text in texts:
+                f.write(text)
+                # 写入章节结束标记
+                if len(self.sep)>=1:
+                    f.write(self.sep)
+
+    def conver_chapter(self, fanjian=False, workers=None):
         """
         将EPUB按章节转换为多个TXT文件
-        
+        文本提取与繁简转换分发到进程池并行执行，每个章节文件先写临时文件再原子替换；
+        每个进程同一时间只打开一个章节文件，打开的文件数不超过进程数
+
         参数:
             fanjian (bool): 是否进行繁简转换（True为繁体转简体）
+            workers (int): 进程数（即同时打开的章节文件数上限），默认为CPU核数
+
+        返回:
+            list: 各章节的处理结果 [{'index': 章节号, 'file': 文件路径, 'chars': 字符数, 'elapsed': 耗时(秒)}]，按章节号排序
         """
         cur_dir = os.path.dirname(self.txtfile) # 输出目录
         if not os.path.exists(cur_dir):
@@ -388,46 +834,38 @@ class Conver2txt():
         # 解析文件名（不含扩展名）和扩展名
         filename = os.path.splitext(os.path.basename(self.txtfile))[0]
         ext = os.path.splitext(self.txtfile)[1]
-        charpter_numb = 0 # 章节计数器
         print(f'{cur_dir}  {filename}  {ext} ')
         print(self.txtfile)
-        
-        # 遍历EPUB中的所有项目
-        for item in self.book.get_items():
-            # print(
-            #     f'item类型:  {item.get_type()} name: {item.get_name()} id: {item.get_id()}')
-            # 处理封面图片（同conver方法）
-            if ((item.get_type() == ebooklib.ITEM_IMAGE)
-                or (item.get_type() == ebooklib.ITEM_COVER)
-                ) and ((item.get_name().find('cover') >= 0)
-                       or (item.id.find('cover') >= 0)):
-                file_name, file_extension = os.path.splitext(
-                    item.get_name())
-                coverpath = os.path.join(
-                    self.dirname, 'cover'+file_extension)
-                # if  not os.path.exists(coverpath): os.mkdir(coverpath)
 
-                with open(coverpath, 'wb') as ff:
-                    ff.write(item.get_content())
-                    # print('cover 已提取')
-                    
-            # 处理文档内容（按章节生成文件）        
-            if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                # 解析HTML内容
-                soup = BeautifulSoup(
-                    item.get_content().decode('utf-8'), 'xml')
-                charpter_numb = charpter_numb + 1  # 章节计数+1
+        # 处理封面图片（同conver方法）
+        self._save_cover()
+
+        workers = workers or os.cpu_count() or 1
+        timings = []
+
+        def collect(futures):
+            """收集已完成章节的处理结果"""
+            for future in futures:
+                timing = future.result()
+                timings.append(timing)
+
+        # 处理文档内容（按章节生成文件，章节号从1开始）
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for charpter_numb, item in enumerate(self.iter_documents(), 1):
                 # 章节文件路径（目录+原文件名+章节号+扩展名）
                 file_charpter = os.path.join(
                     cur_dir, f'{filename}{charpter_numb}{ext}')
-                # 写入章节内容
-                with open(file_charpter, 'a', encoding='utf-8') as f:
-                    if fanjian:
-                        cc = OpenCC('t2s')
-                        f.write(cc.convert(soup.text))
-
-                    else:
-                        f.write(soup.text)
+                pending.add(executor.submit(
+                    _export_chapter, (charpter_numb, item.get_content(), file_charpter, fanjian)))
+                # 限制在途章节数量，避免一次性把所有章节内容送入进程池
+                if len(pending) >= workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(wait(pending).done)
+
+        timings.sort(key=lambda timing: timing['index'])
+        return timings
 
     def get_info(self):
         """
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+模块说明：TXT文件编码检测
+在整个文件范围内抽样（文件头、中部、尾部及若干随机位置），
+用chardet给出候选编码，再逐个窗口增量解码验证，检测结果按抽样内容的哈希缓存。
+GB2312/GBK统一按其超集GB18030处理，避免混合文件后半部分出现GBK之外的字符时解码失败。
+"""
+import os
+import json
+import codecs
+import random
+import hashlib
+from collections import OrderedDict
+
+import chardet  # 自动检测文件编码
+
+# 字节序标记（BOM）与对应编码，UTF-32需排在UTF-16之前判断
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+# chardet检测结果到实际解码所用编码的映射（统一使用超集编码）
+ENCODING_ALIAS = {
+    'ascii': 'utf-8',
+    'gb2312': 'gb18030',
+    'gbk': 'gb18030',
+    'hz-gb-2312': 'gb18030',
+    'big5': 'big5hkscs',
+}
+# 无可用候选时依次尝试的编码
+FALLBACK_ENCODINGS = ('gb18030', 'big5hkscs')
+
+
+class EncodeDetect():
+    """
+    文件编码检测类：全文件抽样 + 增量解码验证 + 按抽样哈希缓存结果
+    """
+    _cache = OrderedDict()  # 所有实例共享的检测结果缓存：{抽样哈希: 检测结果}
+
+    def __init__(self, window=64 * 1024, random_windows=4, cache_size=1024, cache_file=None):
+        """
+        初始化编码检测器
+
+        参数:
+            window (int): 每个抽样窗口的字节数，默认64K
+            random_windows (int): 随机抽样窗口数，默认4个
+            cache_size (int): 内存缓存的最大条目数
+            cache_file (str): 缓存持久化文件（JSON），默认None（仅内存缓存）
+        """
+        self.window = window
+        self.random_windows = random_windows
+        self.cache_size = cache_size
+        self.cache_file = cache_file
+        if cache_file and os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    self._cache.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+
+    def detect(self, path):
+        """
+        检测文件编码
+
+        参数:
+            path (str): 文件路径
+
+        返回:
+            dict: {'encoding': 编码, 'confidence': 置信度, 'language': 语言}
+        """
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            def read(offset, length):
+                f.seek(offset)
+                return f.read(length)
+            return self._detect(read, size)
+
+    def detect_bytes(self, data):
+        """
+        检测内存中字节串的编码（如EPUB中的章节内容）
+
+        参数:
+            data (bytes): 待检测的字节串
+
+        返回:
+            dict: {'encoding': 编码, 'confidence': 置信度, 'language': 语言}
+        """
+        view = memoryview(data)
+        return self._detect(lambda offset, length: bytes(view[offset:offset + length]), len(data))
+
+    def _sample(self, read, size):
+        """
+        抽取文件头、中部、尾部及随机位置的窗口
+
+        返回:
+            list: [(偏移量, 窗口字节, 是否位于文件末尾)]，按偏移量排序且互不重叠
+        """
+        window = self.window
+        if size <= window * (3 + self.random_windows):
+            return [(0, read(0, size), True)]
+
+        # 随机数以文件大小为种子，同一文件每次抽样位置一致，抽样哈希才能命中缓存
+        rnd = random.Random(size)
+        offsets = {0, size // 2, size - window}
+        offsets.update(rnd.randrange(window, size - 2 * window) for _ in range(self.random_windows))
+        # 偏移量按4字节对齐，UTF-16/32不会从半个字符开始
+        offsets = sorted({offset - offset % 4 for offset in offsets})
+
+        windows = []
+        end = 0
+        for offset in offsets:
+            offset = max(offset, end)
+            length = min(window, size - offset)
+            if length <= 0:
+                continue
+            windows.append((offset, read(offset, length), offset + length >= size))
+            end = offset + length
+        return windows
+
+    @staticmethod
+    def _decodes(encoding, data, offset, final):
+        """
+        增量解码验证单个窗口：窗口中间位置开始时允许跳过被截断的首个字符，
+        非文件末尾的窗口允许以不完整的字符结尾
+
+        返回:
+            bool: 是否能正确解码
+        """
+        for shift in (range(4) if offset else (0,)):
+            decoder = codecs.getincrementaldecoder(encoding)()
+            try:
+                decoder.decode(data[shift:], final)
+                return True
+            except UnicodeDecodeError:
+                continue
+        return False
+
+    def _validate(self, encoding, windows):
+        """用增量解码验证所有抽样窗口"""
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            return False
+        return all(self._decodes(encoding, data, offset, final) for offset, data, final in windows)
+
+    def _detect(self, read, size):
+        """检测主流程：BOM → 纯ASCII → UTF-8 → chardet候选 → 常用中文编码"""
+        head = read(0, 4)
+        for bom, encoding in BOMS:
+            if head.startswith(bom):
+                return {'encoding': encoding, 'confidence': 1.0, 'language': ''}
+
+        windows = self._sample(read, size)
+        sha = hashlib.sha1(str(size).encode())
+        for offset, data, final in windows:
+            sha.update(data)
+        key = sha.hexdigest()
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return dict(self._cache[key])
+
+        result = self._verdict(windows)
+        self._cache[key] = result
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        if self.cache_file:
+            self._save_cache()
+        return dict(result)
+
+    def _verdict(self, windows):
+        """根据抽样窗口给出编码结论"""
+        if all(data.isascii() for offset, data, final in windows):
+            return {'encoding': 'utf-8', 'confidence': 1.0, 'language': ''}
+        if self._validate('utf-8', windows):
+            return {'encoding': 'utf-8', 'confidence': 0.99, 'language': ''}
+
+        # chardet较慢，只用文件头的前16K给出候选编码（无结果时再用中部）
+        hint = chardet.detect(windows[0][1][:16 * 1024])
+        language = hint.get('language') or ''
+        encoding = (hint.get('encoding') or '').lower()
+        encoding = ENCODING_ALIAS.get(encoding, encoding)
+        if len(windows) > 1 and not encoding:
+            hint = chardet.detect(windows[len(windows) // 2][1][:16 * 1024])
+            encoding = (hint.get('encoding') or '').lower()
+            encoding = ENCODING_ALIAS.get(encoding, encoding)
+
+        if encoding and self._validate(encoding, windows):
+            return {'encoding': encoding, 'confidence': hint.get('confidence') or 0.0, 'language': language}
+        for candidate in FALLBACK_ENCODINGS:
+            if candidate != encoding and self._validate(candidate, windows):
+                return {'encoding': candidate, 'confidence': 0.5, 'language': language}
+        # 所有候选均无法完整解码时，返回最可能的编码，置信度为0
+        return {'encoding': encoding or FALLBACK_ENCODINGS[0], 'confidence': 0.0, 'language': language}
+
+    def _save_cache(self):
+        """持久化缓存"""
+        tmp = self.cache_file + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._cache, f, ensure_ascii=False)
+        os.replace(tmp, self.cache_file)
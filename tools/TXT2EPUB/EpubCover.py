@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+模块说明：EPUB封面提取与缩略图缓存
+直接从压缩包中读取OPF清单定位封面（不加载整本书），生成缩略图，
+缩略图保存在磁盘缓存目录中，按文件指纹命名，超出容量时按最近使用时间淘汰（LRU）。
+"""
+import io
+import os
+import hashlib
+import zipfile
+
+from PIL import Image  # 图片缩放
+
+from EpubIndex import NS, read_opf, resolve_href
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'txt2epub', 'covers')  # 默认缓存目录
+THUMB_SIZE = (320, 400)  # 默认缩略图尺寸（界面封面标签的2倍，高分屏下仍清晰）
+IMAGE_TYPES = ('image/jpeg', 'image/png', 'image/gif', 'image/webp')
+
+
+def find_cover_href(opf_path, opf):
+    """
+    从OPF清单中定位封面图片，依次尝试：
+    1. EPUB3：properties含cover-image的清单项；
+    2. EPUB2：<meta name="cover" content="清单项id"/>；
+    3. id或文件名含cover的图片；
+    4. 清单中的第一张图片。
+
+    参数:
+        opf_path (str): OPF在压缩包中的路径
+        opf (Element): OPF的XML根节点
+
+    返回:
+        str: 封面图片在压缩包中的路径；未找到时返回None
+    """
+    items = opf.findall('opf:manifest/opf:item', NS)
+    images = [item for item in items if item.get('media-type', '') in IMAGE_TYPES]
+
+    cover = next((item for item in items
+                  if 'cover-image' in item.get('properties', '').split()), None)
+    if cover is None:
+        meta = next((meta for meta in opf.findall('opf:metadata/opf:meta', NS)
+                     if meta.get('name') == 'cover'), None)
+        if meta is not None:
+            cover = next((item for item in items if item.get('id') == meta.get('content')), None)
+    if cover is None:
+        cover = next((item for item in images
+                      if 'cover' in item.get('id', '').lower() or 'cover' in item.get('href', '').lower()), None)
+    if cover is None and images:
+        cover = images[0]
+    return resolve_href(opf_path, cover.get('href')) if cover is not None else None
+
+
+def read_cover(path):
+    """
+    读取EPUB封面图片
+
+    参数:
+        path (str): EPUB文件路径
+
+    返回:
+        bytes: 封面图片数据；未找到时返回None
+    """
+    with zipfile.ZipFile(path) as zf:
+        opf_path, opf = read_opf(zf)
+        href = find_cover_href(opf_path, opf)
+        return zf.read(href) if href else None
+
+
+class EpubCover():
+    """
+    EPUB封面缩略图服务（磁盘LRU缓存）
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=200 * 1024 * 1024, size=THUMB_SIZE):
+        """
+        初始化封面服务
+
+        参数:
+            cache_dir (str): 缩略图缓存目录
+            max_bytes (int): 缓存目录容量上限（字节），默认200M
+            size (tuple): 缩略图最大尺寸 (宽, 高)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.size = tuple(size)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(path, block_size=64 * 1024):
+        """
+        计算EPUB文件指纹：文件大小 + 开头与末尾各64K的SHA-1。
+        zip的中央目录位于文件末尾，包含所有条目的CRC，内容变化时指纹随之变化
+
+        参数:
+            path (str): EPUB文件路径
+
+        返回:
+            str: 十六进制指纹
+        """
+        size = os.path.getsize(path)
+        sha = hashlib.sha1(str(size).encode())
+        with open(path, 'rb') as f:
+            sha.update(f.read(block_size))
+            if size > block_size:
+                f.seek(max(block_size, size - block_size))
+                sha.update(f.read(block_size))
+        return sha.hexdigest()
+
+    def thumbnail_path(self, path):
+        """
+        获取封面缩略图文件路径（缓存未命中时生成）
+
+        参数:
+            path (str): EPUB文件路径
+
+        返回:
+            str: 缩略图文件路径；EPUB中没有封面时返回None
+        """
+        key = f'{self.fingerprint(path)}_{self.size[0]}x{self.size[1]}'
+        thumb = os.path.join(self.cache_dir, key + '.png')
+        if os.path.exists(thumb):
+            os.utime(thumb)  # 更新使用时间（LRU）
+            return thumb
+
+        data = read_cover(path)
+        if not data:
+            return None
+        with Image.open(io.BytesIO(data)) as img:
+            img.thumbnail(self.size)
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA')
+            tmp = thumb + '.tmp'
+            img.save(tmp, 'PNG', optimize=True)
+        os.replace(tmp, thumb)
+        self._evict()
+        return thumb
+
+    def thumbnail(self, path):
+        """
+        获取封面缩略图数据
+
+        参数:
+            path (str): EPUB文件路径
+
+        返回:
+            bytes: PNG格式的缩略图数据；EPUB中没有封面时返回None
+        """
+        thumb = self.thumbnail_path(path)
+        if thumb is None:
+            return None
+        with open(thumb, 'rb') as f:
+            return f.read()
+
+    def _evict(self):
+        """缓存超出容量时，按使用时间从旧到新删除缩略图"""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.png'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        for mtime, size, thumb in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(thumb)
+                total -= size
+            except OSError:
+                pass
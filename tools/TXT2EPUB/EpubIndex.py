@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+模块说明：EPUB书库元数据索引
+只读取EPUB压缩包中的 META-INF/container.xml 与 OPF 文件提取元数据（不解析整本书），
+多进程并行读取，结果保存在本地SQLite索引中（按路径、大小、修改时间判断是否需要重新读取），
+批量重命名、搜索、查重均基于索引完成。
+"""
+import os
+import re
+import sqlite3
+import zipfile
+import posixpath
+from urllib.parse import unquote
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+INDEX_FILE = '.epubindex.sqlite'  # 书库目录下的默认索引文件名
+SPLIT_PATTERN = r"[(（：【]"  # 重命名时标题的拆分正则（取其前缀）
+
+NS = {
+    'c': 'urn:oasis:names:tc:opendocument:xmlns:container',
+    'opf': 'http://www.idpf.org/2007/opf',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+}
+# 元数据默认值（与Conver2txt.get_info一致）
+DEFAULT_INFO = {'title': '未知', 'creator': 'etony.an@gmail.com',
+                'contrib': 'etony.an@gmail.com', 'date': '1000-10-10 10:10:10'}
+# 索引字段与OPF中Dublin Core元素的对应关系
+DC_FIELDS = {'title': 'title', 'creator': 'creator', 'contrib': 'contributor',
+             'date': 'date', 'identifier': 'identifier', 'language': 'language'}
+COLUMNS = ('path', 'size', 'mtime', 'title', 'creator', 'contrib', 'date',
+           'identifier', 'language', 'error')
+
+
+def read_opf(zf):
+    """
+    从EPUB压缩包中读取OPF文件
+
+    参数:
+        zf (zipfile.ZipFile): 已打开的EPUB压缩包
+
+    返回:
+        tuple: (OPF在压缩包中的路径, OPF的XML根节点)
+    """
+    container = ET.fromstring(zf.read('META-INF/container.xml'))
+    rootfile = container.find('.//c:rootfile', NS)
+    opf_path = rootfile.get('full-path')
+    return opf_path, ET.fromstring(zf.read(opf_path))
+
+
+def resolve_href(opf_path, href):
+    """将OPF中的相对路径转换为压缩包内的路径"""
+    return posixpath.normpath(posixpath.join(posixpath.dirname(opf_path), unquote(href)))
+
+
+def read_metadata(path):
+    """
+    读取单个EPUB的元数据（进程池任务）
+
+    参数:
+        path (str): EPUB文件路径
+
+    返回:
+        dict: 索引记录（读取失败时error字段为错误信息，其余为默认值）
+    """
+    stat = os.stat(path)
+    record = dict(DEFAULT_INFO, path=path, size=stat.st_size, mtime=stat.st_mtime,
+                  identifier='', language='', error='')
+    try:
+        with zipfile.ZipFile(path) as zf:
+            opf_path, opf = read_opf(zf)
+        metadata = opf.find('opf:metadata', NS)
+        for field, element in DC_FIELDS.items():
+            node = metadata.find(f'dc:{element}', NS)
+            if node is not None and node.text:
+                record[field] = node.text.strip()
+    except Exception as e:
+        record['error'] = f'{type(e).__name__}: {e}'
+    return record
+
+
+class EpubIndex():
+    """
+    EPUB书库元数据索引（SQLite）
+    """
+    def __init__(self, db_file, workers=None):
+        """
+        初始化索引
+
+        参数:
+            db_file (str): SQLite索引文件路径
+            workers (int): 读取元数据的进程数，默认CPU核数
+        """
+        self.db_file = db_file
+        self.workers = workers or os.cpu_count() or 1
+        self.conn = sqlite3.connect(db_file)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS books (
+                path TEXT PRIMARY KEY, size INTEGER, mtime REAL,
+                title TEXT, creator TEXT, contrib TEXT, date TEXT,
+                identifier TEXT, language TEXT, error TEXT)''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_title ON books (title, creator)')
+        self.conn.commit()
+
+    def close(self):
+        """关闭索引"""
+        self.conn.close()
+
+    def _rows_under(self, dir_path, columns='*', where=''):
+        """查询目录（含子目录）下的索引记录"""
+        prefix = os.path.join(os.path.abspath(dir_path), '')
+        return self.conn.execute(f'SELECT {columns} FROM books WHERE substr(path, 1, ?) = ? {where}',
+                                 (len(prefix), prefix)).fetchall()
+
+    def update(self, dir_path):
+        """
+        扫描目录（含子目录）更新索引：只重新读取新增或大小/修改时间变化的文件，
+        并删除目录下已不存在的文件记录
+
+        参数:
+            dir_path (str): 书库目录
+
+        返回:
+            dict: {'total': 文件总数, 'updated': 重新读取数, 'removed': 删除记录数}
+        """
+        known = {row['path']: (row['size'], row['mtime'])
+                 for row in self._rows_under(dir_path, 'path, size, mtime')}
+
+        found = set()
+        changed = []
+        for root, dirs, files in os.walk(os.path.abspath(dir_path)):
+            for file in files:
+                if os.path.splitext(file)[1].lower() != '.epub':
+                    continue
+                path = os.path.join(root, file)
+                found.add(path)
+                stat = os.stat(path)
+                if known.get(path) != (stat.st_size, stat.st_mtime):
+                    changed.append(path)
+
+        if changed:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(changed))) as executor:
+                records = executor.map(read_metadata, changed, chunksize=32)
+                self.conn.executemany(
+                    f'INSERT OR REPLACE INTO books VALUES ({", ".join("?" * len(COLUMNS))})',
+                    ([record[column] for column in COLUMNS] for record in records))
+
+        removed = [(path,) for path in known if path not in found]
+        self.conn.executemany('DELETE FROM books WHERE path = ?', removed)
+        self.conn.commit()
+        return {'total': len(found), 'updated': len(changed), 'removed': len(removed)}
+
+    def get(self, path):
+        """按路径获取索引记录，不存在时返回None"""
+        row = self.conn.execute('SELECT * FROM books WHERE path = ?', (os.path.abspath(path),)).fetchone()
+        return dict(row) if row else None
+
+    def search(self, keyword, fields=('title', 'creator')):
+        """
+        按关键字搜索
+
+        参数:
+            keyword (str): 关键字（子串匹配）
+            fields (tuple): 搜索的字段
+
+        返回:
+            list: 匹配的索引记录
+        """
+        fields = [field for field in fields if field in COLUMNS]
+        where = ' OR '.join(f'{field} LIKE ?' for field in fields)
+        rows = self.conn.execute(f'SELECT * FROM books WHERE {where} ORDER BY title',
+                                 [f'%{keyword}%'] * len(fields))
+        return [dict(row) for row in rows]
+
+    def duplicates(self):
+        """
+        查找重复书籍：标题前缀（去掉「(（：【」之后的部分）与作者相同视为同一本书
+
+        返回:
+            list: 重复组，每组为同一书籍的索引记录列表（按文件大小从大到小）
+        """
+        groups = {}
+        for row in self.conn.execute("SELECT * FROM books WHERE error = '' ORDER BY size DESC"):
+            key = (re.split(SPLIT_PATTERN, row['title'], maxsplit=1)[0].strip(), row['creator'])
+            groups.setdefault(key, []).append(dict(row))
+        return [group for group in groups.values() if len(group) > 1]
+
+    @staticmethod
+    def rename_target(record):
+        """按「标题前缀_作者.epub」生成新文件路径（与原批量重命名规则一致）"""
+        filename = re.split(SPLIT_PATTERN, record['title'], maxsplit=1)[0] + '_' + record['creator']
+        return os.path.join(os.path.dirname(record['path']), filename + '.epub')
+
+    def rename(self, dir_path):
+        """
+        按索引批量重命名目录下的EPUB文件，并同步更新索引
+
+        参数:
+            dir_path (str): 书库目录
+
+        返回:
+            tuple: (重命名成功数, 失败（含目标文件已存在）的文件路径列表)
+        """
+        renamed = 0
+        failed = []
+        for row in self._rows_under(dir_path, where="AND error = ''"):
+            record = dict(row)
+            target = self.rename_target(record)
+            if target == record['path']:
+                continue
+            # 目标文件已存在（如同名同作者的另一本书）时不覆盖，记为失败
+            # （不区分大小写的文件系统上仅大小写不同的为同一文件，可以改名）
+            try:
+                if os.path.exists(target) and not os.path.samefile(target, record['path']):
+                    failed.append(record['path'])
+                    continue
+                os.rename(record['path'], target)
+            except OSError:
+                failed.append(record['path'])
+                continue
+            self.conn.execute('UPDATE books SET path = ? WHERE path = ?', (target, record['path']))
+            renamed += 1
+        self.conn.commit()
+        return renamed, failed
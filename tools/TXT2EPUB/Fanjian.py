@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+模块说明：简繁体转换服务（基于OpenCC）
+1. 每种转换配置在每个进程中只创建一个转换器；
+2. 短文本（章节标题、元数据、文件名等）的转换结果缓存复用；
+3. 长文本按整行切分成块，分发到进程池并行转换，按原顺序拼接；
+4. 支持流式转换：逐块读入、转换、写出，大文件无需整体读入内存。
+"""
+import os
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+from opencc import OpenCC  # 用于简繁体转换（需安装opencc-python-reimplemented）
+
+MEMO_LENGTH = 128  # 不超过该长度的文本视为短文本，缓存转换结果
+CHUNK_SIZE = 256 * 1024  # 并行转换时每块的字符数（按整行切分）
+
+_converters = {}  # 进程内的转换器：{配置: OpenCC对象}
+
+
+def get_converter(config='t2s'):
+    """
+    获取转换器（每个进程每种配置只创建一次）
+
+    参数:
+        config (str): OpenCC配置，如 t2s（繁体→简体）、s2t（简体→繁体）
+
+    返回:
+        OpenCC: 转换器
+    """
+    if config not in _converters:
+        _converters[config] = OpenCC(config)
+    return _converters[config]
+
+
+@lru_cache(maxsize=8192)
+def _convert_short(config, text):
+    """转换短文本（结果缓存）"""
+    return get_converter(config).convert(text)
+
+
+def _convert_chunk(task):
+    """进程池任务：转换一个文本块"""
+    config, text = task
+    return get_converter(config).convert(text)
+
+
+def iter_chunks(lines, chunk_size=CHUNK_SIZE):
+    """
+    将文本行按整行组合成块
+
+    参数:
+        lines (iterable): 文本行（保留行尾换行符），如打开的文件对象
+        chunk_size (int): 每块的字符数
+
+    返回:
+        generator: 文本块
+    """
+    chunk = []
+    size = 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield ''.join(chunk)
+
+
+class FanjianService():
+    """
+    简繁体转换服务
+    """
+    def __init__(self, config='t2s', workers=None, chunk_size=CHUNK_SIZE):
+        """
+        初始化转换服务
+
+        参数:
+            config (str): OpenCC配置，默认t2s（繁体→简体）
+            workers (int): 并行转换的进程数，默认CPU核数；为1时不使用进程池
+            chunk_size (int): 并行转换时每块的字符数
+        """
+        self.config = config
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.executor = None  # 进程池（首次并行转换时创建）
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """关闭进程池"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def convert(self, text):
+        """
+        转换文本：短文本走缓存，长文本按整行分块并行转换
+
+        参数:
+            text (str): 待转换文本
+
+        返回:
+            str: 转换后的文本
+        """
+        if len(text) <= MEMO_LENGTH:
+            return _convert_short(self.config, text)
+        if self.workers == 1 or len(text) < 2 * self.chunk_size:
+            return get_converter(self.config).convert(text)
+        return ''.join(self.convert_stream(
+            iter_chunks(text.splitlines(keepends=True), self.chunk_size)))
+
+    def convert_stream(self, chunks):
+        """
+        流式转换：按输入顺序逐块产出转换结果，同时在途的块数有上限，内存占用与总长度无关
+
+        参数:
+            chunks (iterable): 文本块（应按整行切分，见iter_chunks）
+
+        返回:
+            generator: 转换后的文本块（与输入顺序一致）
+        """
+        if self.workers == 1:
+            converter = get_converter(self.config)
+            for chunk in chunks:
+                yield converter.convert(chunk)
+            return
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        pending = deque()  # 按提交顺序排列的在途任务
+        for chunk in chunks:
+            pending.append(self.executor.submit(_convert_chunk, (self.config, chunk)))
+            if len(pending) >= self.workers * 2:
+                # 等待最早提交的块完成，保证输出顺序
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def convert_file(self, src, dst, encoding='utf-8', out_encoding='utf-8'):
+        """
+        流式转换文本文件
+
+        参数:
+            src (str): 输入文件路径
+            dst (str): 输出文件路径
+            encoding (str): 输入文件编码
+            out_encoding (str): 输出文件编码
+        """
+        with open(src, 'r', encoding=encoding) as fin, \
+                open(dst, 'w', encoding=out_encoding, buffering=1 << 20) as fout:
+            for text in self.convert_stream(iter_chunks(fin, self.chunk_size)):
+                fout.write(text)
@@ -4,17 +4,15 @@
 Module implementing Txt2epub.
 """
 import os
-import re
 import sys
 import datetime
 from loguru import logger  # 日志库（替代原生logging，更简洁）
-import chardet  # 自动检测文件编码
-from opencc import OpenCC  # 繁简转换工具
+from Fanjian import FanjianService  # 繁简转换服务（基于OpenCC）
 
 from PyQt6.QtCore import pyqtSlot  # PyQt槽函数装饰器
 from PyQt6.QtWidgets import QMainWindow, QDialog
 from PyQt6.QtWidgets import QApplication, QFileDialog, QMessageBox
-from PyQt6.QtGui import QIcon, QPixmap, QImage  # PyQt图片处理
+from PyQt6.QtGui import QIcon, QPixmap  # PyQt图片处理
 
 # 自定义UI类（Qt Designer生成）
 from Ui_Txt2epub import Ui_MainWindow
@@ -22,6 +20,10 @@ from Ui_Dir import Ui_Dialog
 
 # 自定义转换类（核心业务逻辑：Txt↔Epub/Mobi转换）
 from Conver2epub import Conver2epub, Conver2txt, epub2mobi
+from EncodeDetect import EncodeDetect  # 全文件抽样的编码检测
+from ChapterDetect import ChapterDetect, DEFAULT_REG  # 章节正则自动识别
+from EpubIndex import EpubIndex, INDEX_FILE, read_metadata  # EPUB书库元数据索引
+from EpubCover import EpubCover  # EPUB封面缩略图（磁盘缓存）
 
 # ===================== 常量定义（抽离魔法值）=====================
 MIN_REG_LENGTH = 5  # 正则表达式最小长度
@@ -46,8 +48,8 @@ class Txt2epub(QMainWindow, Ui_MainWindow):
     依赖组件：
     - Ui_MainWindow：主窗口UI（含输入框/按钮/状态栏/图片显示）；
     - Conver2epub/Conver2txt/epub2mobi：核心转换逻辑类；
-    - chardet：自动检测TXT文件编码；
-    - opencc：繁简中文转换；
+    - EncodeDetect：自动检测TXT文件编码（全文件抽样，基于chardet）；
+    - Fanjian：繁简中文转换服务（基于opencc）；
     - loguru：日志记录（按日分割，含时间/级别/位置）；
     - PyQt6：GUI交互（文件选择/弹窗/状态栏/图片显示）。
     """
@@ -128,8 +130,8 @@ class Txt2epub(QMainWindow, Ui_MainWindow):
                 logger.info(
                     f'指定文件编码: {self.cb_encode.currentIndex()}-{encode}')
 
-            # 执行核心转换逻辑
-            conver2.conver()
+            # 执行核心转换逻辑（章节渲染与压缩分发到多个进程）
+            conver2.conver_parallel()
             logger.info(f'文件转换完成！   {epubfile}')
             self.statusBar.showMessage("文件转换完成！")  # 状态栏提示
 
@@ -194,8 +196,7 @@ class Txt2epub(QMainWindow, Ui_MainWindow):
         self.le_txt.clear()     # 清空TXT路径输入框
         self.le_epub.clear()    # 清空EPUB路径输入框
         # 恢复默认章节匹配正则
-        self.te_reg.setPlainText(
-            r"^\s*([第卷][0123456789一二三四五六七八九十零〇百千两]*[章回部节集卷].*)\s*")
+        self.te_reg.setPlainText(DEFAULT_REG)
         self.le_title.clear()  # 清空标题输入框
         logger.info('选项重置！')   # 记录重置操作
 
@@ -207,8 +208,9 @@ class Txt2epub(QMainWindow, Ui_MainWindow):
         1. 打开文件选择对话框，限定TXT格式；
         2. 自动填充EPUB路径（同目录+同文件名+.epub）；
         3. 自动填充标题/作者（默认=TXT文件名）；
-        4. 自动检测TXT文件编码（chardet），更新状态栏和编码下拉框；
-        5. 记录日志和状态栏提示。
+        4. 自动检测TXT文件编码（EncodeDetect），更新状态栏和编码下拉框；
+        5. 自动识别章节正则（ChapterDetect），填入正则输入框；
+        6. 记录日志和状态栏提示。
         """
         # 打开文件选择对话框（限定TXT格式）
         txtpath, txtType = QFileDialog.getOpenFileName(
@@ -232,20 +234,31 @@ class Txt2epub(QMainWindow, Ui_MainWindow):
             logger.info(f'指定转换文件:{txtpath}')
             self.statusBar.showMessage(f'指定转换文件:{txtpath} ')
 
-            # 自动检测文件编码（读取前512字节，平衡性能和准确性）
-            with open(txtpath, mode='rb') as f:
-                data = f.read(512)  # 读取前512字节用于编码检测
-                fileinfo = chardet.detect(data)  # chardet核心检测方法
-                logger.info(f'文件信息: {fileinfo}')
-
-                # 更新状态栏（区分是否检测到语言）
-                if fileinfo['language'] == '':
-                    self.statusBar.showMessage(
-                        f'指定转换文件:{txtpath} 编码:{chardet.detect(data)["encoding"]}')
-                else:
-                    self.statusBar.showMessage(
-                        f'指定转换文件:{txtpath} 编码:{chardet.detect(data)["encoding"]} 语言:{chardet.detect(data)["language"]} ')
-                    self.cb_encode.setCurrentIndex(1)  # 切换编码下拉框为非默认项
+            # 自动检测文件编码（在文件头、中部、尾部及随机位置抽样，并增量解码验证）
+            fileinfo = EncodeDetect().detect(txtpath)
+            logger.info(f'文件信息: {fileinfo}')
+
+            # 更新状态栏（区分是否检测到语言）
+            if fileinfo['language'] == '':
+                self.statusBar.showMessage(
+                    f'指定转换文件:{txtpath} 编码:{fileinfo["encoding"]}')
+            else:
+                self.statusBar.showMessage(
+                    f'指定转换文件:{txtpath} 编码:{fileinfo["encoding"]} 语言:{fileinfo["language"]} ')
+
+            # 编码下拉框切换为检测结果（下拉框中没有时追加）
+            encode = fileinfo['encoding'].upper()
+            if encode == 'UTF-8':
+                self.cb_encode.setCurrentIndex(0)
+            else:
+                if self.cb_encode.findText(encode) < 0:
+                    self.cb_encode.addItem(encode)
+                self.cb_encode.setCurrentIndex(self.cb_encode.findText(encode))
+
+            # 自动识别章节正则，填入正则输入框（仍可手动修改）
+            reg = ChapterDetect().detect(txtpath, fileinfo['encoding'])
+            self.te_reg.setPlainText(reg)
+            logger.info(f'识别章节正则: {reg}')
 
     @pyqtSlot()
     def on_pb_cover_clicked(self):
@@ -320,8 +333,8 @@ class Txt2epub(QMainWindow, Ui_MainWindow):
         核心逻辑：
         1. 打开文件选择对话框，限定EPUB格式；
         2. 自动生成TXT默认路径（同目录+同文件名+.txt）；
-        3. 提取EPUB元信息（标题/作者/贡献者/日期）并填充到界面；
-        4. 提取EPUB封面并显示在界面标签（lb_cover）；
+        3. 从OPF提取EPUB元信息（标题/作者/贡献者/日期）并填充到界面；
+        4. 提取EPUB封面缩略图（EpubCover，磁盘缓存）并显示在界面标签（lb_cover）；
         5. 启用「选择TXT保存路径」按钮，记录日志和状态栏提示。
         """
         # 打开EPUB文件选择对话框
@@ -346,10 +359,8 @@ class Txt2epub(QMainWindow, Ui_MainWindow):
             logger.info(f'指定转换文件:{in_epubpath}')
             self.statusBar.showMessage(f'指定转换文件:{in_epubpath}')
 
-            # 初始化EPUB→TXT转换类，提取元信息
-            conver2txt = Conver2txt(
-                self.le_in_epub.text(), self.le_out_txt.text())
-            book_info = conver2txt.get_info()  # 提取EPUB元信息
+            # 只读取OPF提取元信息（不加载整本书）
+            book_info = read_metadata(in_epubpath)
 
             # 填充元信息到界面输入框
             self.le_book_title.setText(book_info['title'])  # 标题
@@ -362,13 +373,11 @@ class Txt2epub(QMainWindow, Ui_MainWindow):
             self.le_book_date.setText(date.strftime('%Y-%m-%d %H:%M:%S'))
             self.pb_out_txt.setEnabled(True)
 
-            # logger.info(f'cover type: {type(conver2txt.get_cover())}')
-            # 提取并显示EPUB封面
+            # 提取并显示EPUB封面（缩略图有缓存时直接读取，不再解析EPUB）
             try:
-                bookcover = conver2txt.get_cover()  # 获取封面二进制数据
-                img = QImage.fromData(bookcover)  # 二进制数据转QImage
-                cover = QPixmap.fromImage(img)  # QImage转QPixmap
-                self.lb_cover.setPixmap(cover)  # 显示在界面标签
+                thumb = EpubCover().thumbnail_path(in_epubpath)  # 获取封面缩略图路径
+                if thumb is not None:
+                    self.lb_cover.setPixmap(QPixmap(thumb))  # 显示在界面标签
             except  Exception as e:
                 logger.info(f'提取epub文件封面失败: {e}')
             logger.info(f'提取epub文件信息完毕: {book_info}')
@@ -413,10 +422,14 @@ class Txt2epub(QMainWindow, Ui_MainWindow):
         # 获取繁简转换开关状态
         fanjian = self.chb_fanjian.isChecked()
         # 执行按章节转换(传入繁简转换参数)
-        self.conver2txt.conver_chapter(fanjian=fanjian)
+        timings = self.conver2txt.conver_chapter(fanjian=fanjian)
         
         cur_dir= os.path.dirname(self.le_out_txt.text())
-        logger.info(f'文件按章节转换完成！  {cur_dir}')
+        logger.info(f'文件按章节转换完成！  {cur_dir}  共{len(timings)}章')
+        if timings:
+            slowest = max(timings, key=lambda timing: timing['elapsed'])
+            logger.info(f'章节总耗时: {sum(t["elapsed"] for t in timings):.3f}s  '
+                        f'最慢章节: {slowest["file"]} {slowest["elapsed"]:.3f}s')
         self.statusBar.showMessage(f"文件按章节转换完成！  {cur_dir}")
 
         # 弹窗提示：询问是否打开存储目录
@@ -518,8 +531,8 @@ class Txt2epub(QMainWindow, Ui_MainWindow):
 
         # 勾选状态且文件名有效时，执行繁简转换
         if self.chb_fanjian.isChecked() and (in_file_name != '') and (in_file_name is not None):
-            cc = OpenCC('t2s')  # 初始化繁简转换（t2s=繁体→简体）
-            in_file_name = cc.convert(in_file_name)  # 转换文件名
+            # 繁简转换（t2s=繁体→简体，短文本转换结果有缓存）
+            in_file_name = FanjianService('t2s').convert(in_file_name)  # 转换文件名
 
             # 生成新的TXT路径（简体文件名）
             self.out_txtpath = os.path.join(
@@ -557,50 +570,32 @@ class Txt2epub(QMainWindow, Ui_MainWindow):
         """
         槽函数：响应「批量重命名EPUB」按钮点击事件
         核心逻辑：
-        1. 选择目标目录，遍历所有EPUB文件；
-        2. 提取每个EPUB的标题/作者元信息；
-        3. 按「标题_作者.epub」格式重命名（正则拆分标题前缀）；
-        4. 异常处理：重命名失败时记录日志，跳过该文件；
-        5. 记录总处理数和状态栏提示。
+        1. 选择目标目录，更新该目录下的书库索引（EpubIndex，只读取新增或变化文件的元数据）；
+        2. 按索引中的标题/作者，以「标题_作者.epub」格式重命名（正则拆分标题前缀）；
+        3. 异常处理：重命名失败时记录日志，跳过该文件；
+        4. 记录总处理数和状态栏提示。
         """
         # 选择目标目录
         dir_path = QFileDialog.getExistingDirectory(
             None, "选择epub文件目录", ".")
-        epubfile = []  # 存储遍历到的EPUB文件
-
-        # 遍历目录（含子目录）下的所有文件
-        for root, dirs, files in os.walk(dir_path):
-            for file in files:
-                old_file_name = os.path.join(root, file)  # 原文件完整路径
-                # f_old_file_name = os.path.join(root, 'F_'+file)
-                file_name, file_extension = os.path.splitext(
-                    os.path.basename(file))
-
-                # 仅处理EPUB文件
-                if file_extension == '.epub':
-                    epubfile.append(file)
-                    try:
-                        # 提取EPUB元信息
-                        conver2txt = Conver2txt(
-                            os.path.join(root, file), self.le_out_txt.text())
-                        book_info = conver2txt.get_info()
-
-                        # 正则拆分标题（取「(（：【」前的前缀
-                        filename = re.split(r"[(（：【]", book_info['title'], maxsplit=1, flags=0)[
-                            0] + '_' + book_info['creator']
-                        # 生成新文件名
-                        new_file_name = os.path.join(
-                            root, filename + file_extension)
-                        # 执行重命名
-                        os.rename(old_file_name, new_file_name)
-                    except:
-                        # os.rename(old_file_name, f_old_file_name)
-                        # 重命名失败时记录日志，跳过该文件
-                        logger.info(f'重命名失败: {file}')
-                        pass
+        if dir_path == '':
+            return
+
+        # 更新书库索引（只读取新增或变化的文件的OPF元数据，多进程并行）
+        index = EpubIndex(os.path.join(dir_path, INDEX_FILE))
+        try:
+            stat = index.update(dir_path)
+            logger.info(f'更新书库索引: {dir_path} {stat}')
+            # 按索引中的标题/作者重命名
+            renamed, failed = index.rename(dir_path)
+        finally:
+            index.close()
+        for file in failed:
+            # 重命名失败时记录日志，跳过该文件
+            logger.info(f'重命名失败: {file}')
         # 记录批量重命名结果
-        logger.info(f'批量重命名完成: {dir_path} - {len(epubfile)} 个文件')
-        self.statusBar.showMessage(f"批量重命名完成: {dir_path} 个文件")
+        logger.info(f'批量重命名完成: {dir_path} - {stat["total"]} 个文件, 重命名 {renamed} 个')
+        self.statusBar.showMessage(f"批量重命名完成: {dir_path} 重命名 {renamed} 个文件")
 
     @pyqtSlot()
     def on_lb_image_clicked(self):
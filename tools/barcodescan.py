@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+图书条形码批量识别
+功能：
+    1. 批量识别文件夹中的图片（一张照片可含多本书的条形码）或视频文件中的ISBN条形码
+    2. 多进程并行解码：图片按文件分发，视频按帧区间分发（各进程自行跳转读取，不在进程间传递图像）
+    3. 识别失败时逐级回退：灰度 / OTSU二值化 / 自适应阈值，工作尺寸 / 原图尺寸 / 缩小一半
+    4. 只识别EAN-13并校验ISBN（978/979开头、校验码正确），结果按ISBN去重，按识别顺序逐批返回
+依赖：
+    - opencv-python: 图像/视频读取与预处理
+    - pyzbar: 条形码解码（需系统安装zbar库）
+"""
+import os
+import sys
+import logging
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2 as cv
+import numpy as np
+from pyzbar.pyzbar import ZBarSymbol, decode
+
+LOG = logging.getLogger(__name__)
+
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+VIDEO_EXTS = ('.mp4', '.avi', '.mov', '.mkv', '.m4v', '.wmv')
+FILE_FILTER = "图片/视频 (*.png *.jpg *.jpeg *.bmp *.tif *.tiff *.webp *.mp4 *.avi *.mov *.mkv *.m4v *.wmv);;All Files(*)"
+WORK_SIDE = 1600   # 解码前把长边缩小到该尺寸（大幅照片直接解码很慢）
+FRAME_STEP = 5     # 视频每隔几帧识别一帧
+FRAME_CHUNK = 300  # 每个视频任务最多处理的帧数
+STOP_POLL = 0.2    # 等待识别结果时检查停止标志的间隔（秒）
+
+
+def is_isbn13(code):
+    """校验13位ISBN：978/979开头，校验码正确（算法见BookList.py开头的说明）"""
+    if len(code) != 13 or not code.isdigit() or code[:3] not in ('978', '979'):
+        return False
+    total = sum(int(ch) * (3 if i % 2 else 1) for i, ch in enumerate(code[:12]))
+    return (10 - total % 10) % 10 == int(code[12])
+
+
+def _decode(gray):
+    """解码一张灰度图中的所有EAN-13条形码，返回有效ISBN列表"""
+    codes = []
+    for bar in decode(gray, symbols=[ZBarSymbol.EAN13]):
+        code = bar.data.decode('utf-8')
+        if is_isbn13(code) and code not in codes:
+            codes.append(code)
+    return codes
+
+
+def _variants(gray):
+    """预处理回退序列：灰度原图 → OTSU二值化（与单张扫描一致）→ 自适应阈值（光照不均时有效）"""
+    yield gray
+    yield cv.threshold(gray, 0, 255, cv.THRESH_BINARY + cv.THRESH_OTSU)[1]
+    yield cv.adaptiveThreshold(gray, 255, cv.ADAPTIVE_THRESH_GAUSSIAN_C, cv.THRESH_BINARY, 31, 10)
+
+
+def decode_isbns(image):
+    """
+    识别一张图像中的ISBN条形码（多尺度 + 多种二值化回退）
+    工作尺寸下三种预处理的结果合并（同一张照片中不同条形码可能分别在不同预处理下识别），
+    都未识别到时再依次尝试原图尺寸（条形码较小）和缩小一半（条形码很大或有噪点）
+
+    :param image: BGR或灰度图像（numpy数组）
+    :return: ISBN列表（按识别顺序，已去重）
+    """
+    gray = image if image.ndim == 2 else cv.cvtColor(image, cv.COLOR_BGR2GRAY)
+    side = max(gray.shape[:2])
+    scales = [min(1.0, WORK_SIDE / side)]
+    if scales[0] < 1.0:
+        scales.append(1.0)
+    scales.append(scales[0] / 2)
+
+    for scale in scales:
+        img = gray if scale == 1.0 else cv.resize(gray, None, fx=scale, fy=scale,
+                                                   interpolation=cv.INTER_AREA)
+        codes = []
+        for variant in _variants(img):
+            codes.extend(code for code in _decode(variant) if code not in codes)
+        if codes:
+            return codes
+    return []
+
+
+def scan_image(path):
+    """
+    进程池任务：识别一个图片文件（兼容中文路径）
+
+    :param path: 图片路径
+    :return: ISBN列表
+    """
+    image = cv.imdecode(np.fromfile(path, dtype=np.uint8), cv.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"无法读取图片：{path}")
+    return decode_isbns(image)
+
+
+def scan_video(path, start, stop, step=FRAME_STEP):
+    """
+    进程池任务：识别视频中 [start, stop) 区间的帧（每隔step帧识别一帧，跳过的帧只grab不解码）
+
+    :param path: 视频路径
+    :param start: 起始帧
+    :param stop: 结束帧（不含）
+    :param step: 识别间隔帧数
+    :return: ISBN列表
+    """
+    cap = cv.VideoCapture(path)
+    codes = []
+    try:
+        if start:
+            cap.set(cv.CAP_PROP_POS_FRAMES, start)
+        for frame_no in range(start, stop):
+            if (frame_no - start) % step:
+                if not cap.grab():
+                    break
+                continue
+            ok, frame = cap.read()
+            if not ok:
+                break
+            codes.extend(code for code in decode_isbns(frame) if code not in codes)
+    finally:
+        cap.release()
+    return codes
+
+
+def frame_count(path):
+    """视频总帧数（无法读取时为0）"""
+    cap = cv.VideoCapture(path)
+    try:
+        return max(int(cap.get(cv.CAP_PROP_FRAME_COUNT)), 0) if cap.isOpened() else 0
+    finally:
+        cap.release()
+
+
+class BarcodeScanner():
+    """
+    条形码批量识别（进程池）
+    """
+    def __init__(self, workers=None, frame_step=FRAME_STEP):
+        """
+        :param workers: 进程数，默认CPU核数
+        :param frame_step: 视频每隔几帧识别一帧
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.frame_step = frame_step
+        self.executor = None  # 进程池（首次识别时创建）
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """关闭进程池（未开始的任务直接取消）"""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def tasks(self, sources):
+        """
+        把输入展开为进程池任务：文件夹 → 其中的图片和视频（含子文件夹），视频 → 帧区间
+
+        :param sources: 图片/视频文件或文件夹路径列表
+        :return: [(任务函数, 参数元组)]
+        """
+        files = []
+        for source in sources:
+            if os.path.isdir(source):
+                for root, dirs, names in os.walk(source):
+                    dirs.sort()
+                    files.extend(os.path.join(root, name) for name in sorted(names)
+                                 if name.lower().endswith(IMAGE_EXTS + VIDEO_EXTS))
+            else:
+                files.append(source)
+
+        tasks = []
+        for path in files:
+            if path.lower().endswith(VIDEO_EXTS):
+                total = frame_count(path)
+                # 帧区间取 step 的整数倍，保证各区间的识别帧与整体间隔一致
+                chunk = max(self.frame_step, FRAME_CHUNK // self.frame_step * self.frame_step)
+                tasks.extend((scan_video, (path, start, min(start + chunk, total), self.frame_step))
+                             for start in range(0, total, chunk))
+            else:
+                tasks.append((scan_image, (path,)))
+        return tasks
+
+    def iter_scan(self, sources, seen=(), stop=None):
+        """
+        批量识别，按任务完成顺序产出新识别到的ISBN；调用方中途停止迭代时，未开始的任务随即取消
+
+        :param sources: 图片/视频文件或文件夹路径列表
+        :param seen: 已知的ISBN（不再重复返回）
+        :param stop: 可选的无参函数，返回True时停止识别（等待结果期间也会检查）
+        :return: 生成器，逐个产出 (新ISBN列表, 已完成任务数, 任务总数)
+        """
+        tasks = self.tasks(sources)
+        seen = set(seen)
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        futures = {self.executor.submit(func, *args): args[0] for func, args in tasks}
+        pending = set(futures)
+        done = 0
+        try:
+            while pending:
+                finished, pending = wait(pending, timeout=STOP_POLL, return_when=FIRST_COMPLETED)
+                if stop is not None and stop():
+                    LOG.info("条码识别已停止")
+                    break
+                for future in finished:
+                    try:
+                        codes = future.result()
+                    except Exception as e:
+                        LOG.warning(f"识别失败 {futures[future]}：{e}")
+                        codes = []
+                    new = [code for code in codes if code not in seen]
+                    seen.update(new)
+                    done += 1
+                    yield new, done, len(tasks)
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+if __name__ == "__main__":
+    # 命令行：python barcodescan.py 文件夹/图片/视频 ...，逐行输出识别到的ISBN
+    with BarcodeScanner() as scanner:
+        for isbns, done, total in scanner.iter_scan(sys.argv[1:]):
+            for isbn in isbns:
+                print(isbn)
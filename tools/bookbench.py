@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+图书目录性能基准测试
+功能：
+    1. 生成1千~100万行的模拟图书目录（ISBN校验码正确，书名/作者为随机中文，评分/人数随机）
+    2. 无界面运行（Qt offscreen）测量热点操作耗时：TableModel.data（表格绘制）、全文检索、
+       updateItem/updateItems（豆瓣刷新写回）、推荐度排序、CSV/SQLite 加载与保存、豆瓣数据解析与批量查询
+    3. 豆瓣接口使用本地桩服务器（不访问网络，结果稳定可复现）
+    4. 每项操作重复多次取中位数；另单独运行一次用tracemalloc记录内存峰值（tracemalloc会拖慢Python代码，不计入耗时）
+    5. 结果输出为JSON（含环境与代码版本），可与上次结果对比，变慢超过阈值时返回非零退出码
+用法：
+    python bookbench.py                                  # 默认规模 1000,10000,100000,1000000
+    python bookbench.py --sizes 1000,10000 --repeat 5 --json bench.json
+    python bookbench.py --only search,data --compare bench.json --threshold 0.2
+依赖：
+    - PyQt6 / pandas / numpy: 与BookList一致（BookList的其他依赖也需安装，以便导入TableModel）
+"""
+import os
+import gc
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import statistics
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 必须在导入PyQt6之前设置：无显示器环境下运行
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+import pandas as pd
+from PyQt6.QtCore import Qt, PYQT_VERSION_STR
+from PyQt6.QtWidgets import QApplication
+
+from BookList import TableModel, bcol
+from bookstore import BookStore
+from doubanapi import DouBanApi, IsbnResolver, TokenBucket
+
+LOG = logging.getLogger(__name__)
+
+SIZES = (1000, 10000, 100000, 1000000)  # 默认测试的目录行数
+REPEAT = 3            # 每项操作重复次数（取中位数）
+THRESHOLD = 0.2       # 对比上次结果时，耗时增加超过20%视为变慢
+VIEWPORT = (40, 9)    # 一屏表格的行数、列数（TableModel.data按一屏调用）
+SCREENS = 200         # 绘制测试滚动的屏数
+UPDATE_BATCH = 50     # 豆瓣刷新每批写回的图书数（与RefreshBookinfoList一致）
+RESOLVE_COUNT = 200   # 批量查询测试的ISBN数（不超过目录行数）
+QUERIES = ('书', '山水', '作者:王*', 'isbn:97871', '出版:人民 文学', '春秋~')  # 检索测试的查询语句
+CHARS = '的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年得就那要下以生会自着去之过家学对可她里后小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面公同三已老从动两长知民样现分将外但身些与高意进把法此实回二理美点月明其种声全工己话儿者向情部正名定女问力机给等几很业最间新什打便位因重被走电四第门相次东政海口使教西再平真听世气信北少关并内加化由却代军产入先山五太水万市眼体别处总才场师书比住员九笑性通目华报立马命张活难神数件安表原车白应路期叫死常提感金何更反合放做系计或司利受光王果亲界及今京务制解各任至清物台象记边共风战干接它许八特觉望直服毛林题建南度统色字请交爱让认算论百吃义科怎元社术结六功指思非流每青管夫连远资队跟带花快条院变联言权往展该领传近留红治决周保达办运武半候七必城父强步完革深区即求品士转量空甚众技轻程告江语英基派满式李息写呢识极令黄德收脸钱党倒未持取设始版双历越史商千片容研像找友孩站广改议形委早房音火际则首单据导影失拿网香似斯专石若兵弟谁校读志飞观争究包组造落视济喜离虽坏兴术春秋诗词'
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤'
+PUBLISHERS = ['人民文学出版社', '商务印书馆', '中华书局', '三联书店', '机械工业出版社', '人民邮电出版社',
+              '电子工业出版社', '清华大学出版社', '上海译文出版社', '译林出版社', '北京大学出版社', '中信出版社']
+CLASSES = ['计划', '已读', '在读', '收藏', '借出']
+
+
+# ===================== 模拟数据 =====================
+def make_isbns(count, start=0):
+    """生成count个校验码正确的ISBN-13（978 7 + 8位序号 + 校验码）"""
+    body = 978700000000 + (np.arange(start, start + count, dtype=np.int64) % 10 ** 8)
+    digits = body[:, None] // 10 ** np.arange(11, -1, -1) % 10
+    check = (10 - digits @ np.tile([1, 3], 6) % 10) % 10
+    return (body * 10 + check).astype(str).tolist()
+
+
+def make_catalog(rows, seed=0):
+    """
+    生成模拟图书目录（列与BookList一致，所有字段为字符串，索引从1开始）
+
+    :param rows: 行数
+    :param seed: 随机种子（相同种子生成相同数据）
+    :return: DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    chars = np.array(list(CHARS))
+    # 书名：2~12个随机汉字（先生成定长字符矩阵，再按随机长度截取）
+    lengths = rng.integers(2, 13, rows)
+    matrix = chars[rng.integers(0, len(chars), (rows, 12))]
+    titles = [''.join(row[:length]) for row, length in zip(matrix.tolist(), lengths.tolist())]
+    surnames = np.array(list(SURNAMES))[rng.integers(0, len(SURNAMES), rows)]
+    given = chars[rng.integers(0, len(chars), (rows, 2))]
+    authors = [s + g[0] + g[1] for s, g in zip(surnames.tolist(), given.tolist())]
+    df = pd.DataFrame({
+        'ISBN': make_isbns(rows),
+        '书名': titles,
+        '作者': authors,
+        '出版': np.array(PUBLISHERS, dtype=object)[rng.integers(0, len(PUBLISHERS), rows)],
+        '价格': np.char.mod('%.2f', rng.uniform(10, 200, rows)).astype(object),
+        '评分': np.char.mod('%.1f', rng.uniform(2, 10, rows)).astype(object),
+        '人数': rng.integers(0, 200000, rows).astype(str).astype(object),
+        '分类': np.array(CLASSES, dtype=object)[rng.integers(0, len(CLASSES), rows)],
+        '书柜': np.char.add('书柜', rng.integers(1, 30, rows).astype(str)).astype(object),
+    }, columns=bcol, dtype=object)
+    df.index = df.index + 1
+    return df
+
+
+def book_dict(isbn):
+    """豆瓣ISBN接口的模拟返回（字段与v2接口一致，内容由ISBN确定）"""
+    rnd = random.Random(isbn)
+    return {
+        'title': f'书{isbn[-6:]}', 'author': [f'作者{rnd.randint(1, 999)}'], 'translator': [],
+        'publisher': rnd.choice(PUBLISHERS), 'price': f'{rnd.uniform(10, 200):.2f}元',
+        'rating': {'max': 10, 'numRaters': rnd.randint(0, 200000), 'average': f'{rnd.uniform(2, 10):.1f}', 'min': 0},
+        'images': {'small': f'http://127.0.0.1/cover/{isbn}.jpg'}, 'pubdate': '2020-1',
+        'alt': f'https://book.douban.com/subject/{isbn[-8:]}/', 'pages': str(rnd.randint(80, 900)),
+        'isbn13': isbn,
+    }
+
+
+def douban_row(api, isbn):
+    """豆瓣刷新写回表格的图书信息（DouBanApi.parse_isbn_book的结果）"""
+    return api.parse_isbn_book(isbn, book_dict(isbn))
+
+
+class StubDouban:
+    """
+    本地豆瓣桩服务器（ISBN接口，HTTP/1.1长连接），用法：with StubDouban() as url: ...
+    """
+    def __init__(self, latency=0.0):
+        """
+        :param latency: 每个请求的模拟延迟（秒）
+        """
+        delay = latency
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True  # 响应头与正文分两次发送，避免长连接上的延迟确认等待
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if delay:
+                    time.sleep(delay)
+                body = json.dumps(book_dict(self.path.rstrip('/').rsplit('/', 1)[-1])).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f'http://127.0.0.1:{self.server.server_port}/v2/book/isbn/'
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ===================== 测量 =====================
+def measure(func, setup=None, repeat=REPEAT):
+    """
+    测量一项操作
+
+    :param func: 被测函数 f(setup的返回值)
+    :param setup: 每次运行前的准备函数（不计入耗时，如复制一份数据），None表示无需准备
+    :param repeat: 计时运行次数
+    :return: {'seconds': 中位数, 'min': 最小值, 'runs': 各次耗时, 'peak_mb': Python内存分配峰值}
+    """
+    runs = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        gc.collect()
+        start = time.perf_counter()
+        func(state)
+        runs.append(time.perf_counter() - start)
+        del state
+    # 内存峰值单独测一次（numpy/pandas的数组内存也会登记到tracemalloc）
+    state = setup() if setup else None
+    gc.collect()
+    tracemalloc.start()
+    func(state)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': statistics.median(runs), 'min': min(runs), 'runs': runs, 'peak_mb': peak / 2 ** 20}
+
+
+def bench_data(df, rows, workdir, repeat):
+    """TableModel.data：首屏绘制（含按列生成显示缓存）与滚动绘制"""
+    role = Qt.ItemDataRole.DisplayRole
+    lines, columns = VIEWPORT
+    tops = np.random.default_rng(1).integers(0, max(rows - lines, 1), SCREENS).tolist()
+
+    def paint(model, top):
+        index = model.index
+        data = model.data
+        for row in range(top, min(top + lines, model.rowCount())):
+            for column in range(columns):
+                data(index(row, column), role)
+
+    def cold(model):
+        paint(model, 0)
+
+    def scroll(model):
+        for top in tops:
+            paint(model, top)
+
+    def warm_model():
+        model = TableModel(df)
+        paint(model, 0)
+        return model
+
+    yield 'data_first_screen', measure(cold, lambda: TableModel(df), repeat)
+    yield f'data_scroll_{SCREENS}_screens', measure(scroll, warm_model, repeat)
+
+
+def bench_search(df, rows, workdir, repeat):
+    """全文检索：首次检索（建立索引）与后续查询"""
+    def build(model):
+        model.search(QUERIES[0])
+
+    def query(model):
+        for text in QUERIES:
+            model.search(text)
+
+    def indexed():
+        model = TableModel(df)
+        model.search(QUERIES[0])
+        return model
+
+    yield 'search_build_index', measure(build, lambda: TableModel(df), repeat)
+    yield f'search_{len(QUERIES)}_queries', measure(query, indexed, repeat)
+
+
+def bench_update(df, rows, workdir, repeat):
+    """豆瓣刷新写回：单条updateItem、整批updateItems（已有行 + 新增行）"""
+    api = DouBanApi()
+    existing = [douban_row(api, isbn) for isbn in random.Random(2).sample(df['ISBN'].tolist(), min(UPDATE_BATCH, rows))]
+    fresh = [douban_row(api, isbn) for isbn in make_isbns(UPDATE_BATCH, start=rows)]
+
+    def single(model):
+        for row in existing:
+            model.updateItem(row)
+
+    def batch(model):
+        model.updateItems(existing + fresh)
+
+    def model():
+        return TableModel(df.copy())
+
+    yield f'update_item_x{len(existing)}', measure(single, model, repeat)
+    yield f'update_items_batch_{len(existing)}+{len(fresh)}', measure(batch, model, repeat)
+
+
+def bench_rank(df, rows, workdir, repeat):
+    """推荐度排序：全部排序与前100本"""
+    yield 'sort_recommend', measure(lambda model: model.sortByRecommend(), lambda: TableModel(df), repeat)
+    yield 'sort_recommend_top100', measure(lambda model: model.sortByRecommend(100), lambda: TableModel(df), repeat)
+
+
+def bench_store(df, rows, workdir, repeat):
+    """目录文件加载与保存（CSV整体写入、SQLite整体/增量写入）"""
+    store = BookStore()
+    csv = os.path.join(workdir, f'catalog_{rows}.csv')
+    db = os.path.join(workdir, f'catalog_{rows}.sqlite')
+    store.save(df, csv).result()
+    store.save(df, db).result()
+    api = DouBanApi()
+
+    def incremental():
+        model = TableModel(store.load(db), source=db)
+        model.updateItems([douban_row(api, isbn) for isbn in df['ISBN'].iloc[:UPDATE_BATCH]])
+        return model
+
+    yield 'load_csv', measure(lambda _: store.load(csv), None, repeat)
+    yield 'load_sqlite', measure(lambda _: store.load(db), None, repeat)
+    yield 'save_csv', measure(lambda _: store.save(df, csv).result(), None, repeat)
+    yield f'save_sqlite_incremental_{UPDATE_BATCH}', measure(
+        lambda model: store.save(model.dataexport(), db, model.journal).result(), incremental, repeat)
+    store.close()
+
+
+def bench_douban(df, rows, workdir, repeat):
+    """豆瓣数据解析（纯CPU）与批量查询（本地桩服务器，HTTP长连接 + 并发）"""
+    isbns = df['ISBN'].tolist()[:min(rows, RESOLVE_COUNT)]
+    dicts = [book_dict(isbn) for isbn in isbns]
+    api = DouBanApi()
+
+    def parse(_):
+        for isbn, data in zip(isbns, dicts):
+            api.parse_isbn_book(isbn, data)
+
+    yield f'douban_parse_x{len(isbns)}', measure(parse, None, repeat)
+    with StubDouban() as url:
+        api.url_isbn = url
+        # 限流放开，只测查询本身的开销
+        resolver = IsbnResolver(api, bucket=TokenBucket(1e9, 10 ** 9))
+        yield f'douban_resolve_x{len(isbns)}', measure(lambda _: resolver.resolve_all(isbns), None, repeat)
+
+
+BENCHES = {
+    'data': bench_data,
+    'search': bench_search,
+    'update': bench_update,
+    'rank': bench_rank,
+    'store': bench_store,
+    'douban': bench_douban,
+}
+
+
+def git_commit():
+    """当前代码版本（git提交号，不在git仓库中时为空）"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def run(sizes=SIZES, only=None, repeat=REPEAT, echo=print):
+    """
+    运行基准测试
+
+    :param sizes: 目录行数列表
+    :param only: 只运行的测试组（BENCHES的键），None为全部
+    :param repeat: 每项操作的计时次数
+    :param echo: 逐项输出进度的函数
+    :return: 结果字典（可直接保存为JSON）
+    """
+    app = QApplication.instance() or QApplication([])  # 模型信号需要Qt应用对象（offscreen）
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in sizes:
+            start = time.perf_counter()
+            df = make_catalog(rows)
+            echo(f'== {rows} 行（生成数据 {time.perf_counter() - start:.2f} 秒）')
+            for group, bench in BENCHES.items():
+                if only and group not in only:
+                    continue
+                for name, result in bench(df, rows, workdir, repeat):
+                    result.update(group=group, name=name, rows=rows)
+                    results.append(result)
+                    echo(f'{name:<36} {result["seconds"] * 1000:>10.2f} ms  '
+                         f'(最小 {result["min"] * 1000:.2f} ms，内存峰值 {result["peak_mb"]:.1f} MB)')
+            del df
+    return {
+        'meta': {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'pyqt': PYQT_VERSION_STR,
+            'repeat': repeat,
+            'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=THRESHOLD):
+    """
+    与上次结果对比
+
+    :param current: 本次结果
+    :param baseline: 上次结果
+    :param threshold: 耗时增加超过该比例视为变慢
+    :return: 变慢的项目 [(名称, 行数, 上次耗时, 本次耗时)]
+    """
+    before = {(item['name'], item['rows']): item['seconds'] for item in baseline['results']}
+    slower = []
+    for item in current['results']:
+        old = before.get((item['name'], item['rows']))
+        if old and item['seconds'] > old * (1 + threshold):
+            slower.append((item['name'], item['rows'], old, item['seconds']))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='图书目录性能基准测试')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help='目录行数，逗号分隔')
+    parser.add_argument('--only', default='', help=f'只运行的测试组，逗号分隔（{",".join(BENCHES)}）')
+    parser.add_argument('--repeat', type=int, default=REPEAT, help='每项操作的计时次数')
+    parser.add_argument('--json', default='', help='结果JSON文件（“-”输出到标准输出）')
+    parser.add_argument('--compare', default='', help='上次结果JSON文件，变慢时返回退出码1')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='耗时增加超过该比例视为变慢')
+    args = parser.parse_args(argv)
+
+    echo = (lambda text: print(text, file=sys.stderr)) if args.json == '-' else print
+    result = run([int(size) for size in args.sizes.split(',') if size],
+                 [name for name in args.only.split(',') if name] or None, args.repeat, echo)
+    if args.json == '-':
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=1)
+    elif args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=1)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            slower = compare(result, json.load(f), args.threshold)
+        for name, rows, old, new in slower:
+            echo(f'变慢：{name}（{rows} 行）{old * 1000:.2f} ms → {new * 1000:.2f} ms')
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
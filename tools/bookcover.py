@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+图书封面获取与缓存
+功能：
+    1. 磁盘缓存按内容寻址：图片按SHA-1保存（相同封面如豆瓣默认封面只存一份），URL → 摘要记录在SQLite中
+    2. 内存LRU缓存解码后的QPixmap，看过的封面再次打开无需读盘/解码
+    3. 线程池并发下载（同一URL同时只下载一次），下载与QImage解码在后台线程完成，不阻塞界面
+    4. 预取：提前下载表格可见行/相邻图书的封面
+依赖：
+    - PyQt6: 图片解码与显示（QImage可在后台线程使用，QPixmap只在主线程创建）
+    - sqlite3: URL → 摘要索引（Python标准库）
+"""
+import os
+import hashlib
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+
+LOG = logging.getLogger(__name__)
+
+COVER_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'booklist', 'covers')  # 默认封面缓存目录
+MEMORY_SIZE = 256   # 内存中缓存的QPixmap数
+COVER_WORKERS = 4   # 并发下载数
+
+
+class CoverStore:
+    """
+    封面磁盘缓存（内容寻址，线程安全）
+    图片保存为 目录/摘要前2位/摘要，SQLite记录 URL → 摘要
+    """
+    def __init__(self, cache_dir: str = COVER_DIR):
+        """
+        :param cache_dir: 缓存目录
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'covers.sqlite'), check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS covers (url TEXT PRIMARY KEY, digest TEXT)')
+        self.conn.commit()
+
+    def close(self):
+        """关闭缓存"""
+        self.conn.close()
+
+    def _path(self, digest: str) -> str:
+        """摘要 → 图片文件路径"""
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    def get(self, url: str):
+        """
+        读取缓存的封面
+
+        :param url: 封面URL
+        :return: 图片数据，未缓存时返回None
+        """
+        with self.lock:
+            row = self.conn.execute('SELECT digest FROM covers WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._path(row[0]), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, url: str, data: bytes) -> str:
+        """
+        保存封面（内容已存在时只记录URL）
+
+        :param url: 封面URL
+        :param data: 图片数据
+        :return: 内容摘要
+        """
+        digest = hashlib.sha1(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 先写临时文件再原子替换，并发写同一内容或中途退出都不会留下残缺文件
+            tmp = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO covers VALUES (?, ?)', (url, digest))
+            self.conn.commit()
+        return digest
+
+
+class CoverFetcher(QObject):
+    """
+    封面服务：内存LRU（QPixmap） → 磁盘缓存 → 后台下载
+    pixmap() 立即返回已缓存的封面；未缓存时调用 request()，下载完成后发出 cover_ready 信号
+    """
+    # 封面就绪（主线程）：(URL, QPixmap)
+    cover_ready = pyqtSignal(str, QPixmap)
+    # 后台线程 → 主线程：(URL, 解码后的QImage)
+    _image_ready = pyqtSignal(str, QImage)
+
+    def __init__(self, api, store: CoverStore = None, memory_size: int = MEMORY_SIZE,
+                 workers: int = COVER_WORKERS, parent=None):
+        """
+        :param api: DouBanApi实例（用于下载图片，复用其会话）
+        :param store: 磁盘缓存，默认使用COVER_DIR
+        :param memory_size: 内存中缓存的QPixmap数
+        :param workers: 并发下载数
+        :param parent: 父对象
+        """
+        super().__init__(parent)
+        self.api = api
+        self.store = store or CoverStore()
+        self.memory_size = memory_size
+        self.memory = OrderedDict()  # {URL: QPixmap}，只在主线程访问
+        self.pending = set()         # 正在后台获取的URL，只在主线程访问
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._image_ready.connect(self._remember)
+
+    def close(self):
+        """关闭服务（未开始的下载取消）"""
+        self.executor.shutdown(cancel_futures=True)
+
+    def pixmap(self, url: str):
+        """
+        获取已缓存的封面（主线程）：先查内存，再查磁盘
+
+        :param url: 封面URL
+        :return: QPixmap，未缓存时返回None
+        """
+        if not url:
+            return None
+        pixmap = self.memory.get(url)
+        if pixmap is not None:
+            self.memory.move_to_end(url)
+            return pixmap
+        data = self.store.get(url)
+        if data is None:
+            return None
+        image = QImage.fromData(data)
+        if image.isNull():
+            return None
+        return self._add(url, QPixmap.fromImage(image))
+
+    def request(self, url: str):
+        """
+        后台获取封面（已缓存或正在获取时不重复获取），完成后发出 cover_ready
+
+        :param url: 封面URL
+        """
+        if not url or url in self.memory or url in self.pending:
+            return
+        self.pending.add(url)
+        self.executor.submit(self._fetch, url)
+
+    def prefetch(self, urls):
+        """
+        预取一批封面（如表格可见行），只获取内存中没有的
+
+        :param urls: 封面URL列表
+        """
+        for url in urls:
+            self.request(url)
+
+    def _fetch(self, url: str):
+        """后台线程：读磁盘缓存或下载，解码为QImage后交回主线程"""
+        image = QImage()
+        try:
+            data = self.store.get(url)
+            if data is None:
+                data = self.api.get_img_by_url(url)
+                if data:
+                    self.store.put(url, data)
+            if data:
+                image = QImage.fromData(data)
+        except Exception as e:
+            LOG.warning(f"获取封面失败 {url}：{e}")
+        self._image_ready.emit(url, image)
+
+    def _remember(self, url: str, image: QImage):
+        """主线程：把后台解码的图片转为QPixmap放入内存缓存，发出 cover_ready"""
+        self.pending.discard(url)
+        if image.isNull():
+            return
+        self.cover_ready.emit(url, self._add(url, QPixmap.fromImage(image)))
+
+    def _add(self, url: str, pixmap: QPixmap) -> QPixmap:
+        """放入内存LRU缓存"""
+        self.memory[url] = pixmap
+        self.memory.move_to_end(url)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+        return pixmap
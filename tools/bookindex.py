@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+图书目录全文检索索引
+功能：
+    1. 按字段建立n-gram（单字 + 双字）倒排索引，适合不分词的中文检索
+    2. 子串匹配（与原 str.contains 一致）、前缀匹配（词尾加*）、模糊匹配（词尾加~）
+    3. 限定字段检索（如 作者:鲁迅、isbn:9787），多个词之间为“与”关系
+    4. 返回匹配的行号（升序的numpy数组），由表格模型按行号显示，不复制数据
+    5. 修改/新增的行记为“脏行”直接逐行匹配，脏行过多时自动重建索引
+依赖：
+    - numpy: 倒排列表的存储与求交
+"""
+import unicodedata
+
+import numpy as np
+
+# 默认索引字段（表格列名）
+FIELDS = ('ISBN', '书名', '作者', '出版', '分类')
+# 限定字段检索时可用的字段别名
+FIELD_ALIASES = {
+    'isbn': 'ISBN',
+    'title': '书名', 'name': '书名', '书名': '书名',
+    'author': '作者', '作者': '作者',
+    'publisher': '出版', 'pub': '出版', '出版': '出版', '出版社': '出版',
+    'class': '分类', '分类': '分类',
+}
+FUZZY_RATIO = 0.6     # 模糊匹配：字段中至少包含查询词60%的n-gram
+REBUILD_RATIO = 0.05  # 脏行超过总行数的5%时重建索引
+EMPTY = np.empty(0, dtype=np.int64)
+SPACES = np.array([ord(ch) for ch in ' \t\r\x0b\x0c\u3000'], dtype=np.int64)  # 不参与n-gram的空白字符
+
+
+def normalize(value):
+    """
+    检索文本规范化：全角转半角（NFKC）、转小写；空值返回空字符串
+
+    :param value: 单元格值
+    :return: 规范化后的文本
+    """
+    if value is None or value != value:  # None / NaN
+        return ''
+    return unicodedata.normalize('NFKC', str(value)).lower()
+
+
+def gram_key(gram):
+    """n-gram → 整数键：单字为码位，双字为 (首字码位+1)<<21 | 次字码位（与单字互不重叠）"""
+    if len(gram) == 1:
+        return ord(gram)
+    return ((ord(gram[0]) + 1) << 21) | ord(gram[1])
+
+
+def query_grams(term):
+    """查询词用于求交的n-gram：单字词用单字，否则用全部双字"""
+    if len(term) == 1:
+        return [term]
+    return list({term[i:i + 2] for i in range(len(term) - 1)})
+
+
+class BookIndex:
+    """
+    图书目录倒排索引
+    行号为表格模型中数据的位置序号；索引建立后行被修改或追加时，调用update登记
+    """
+    def __init__(self, fields=FIELDS):
+        """
+        :param fields: 建立索引的字段（表格列名）
+        """
+        self.fields = tuple(fields)
+        self.texts = {field: [] for field in self.fields}     # 字段 → 各行规范化文本
+        self.postings = {field: (EMPTY, np.zeros(1, dtype=np.int64), EMPTY)
+                         for field in self.fields}  # 字段 → (n-gram键, 起始位置, 行号)
+        self.dirty = set()  # 建立索引后被修改/追加的行号
+        self.size = 0       # 当前总行数
+
+    def build(self, columns):
+        """
+        建立索引：每个字段的文本拼接后整体规范化，用numpy一次性生成所有(n-gram, 行号)并排序，
+        倒排列表按n-gram键连续存放（键数组 + 起始位置 + 行号数组）
+
+        :param columns: {字段: 该列所有行的值（列表）}，缺少的字段按空值处理
+        """
+        self.size = max((len(values) for values in columns.values()), default=0)
+        for field in self.fields:
+            values = columns.get(field) or [''] * self.size
+            # 以换行分隔各行（值内的换行替换为空格），整列一次规范化
+            joined = '\n'.join('' if value is None or value != value else str(value).replace('\n', ' ')
+                                for value in values)
+            joined = unicodedata.normalize('NFKC', joined).lower()
+            self.texts[field] = joined.split('\n')
+            self.postings[field] = self._postings(joined)
+        self.dirty = set()
+
+    def _postings(self, joined):
+        """由拼接文本生成倒排列表 (n-gram键数组, 起始位置数组, 行号数组)"""
+        codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+        newline = codes == ord('\n')
+        rows = np.cumsum(newline) - newline  # 每个字符所在的行号
+        valid = ~(newline | np.isin(codes, SPACES))
+        unigram = codes[valid]
+        unirows = rows[valid]
+        pair = valid[:-1] & valid[1:]
+        bigram = ((codes[:-1][pair] + 1) << 21) | codes[1:][pair]
+        birows = rows[:-1][pair]
+
+        # 键×行数+行号 去重排序后，同一n-gram的行号连续且升序
+        # （排序后相邻去重，比np.unique的哈希去重快得多）
+        size = max(self.size, 1)
+        combined = np.concatenate([unigram, bigram]) * size + np.concatenate([unirows, birows])
+        if not len(combined):
+            # 空目录或整列为空：没有任何n-gram
+            return EMPTY, np.zeros(1, dtype=np.int64), EMPTY
+        combined.sort()
+        combined = combined[np.append(True, combined[1:] != combined[:-1])]
+        keys = combined // size
+        starts = np.flatnonzero(np.append(True, keys[1:] != keys[:-1]))
+        return keys[starts], np.append(starts, len(combined)), combined % size
+
+    def _lookup(self, field, gram):
+        """查询单个n-gram的行号数组（升序）"""
+        keys, starts, rows = self.postings[field]
+        key = gram_key(gram)
+        i = np.searchsorted(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return rows[starts[i]:starts[i + 1]]
+        return EMPTY
+
+    def update(self, row, record):
+        """
+        登记被修改或追加的行（不立即更新倒排列表，检索时逐行匹配）
+
+        :param row: 行号（等于当前总行数时为追加）
+        :param record: {字段: 值}，只需包含发生变化的字段
+        """
+        if row >= self.size:
+            for field in self.fields:
+                self.texts[field].extend([''] * (row + 1 - self.size))
+            self.size = row + 1
+        for field, value in record.items():
+            if field in self.texts:
+                self.texts[field][row] = normalize(value)
+        self.dirty.add(row)
+
+    @property
+    def stale(self):
+        """脏行过多，应重建索引"""
+        return len(self.dirty) > max(self.size * REBUILD_RATIO, 256)
+
+    def parse(self, query):
+        """
+        解析查询语句
+
+        :param query: 查询语句，空白分隔多个词；“字段:词”限定字段，词尾“*”为前缀匹配，词尾“~”为模糊匹配
+        :return: [(字段元组, 词, 匹配方式)]，匹配方式为 contains/prefix/fuzzy
+        """
+        terms = []
+        for token in query.split():
+            fields = self.fields
+            if ':' in token or '：' in token:
+                name, _, rest = token.replace('：', ':').partition(':')
+                field = FIELD_ALIASES.get(name.lower())
+                if field in self.fields and rest:
+                    fields, token = (field,), rest
+            mode = 'contains'
+            if token.endswith('*'):
+                mode, token = 'prefix', token.rstrip('*')
+            elif token.endswith('~'):
+                mode, token = 'fuzzy', token.rstrip('~')
+            token = normalize(token)
+            if token:
+                terms.append((fields, token, mode))
+        return terms
+
+    def search(self, query):
+        """
+        检索
+
+        :param query: 查询语句（语法见parse）
+        :return: 匹配的行号（升序numpy数组）；查询为空时返回None（表示全部行）
+        """
+        terms = self.parse(query)
+        if not terms:
+            return None
+        result = np.ones(self.size, dtype=bool)
+        for fields, term, mode in terms:
+            # 同一个词在多个字段中为“或”，多个词之间为“与”
+            matched = np.zeros(self.size, dtype=bool)
+            for field in fields:
+                matched[self._match(field, term, mode)] = True
+            result &= matched
+        return np.flatnonzero(result)
+
+    def _match(self, field, term, mode):
+        """在单个字段中匹配单个词，返回升序行号数组"""
+        texts = self.texts[field]
+        grams = query_grams(term)
+
+        if mode == 'fuzzy':
+            # 统计每行包含的查询n-gram个数，达到比例即为匹配
+            need = max(1, int(np.ceil(len(grams) * FUZZY_RATIO)))
+            lists = [self._lookup(field, gram) for gram in grams]
+            counts = np.bincount(np.concatenate(lists), minlength=self.size)
+            rows = np.flatnonzero(counts >= need)
+            check = lambda text: sum(gram in text for gram in grams) >= need
+        else:
+            # 子串/前缀匹配：所有n-gram的倒排列表求交得到候选行，再按原文校验
+            lists = sorted((self._lookup(field, gram) for gram in grams), key=len)
+            rows = lists[0]
+            for other in lists[1:]:
+                if not len(rows):
+                    break
+                rows = np.intersect1d(rows, other, assume_unique=True)
+            if mode == 'prefix':
+                check = lambda text: text.startswith(term)
+            else:
+                check = lambda text: term in text
+            # 单字/双字词的倒排列表本身就是精确结果，更长的词需要校验（n-gram可能不相邻）
+            if len(rows) and (mode == 'prefix' or len(term) > 2):
+                rows = rows[np.fromiter((check(texts[row]) for row in rows), dtype=bool, count=len(rows))]
+
+        if self.dirty:
+            # 脏行的倒排列表已过期：剔除后按当前文本逐行匹配
+            dirty = np.array(sorted(self.dirty), dtype=np.int64)
+            rows = rows[~np.isin(rows, dirty)]
+            hits = dirty[np.fromiter((check(texts[row]) for row in dirty), dtype=bool, count=len(dirty))]
+            rows = np.union1d(rows, hits)
+        return rows
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+图书目录合并导入
+功能：
+    1. 合并多个图书目录文件（CSV / Parquet / SQLite，各分馆的书目），按块流式读取，不把所有文件同时读入内存
+    2. ISBN规范化：去掉连字符/空格，ISBN-10转换为ISBN-13（978前缀，重新计算校验码）
+    3. 按ISBN去重：哈希索引（ISBN-13 → 输出行号，ISBN-13以整数保存），无效ISBN按原值去重
+    4. 重复记录按冲突策略合并：先出现优先 / 后出现优先 / 评价人数多者优先，空字段用另一条记录补充
+    5. 合并结果写入SQLite（与BookStore的格式一致，可直接加载、增量保存），也可导出为CSV/Parquet
+    6. 生成合并报告：各文件读取/新增/重复行数、ISBN转换与无效数、字段冲突样例
+依赖：
+    - pandas / numpy: 分块读取、ISBN批量校验
+    - sqlite3: 合并结果的存储（Python标准库）
+"""
+import os
+import sys
+import time
+import sqlite3
+import logging
+
+import numpy as np
+import pandas as pd
+
+from bookstore import TABLE, _quote, file_format
+
+LOG = logging.getLogger(__name__)
+
+CHUNK_ROWS = 50000      # 每次读取的行数
+CONFLICT_SAMPLES = 20   # 合并报告中保留的字段冲突样例数
+SQLITE_VARS = 900       # 单条SQL的参数个数上限（SQLite默认999）
+# 冲突策略：重复ISBN的记录如何合并（空字段总是用另一条记录补充）
+POLICIES = {
+    'first': '先出现的记录优先',
+    'last': '后出现的记录优先',
+    'rating': '评价人数多的记录优先（豆瓣数据较新）',
+}
+
+
+def normalize_isbns(values):
+    """
+    批量ISBN规范化为ISBN-13（向量化校验与转换）
+    去掉空白/连字符/“ISBN”前缀；ISBN-10校验后加978前缀并重新计算校验码；ISBN-13须为978/979开头且校验码正确
+
+    :param values: ISBN列表/Series
+    :return: (ISBN-13字符串数组（无效为空字符串）, ISBN-13整数数组（无效为-1）)
+    """
+    codes = pd.Series(values, dtype=object).fillna('').astype(str).str.upper()
+    codes = codes.str.replace(r'[\s-]', '', regex=True).str.replace(r'^ISBN[:：]?', '', regex=True)
+    lengths = codes.str.len().to_numpy()
+    numbers = np.full(len(codes), -1, dtype=np.int64)
+    for length in (10, 13):
+        mask = lengths == length
+        if not mask.any():
+            continue
+        # 定长字符串拼接后一次转为数字矩阵（非ASCII字符替换为“?”，保持每个字符一位）
+        digits = np.frombuffer(''.join(codes[mask].tolist()).encode('ascii', 'replace'),
+                               dtype=np.uint8).reshape(-1, length).astype(np.int64) - ord('0')
+        if length == 10:
+            last = np.where(digits[:, 9] == ord('X') - ord('0'), 10, digits[:, 9])
+            valid = ((digits[:, :9] >= 0) & (digits[:, :9] <= 9)).all(axis=1) & (last >= 0) & (last <= 10)
+            valid &= (digits[:, :9] @ np.arange(10, 1, -1) + last) % 11 == 0
+            body = 978 * 10 ** 9 + digits[:, :9] @ 10 ** np.arange(8, -1, -1)
+        else:
+            valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+            body = digits[:, :12] @ 10 ** np.arange(11, -1, -1)
+            valid &= (body // 10 ** 9 == 978) | (body // 10 ** 9 == 979)
+        # ISBN-13校验码：前12位按1、3交替加权
+        weights = np.tile([1, 3], 6)
+        check = (10 - (body[:, None] // 10 ** np.arange(11, -1, -1) % 10) @ weights % 10) % 10
+        if length == 13:
+            valid &= check == digits[:, 12]
+        numbers[np.flatnonzero(mask)[valid]] = (body * 10 + check)[valid]
+    isbns = numbers.astype(str).astype(object)
+    isbns[numbers < 0] = ''
+    return isbns, numbers
+
+
+def isbn13(code):
+    """
+    ISBN规范化为ISBN-13
+
+    :param code: ISBN（可含连字符/空格/“ISBN”前缀，ISBN-10的校验码可为X）
+    :return: ISBN-13字符串；不是有效的ISBN-10/ISBN-13时返回空字符串
+    """
+    return normalize_isbns([code])[0][0]
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """
+    分块读取图书目录（所有字段为字符串，空值为空字符串）
+
+    :param path: 文件路径（按扩展名判断格式）
+    :param chunk_rows: 每块行数
+    :return: 生成器，逐块产出DataFrame
+    """
+    fmt = file_format(path)
+    if fmt == 'csv':
+        with pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows) as reader:
+            yield from reader
+    elif fmt == 'sqlite':
+        conn = sqlite3.connect(path)
+        try:
+            for chunk in pd.read_sql_query(f'SELECT * FROM {TABLE} ORDER BY id', conn, chunksize=chunk_rows):
+                yield chunk.drop(columns='id').astype(object).fillna('')
+        finally:
+            conn.close()
+    else:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            # 没有pyarrow时只能整体读取
+            df = pd.read_parquet(path).astype(object).fillna('')
+            for start in range(0, len(df), chunk_rows):
+                yield df.iloc[start:start + chunk_rows]
+            return
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas().astype(object).fillna('')
+
+
+class MergeReport:
+    """
+    合并报告
+    """
+    def __init__(self, policy):
+        self.policy = policy
+        self.files = []       # 各文件：[文件, 读取行数, 新增行数, 重复行数]
+        self.rows = 0         # 读取的总行数
+        self.added = 0        # 合并后的记录数
+        self.duplicates = 0   # 重复ISBN的行数（已合并到已有记录）
+        self.updated = 0      # 重复行中修改/补充了已有记录的行数
+        self.conflicts = 0    # 重复行中存在字段冲突（两条记录同一字段都有值且不同）的行数
+        self.normalized = 0   # ISBN被规范化的行数（ISBN-10转换为ISBN-13、去掉连字符等）
+        self.invalid = 0      # ISBN无效的行数（保留原值，按原值去重）
+        self.skipped = 0      # ISBN为空被跳过的行数
+        self.samples = []     # 字段冲突样例：[(ISBN, 字段, 保留值, 舍弃值)]
+        self.elapsed = 0.0    # 耗时（秒）
+
+    def summary(self):
+        """合并报告文本（用于日志/提示框）"""
+        lines = [f"冲突策略：{POLICIES.get(self.policy, self.policy)}",
+                 f"读取 {self.rows} 行，合并为 {self.added} 条记录，耗时 {self.elapsed:.1f} 秒",
+                 f"重复 {self.duplicates} 行（补充/修改已有记录 {self.updated} 行，字段冲突 {self.conflicts} 行）",
+                 f"ISBN规范化 {self.normalized} 行，无效ISBN {self.invalid} 行，空ISBN跳过 {self.skipped} 行"]
+        for path, rows, added, duplicates in self.files:
+            lines.append(f"  {os.path.basename(path)}：读取 {rows}，新增 {added}，重复 {duplicates}")
+        if self.samples:
+            lines.append("字段冲突样例（ISBN 字段：保留值 / 舍弃值）：")
+            lines.extend(f"  {isbn} {field}：{kept} / {dropped}" for isbn, field, kept, dropped in self.samples)
+        return '\n'.join(lines)
+
+
+class CatalogMerger:
+    """
+    图书目录合并（流式）
+    合并结果逐块写入SQLite临时文件，只在内存中保存ISBN哈希索引；
+    重复记录所在的已有行按需从SQLite读回合并
+    """
+    def __init__(self, columns=None, policy='first', chunk_rows=CHUNK_ROWS):
+        """
+        :param columns: 输出列（第一列为ISBN），默认取第一个文件的列
+        :param policy: 冲突策略，POLICIES中的名称，或函数 f(已有记录, 新记录, 列名列表) → 合并后的记录
+        :param chunk_rows: 每次读取的行数
+        """
+        if not callable(policy) and policy not in POLICIES:
+            raise ValueError(f"未知的冲突策略：{policy}，可选 {list(POLICIES)}")
+        self.fixed = list(columns) if columns is not None else None
+        self.columns = self.fixed  # 本次合并的输出列
+        self.policy = policy
+        self.chunk_rows = chunk_rows
+        self.index = {}   # ISBN哈希索引：{ISBN-13整数 或 无效ISBN原值: 输出行号}
+        self.conn = None
+        self.report = None
+
+    def merge(self, paths, output, progress=None, stop=None):
+        """
+        合并图书目录
+
+        :param paths: 输入文件路径列表（按顺序合并，“先出现”即排在前面的文件）
+        :param output: 输出文件路径（.sqlite直接写入；其他格式先合并到临时SQLite再导出）
+        :param progress: 进度回调 f(文件序号, 文件数, 已读取总行数)
+        :param stop: threading.Event，置位后中止合并（不生成输出文件）
+        :return: MergeReport
+        """
+        start = time.perf_counter()
+        self.report = MergeReport(self.policy if not callable(self.policy) else getattr(
+            self.policy, '__name__', 'custom'))
+        self.index = {}
+        self.columns = None
+        sqlite = file_format(output) == 'sqlite'
+        database = output + ('.tmp' if sqlite else '.merge.sqlite')
+        if os.path.exists(database):
+            os.remove(database)
+        try:
+            self.conn = sqlite3.connect(database)
+            # 临时文件失败即丢弃，无需日志和同步写盘
+            self.conn.execute('PRAGMA journal_mode=OFF')
+            self.conn.execute('PRAGMA synchronous=OFF')
+            try:
+                for number, path in enumerate(paths, 1):
+                    stats = [path, 0, 0, 0]
+                    self.report.files.append(stats)
+                    for chunk in iter_chunks(path, self.chunk_rows):
+                        if stop is not None and stop.is_set():
+                            raise InterruptedError("合并已取消")
+                        self._merge_chunk(chunk, stats)
+                        if progress is not None:
+                            progress(number, len(paths), self.report.rows)
+                if self.columns is None:
+                    self._create(self.fixed or [])
+            finally:
+                self.conn.close()
+            if sqlite:
+                os.replace(database, output)
+            else:
+                self._export(database, output)
+        finally:
+            # 成功时临时SQLite已替换为输出文件或导出完毕；失败时不留下残缺文件
+            if os.path.exists(database):
+                os.remove(database)
+        self.report.elapsed = time.perf_counter() - start
+        LOG.info(f"合并 {len(paths)} 个文件 → {output}\n{self.report.summary()}")
+        return self.report
+
+    def _create(self, columns):
+        """建立输出表（未指定输出列时取第一个文件的列）"""
+        self.columns = self.fixed or [str(column) for column in columns]
+        definitions = ', '.join(f'{_quote(column)} TEXT' for column in self.columns)
+        self.conn.execute(f'CREATE TABLE {TABLE} (id INTEGER PRIMARY KEY, {definitions})')
+
+    def _merge_chunk(self, chunk, stats):
+        """合并一块数据：新ISBN批量追加，重复ISBN按冲突策略合并到已有行"""
+        if self.columns is None:
+            self._create(chunk.columns)
+        report = self.report
+        rows = chunk.reindex(columns=self.columns, fill_value='').fillna('').astype(str)
+        report.rows += len(rows)
+        stats[1] += len(rows)
+
+        # ISBN规范化：哈希键为ISBN-13整数（无效ISBN为原值），空ISBN跳过
+        raws = rows.iloc[:, 0].str.strip()
+        isbns, numbers = normalize_isbns(raws)
+        raws = raws.to_numpy(dtype=object)
+        empty = raws == ''
+        report.normalized += int(((numbers >= 0) & (isbns != raws)).sum())
+        report.invalid += int(((numbers < 0) & ~empty).sum())
+        report.skipped += int(empty.sum())
+        isbns[numbers < 0] = raws[numbers < 0]
+        keys = [number if number >= 0 else raw or None for number, raw in zip(numbers.tolist(), raws.tolist())]
+        # 按列取出后组装为行元组（比逐行itertuples快得多），ISBN列替换为规范化后的值
+        records = zip(isbns.tolist(), *(rows.iloc[:, column].tolist() for column in range(1, rows.shape[1])))
+
+        loaded = self._fetch(keys)  # 本块中重复ISBN对应的已有行
+        pending = {}  # 本块涉及的行：{输出行号: 记录}（新增行与被修改的已有行）
+        for key, row in zip(keys, records):
+            if key is None:
+                continue
+            position = self.index.get(key)
+            if position is None:
+                position = self.index[key] = len(self.index) + 1
+                pending[position] = row
+                stats[2] += 1
+                continue
+            stats[3] += 1
+            report.duplicates += 1
+            current = pending.get(position) or loaded[position]
+            merged = self._resolve(current, row)
+            if merged != current:
+                report.updated += 1
+                pending[position] = merged
+
+        report.added = len(self.index)
+        if pending:
+            columns = ', '.join(['id'] + [_quote(column) for column in self.columns])
+            marks = ', '.join('?' * (len(self.columns) + 1))
+            with self.conn:
+                self.conn.executemany(f'INSERT OR REPLACE INTO {TABLE} ({columns}) VALUES ({marks})',
+                                      ((position, *row) for position, row in sorted(pending.items())))
+
+    def _fetch(self, keys):
+        """读回本块中重复ISBN对应的已有行：{输出行号: 记录}"""
+        positions = sorted({self.index[key] for key in keys if key in self.index})
+        loaded = {}
+        for start in range(0, len(positions), SQLITE_VARS):
+            batch = positions[start:start + SQLITE_VARS]
+            marks = ', '.join('?' * len(batch))
+            for position, *row in self.conn.execute(
+                    f'SELECT * FROM {TABLE} WHERE id IN ({marks})', batch):
+                loaded[position] = tuple('' if value is None else value for value in row)
+        return loaded
+
+    def _resolve(self, current, new):
+        """按冲突策略合并两条记录，并统计字段冲突"""
+        if callable(self.policy):
+            merged = tuple(self.policy(current, new, self.columns))
+        else:
+            prefer_new = self.policy == 'last'
+            if self.policy == 'rating' and '人数' in self.columns:
+                column = self.columns.index('人数')
+                prefer_new = _number(new[column]) > _number(current[column])
+            primary, secondary = (new, current) if prefer_new else (current, new)
+            # 优先记录的空字段用另一条记录补充
+            merged = tuple(a if a != '' else b for a, b in zip(primary, secondary))
+        if any(a and b and a != b for a, b in zip(current, new)):
+            self.report.conflicts += 1
+            if len(self.report.samples) < CONFLICT_SAMPLES:
+                self.report.samples.extend((merged[0], column, kept, b if kept == a else a)
+                                           for column, a, b, kept in zip(self.columns, current, new, merged)
+                                           if a and b and a != b)
+        return merged
+
+    def _export(self, database, output):
+        """合并结果从临时SQLite导出为CSV/Parquet（CSV分块写入；Parquet需整体写入）"""
+        tmp = output + '.tmp'
+        conn = sqlite3.connect(database)
+        try:
+            query = f'SELECT * FROM {TABLE} ORDER BY id'
+            if file_format(output) == 'parquet':
+                pd.read_sql_query(query, conn, index_col='id').fillna('').astype(str).to_parquet(tmp, index=False)
+            else:
+                header = True
+                with open(tmp, 'w', encoding='utf-8', newline='') as f:
+                    for chunk in pd.read_sql_query(query, conn, index_col='id', chunksize=self.chunk_rows):
+                        chunk.fillna('').to_csv(f, index=False, header=header)
+                        header = False
+            os.replace(tmp, output)
+        finally:
+            conn.close()
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def _number(value):
+    """字段值 → 数值（非数字为0）"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def merge_catalogs(paths, output, policy='first', columns=None, chunk_rows=CHUNK_ROWS, progress=None, stop=None):
+    """
+    合并多个图书目录文件（见CatalogMerger）
+
+    :param paths: 输入文件路径列表
+    :param output: 输出文件路径
+    :param policy: 冲突策略
+    :param columns: 输出列，默认取第一个文件的列
+    :param chunk_rows: 每次读取的行数
+    :param progress: 进度回调 f(文件序号, 文件数, 已读取总行数)
+    :param stop: threading.Event，置位后中止合并
+    :return: MergeReport
+    """
+    return CatalogMerger(columns, policy, chunk_rows).merge(paths, output, progress, stop)
+
+
+if __name__ == "__main__":
+    # 命令行：python bookmerge.py [--policy=first|last|rating] 输出文件 输入文件 ...
+    args = sys.argv[1:]
+    policy = 'first'
+    if args and args[0].startswith('--policy='):
+        policy = args.pop(0).split('=', 1)[1]
+    print(merge_catalogs(args[1:], args[0], policy).summary())
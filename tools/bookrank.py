@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+图书推荐度计算与排序
+功能：
+    1. 推荐度公式统一在此定义：(平均分 - 2.5) × ln(评价人数 + 1)，平均分低于2.5或数据无效时为0
+    2. 向量化计算整个书架的推荐度（评分/人数列一次性转换为数值数组，不逐行计算）
+    3. 可选贝叶斯平均：评价人数少的图书平均分向先验均值收缩，避免少数高分评价排在前面
+    4. 按推荐度排序 / 取前N本（argpartition），行被修改/追加时只更新对应位置
+依赖：
+    - numpy / pandas: 数值转换与排序
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+RECOMMEND_BASE = 2.5  # 基础分：平均分低于该值的图书推荐度为0
+PRIOR_WEIGHT = 0      # 贝叶斯平均的先验权重（相当于多少个虚拟评价），0为不使用
+TOP_BOOKS = 100       # 右键菜单“推荐前N本”的数量
+
+
+def recommend(average, num_raters) -> float:
+    """
+    计算单本图书的推荐度
+
+    :param average: 豆瓣平均分（字符串/数字，空值或非数字按0处理）
+    :param num_raters: 评价人数（字符串/数字，空值或非数字按0处理）
+    :return: 推荐度（未取整）
+    """
+    try:
+        avg = float(average) if average else 0.0
+        num = float(num_raters) if num_raters else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+    if not avg >= RECOMMEND_BASE or not num >= 0 or math.isinf(num):
+        return 0.0
+    return (avg - RECOMMEND_BASE) * math.log(num + 1)
+
+
+def to_numbers(values) -> np.ndarray:
+    """评分/人数列 → float数组（空值、非数字、负数按0处理）"""
+    series = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    numbers = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, copy=True)
+    numbers[~(numbers >= 0) | np.isinf(numbers)] = 0.0
+    return numbers
+
+
+def recommend_scores(average, num_raters, prior_weight=PRIOR_WEIGHT, prior_mean=None) -> np.ndarray:
+    """
+    向量化计算推荐度
+
+    :param average: 平均分数组（已转换为数值，见to_numbers）
+    :param num_raters: 评价人数数组
+    :param prior_weight: 贝叶斯平均的先验权重，0时与recommend完全一致
+    :param prior_mean: 先验均值，默认为所有有评价图书的加权平均分
+    :return: 推荐度数组
+    """
+    average = np.asarray(average, dtype=float)
+    num_raters = np.asarray(num_raters, dtype=float)
+    if prior_weight > 0:
+        if prior_mean is None:
+            total = num_raters.sum()
+            prior_mean = (average * num_raters).sum() / total if total > 0 else RECOMMEND_BASE
+        # 贝叶斯平均：(C × m + n × 平均分) / (C + n)
+        average = (prior_weight * prior_mean + num_raters * average) / (prior_weight + num_raters)
+    scores = (average - RECOMMEND_BASE) * np.log1p(num_raters)
+    scores[average < RECOMMEND_BASE] = 0.0
+    return scores
+
+
+class BookRanker:
+    """
+    书架推荐度排序
+    保存每行（表格模型中数据的位置序号）的平均分/评价人数，推荐度与排序结果在数据变化后按需重新计算
+    """
+    def __init__(self, average=(), num_raters=(), prior_weight=PRIOR_WEIGHT, prior_mean=None):
+        """
+        :param average: 各行的平均分（原始值）
+        :param num_raters: 各行的评价人数（原始值）
+        :param prior_weight: 贝叶斯平均的先验权重，0为不使用
+        :param prior_mean: 先验均值，默认为书架加权平均分
+        """
+        self.average = to_numbers(average)
+        self.num_raters = to_numbers(num_raters)
+        self.prior_weight = prior_weight
+        self.prior_mean = prior_mean
+        self._scores = None  # 推荐度缓存（数据变化后失效）
+        self._order = None   # 全部行的排序结果缓存
+
+    def __len__(self):
+        return len(self.average)
+
+    def update(self, positions, average, num_raters):
+        """
+        登记被修改或追加的行（超出当前行数时自动扩展）
+
+        :param positions: 行号列表
+        :param average: 对应的平均分（原始值）
+        :param num_raters: 对应的评价人数（原始值）
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        if not len(positions):
+            return
+        size = int(positions.max()) + 1
+        if size > len(self):
+            self.average = np.concatenate([self.average, np.zeros(size - len(self))])
+            self.num_raters = np.concatenate([self.num_raters, np.zeros(size - len(self.num_raters))])
+        self.average[positions] = to_numbers(average)
+        self.num_raters[positions] = to_numbers(num_raters)
+        self._scores = None
+        self._order = None
+
+    def scores(self) -> np.ndarray:
+        """所有行的推荐度"""
+        if self._scores is None:
+            self._scores = recommend_scores(self.average, self.num_raters, self.prior_weight, self.prior_mean)
+        return self._scores
+
+    def order(self, rows=None) -> np.ndarray:
+        """
+        按推荐度从高到低排序（推荐度相同时保持行号顺序）
+
+        :param rows: 参与排序的行号数组，None为全部行
+        :return: 排序后的行号数组
+        """
+        if rows is None:
+            if self._order is None:
+                self._order = np.argsort(-self.scores(), kind='stable')
+            return self._order
+        rows = np.asarray(rows, dtype=np.int64)
+        return rows[np.lexsort((rows, -self.scores()[rows]))]
+
+    def top(self, count, rows=None) -> np.ndarray:
+        """
+        推荐度最高的count行（与order的前count行一致），只对候选行排序
+
+        :param count: 行数
+        :param rows: 候选行号数组，None为全部行
+        :return: 排序后的行号数组
+        """
+        rows = np.arange(len(self), dtype=np.int64) if rows is None else np.asarray(rows, dtype=np.int64)
+        if count >= len(rows):
+            return self.order(rows)
+        scores = self.scores()[rows]
+        # 第count高的推荐度为门槛，推荐度不低于门槛的行（含并列）再排序
+        threshold = -np.partition(-scores, count - 1)[count - 1]
+        return self.order(rows[scores >= threshold])[:count]
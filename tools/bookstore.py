@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+图书目录存储
+功能：
+    1. 按扩展名读写 CSV / Parquet / SQLite 格式的图书目录（所有字段为字符串，空值为空字符串）
+    2. 行修改日志（RowJournal）：记录加载/上次保存后被修改、新增、删除的行（按DataFrame索引标识）
+    3. 保存到加载/上次保存的同一个SQLite文件时只写入变化的行；其他情况整体写入
+    4. 后台保存：写入临时文件后原子替换（SQLite增量保存在一个事务中完成），保存失败时修改日志保留
+依赖：
+    - pandas: 数据读写
+    - sqlite3: SQLite存储（Python标准库）
+    - pyarrow 或 fastparquet: 仅读写Parquet时需要（pandas.read_parquet/to_parquet的可选依赖）
+"""
+import os
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+LOG = logging.getLogger(__name__)
+
+TABLE = 'books'  # SQLite中的图书表名
+FILE_FILTER = "*.csv;;*.parquet;;*.sqlite;;All Files(*)"  # 文件对话框的类型过滤
+
+
+def file_format(path):
+    """按扩展名判断存储格式：csv / parquet / sqlite"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.parquet', '.pq'):
+        return 'parquet'
+    if ext in ('.sqlite', '.sqlite3', '.db'):
+        return 'sqlite'
+    return 'csv'
+
+
+def _quote(name):
+    """SQLite标识符（列名）加引号"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class RowJournal:
+    """
+    行修改日志（线程安全）
+    以DataFrame索引（行标识，新增行取最大值+1，删除行不复用）记录相对存储文件的变化
+    """
+    def __init__(self, source=None):
+        """
+        :param source: 数据对应的存储文件（加载自该文件）；None表示尚未保存过，首次保存需整体写入
+        """
+        self.source = source
+        self.changed = set()   # 修改/新增的行标识
+        self.removed = set()   # 删除的行标识
+        self.full = source is None  # 需要整体写入
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.changed) + len(self.removed)
+
+    @property
+    def dirty(self):
+        """有未保存的修改"""
+        return self.full or len(self) > 0
+
+    def touch(self, labels):
+        """登记修改/新增的行"""
+        with self.lock:
+            for label in labels:
+                self.changed.add(label)
+                self.removed.discard(label)
+
+    def remove(self, labels):
+        """登记删除的行"""
+        with self.lock:
+            for label in labels:
+                self.changed.discard(label)
+                self.removed.add(label)
+
+    def invalidate(self):
+        """数据被整体替换/清空：下次保存整体写入"""
+        with self.lock:
+            self.full = True
+            self.changed.clear()
+            self.removed.clear()
+
+    def take(self):
+        """
+        取出并清空当前日志（保存开始时调用）
+
+        :return: (存储文件, 是否整体写入, 修改的行标识, 删除的行标识)
+        """
+        with self.lock:
+            taken = (self.source, self.full, self.changed, self.removed)
+            self.full = False
+            self.changed = set()
+            self.removed = set()
+        return taken
+
+    def restore(self, taken):
+        """保存失败：把取出的日志合并回来（保存期间产生的新修改优先）"""
+        source, full, changed, removed = taken
+        with self.lock:
+            self.full = self.full or full
+            self.changed |= changed - self.removed
+            self.removed |= removed - self.changed
+
+    def saved(self, path):
+        """保存成功：此后的修改相对path记录"""
+        with self.lock:
+            self.source = path
+
+
+class BookStore:
+    """
+    图书目录存储（读写与后台保存）
+    """
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)  # 后台保存线程（多次保存按顺序执行）
+
+    def close(self):
+        """关闭存储（等待进行中的保存结束）"""
+        self.executor.shutdown()
+
+    # ===================== 读取 =====================
+    def load(self, path):
+        """
+        读取图书目录
+
+        :param path: 文件路径（按扩展名判断格式）
+        :return: DataFrame（所有字段为字符串，空值为空字符串，去掉ISBN为空的行；索引为行标识，从1开始）
+        """
+        fmt = file_format(path)
+        if fmt == 'csv':
+            # keep_default_na=False：空单元格直接读为空字符串，省去NaN判断和整表fillna
+            df = pd.read_csv(path, dtype=str, keep_default_na=False).astype(object)
+        else:
+            df = self._load_sqlite(path) if fmt == 'sqlite' else pd.read_parquet(path)
+            df = df.astype(object).fillna('')
+        if fmt != 'sqlite':
+            df.index = df.index + 1
+        return df[df['ISBN'] != ''] if 'ISBN' in df.columns else df
+
+    @staticmethod
+    def _load_sqlite(path):
+        """读取SQLite图书表（id列为行标识）"""
+        conn = sqlite3.connect(path)
+        try:
+            df = pd.read_sql_query(f'SELECT * FROM {TABLE} ORDER BY id', conn, index_col='id')
+        finally:
+            conn.close()
+        df.index.name = None
+        return df
+
+    # ===================== 保存 =====================
+    def save(self, data, path, journal=None):
+        """
+        后台保存图书目录
+        在调用线程中复制需要写入的行（之后界面可继续修改数据），写入在后台线程中完成
+
+        :param data: 图书目录DataFrame（TableModel的全部数据）
+        :param path: 文件路径（按扩展名判断格式）
+        :param journal: 行修改日志；保存到日志对应的SQLite文件时只写入变化的行
+        :return: Future，结果为写入的行数
+        """
+        journal = journal if journal is not None else RowJournal()
+        taken = journal.take()
+        source, full, changed, removed = taken
+        incremental = (not full and source is not None and path == source
+                       and file_format(path) == 'sqlite' and self._same_columns(path, data.columns))
+        if incremental:
+            rows = data.loc[data.index.intersection(list(changed))].copy()
+            task = (self._write_rows, rows, sorted(removed), path)
+        else:
+            task = (self._write_all, data.copy(), path)
+
+        def run():
+            try:
+                count = task[0](*task[1:])
+            except Exception:
+                journal.restore(taken)
+                raise
+            journal.saved(path)
+            LOG.info(f"保存 {path}：{'增量' if incremental else '整体'}写入 {count} 行")
+            return count
+
+        return self.executor.submit(run)
+
+    def _write_all(self, data, path):
+        """整体写入：先写临时文件，完成后原子替换目标文件"""
+        tmp = path + '.tmp'
+        fmt = file_format(path)
+        try:
+            if fmt == 'sqlite':
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                with sqlite3.connect(tmp) as conn:
+                    columns = ', '.join(f'{_quote(column)} TEXT' for column in data.columns)
+                    conn.execute(f'CREATE TABLE {TABLE} (id INTEGER PRIMARY KEY, {columns})')
+                    self._insert(conn, data)
+                conn.close()
+            elif fmt == 'parquet':
+                data.fillna('').astype(str).to_parquet(tmp, index=False)
+            else:
+                data.to_csv(tmp, index=False)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return len(data)
+
+    def _write_rows(self, rows, removed, path):
+        """增量写入SQLite：删除/替换变化的行，在一个事务中完成"""
+        conn = sqlite3.connect(path)
+        try:
+            with conn:
+                conn.executemany(f'DELETE FROM {TABLE} WHERE id = ?', [(int(label),) for label in removed])
+                self._insert(conn, rows)
+        finally:
+            conn.close()
+        return len(rows) + len(removed)
+
+    @staticmethod
+    def _insert(conn, data):
+        """写入（替换）行，id为DataFrame索引"""
+        columns = ', '.join(['id'] + [_quote(column) for column in data.columns])
+        marks = ', '.join('?' * (len(data.columns) + 1))
+        conn.executemany(f'INSERT OR REPLACE INTO {TABLE} ({columns}) VALUES ({marks})',
+                         ((int(label), *values) for label, values in
+                          zip(data.index, data.fillna('').astype(str).itertuples(index=False, name=None))))
+
+    @staticmethod
+    def _same_columns(path, columns):
+        """SQLite文件中图书表的列与当前数据一致（否则需整体写入）"""
+        if not os.path.exists(path):
+            return False
+        try:
+            conn = sqlite3.connect(path)
+            try:
+                names = [row[1] for row in conn.execute(f'PRAGMA table_info({TABLE})')]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return False
+        return names == ['id'] + [str(column) for column in columns]
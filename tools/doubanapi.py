@@ -16,14 +16,24 @@ Created on Sun Dec 14 12:00:32 2025
     - math: 推荐度计算（自然对数）
     - logging: 日志记录
     - json: 响应数据解析
+    - asyncio: 批量ISBN并发查询（IsbnResolver）
+    - doubancache: 本地缓存（可选，传入IsbnCache后重复查询不再访问网络）
 豆瓣API文档参考：https://developers.douban.com/wiki/?title=book_v2
 """
-import math
+import time
+import random
+import asyncio
 import logging
+import threading
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import List, Optional, Dict, Any,ByteString
 
+from doubancache import IsbnCache
+from bookrank import recommend
+
 # ===================== 全局配置与常量定义 =====================
 # 日志配置：初始化日志器，记录关键操作和异常（便于问题排查）
 logging.basicConfig(
@@ -36,6 +46,53 @@ logging.basicConfig(
 )
 LOG = logging.getLogger(__name__)  # 日志器实例（绑定当前模块名）
 
+DOUBAN_TIMEOUT = 10        # 单次请求超时（秒）
+DOUBAN_CONCURRENCY = 8     # 批量查询的并发数（同时也是连接池大小）
+DOUBAN_RATE = 5.0          # 共享限流：每秒最多发起的请求数
+DOUBAN_BURST = 10          # 共享限流：允许的突发请求数
+RETRY_STATUS = {429, 500, 502, 503, 504}  # 需要退避重试的HTTP状态码
+SEARCH_PAGE = 100          # 书名搜索每页条数（豆瓣接口单页上限）
+SEARCH_LIMIT = 2000        # 书名分页搜索最多获取的条数
+SEARCH_WORKERS = 4         # 书名分页搜索同时请求的页数
+
+
+class TokenBucket:
+    """
+    令牌桶限流器（线程安全，可在多个线程/事件循环间共享）
+    按固定速率补充令牌，每次请求预约一个令牌，返回需要等待的时间，
+    同步代码用time.sleep等待，异步代码用asyncio.sleep等待
+    """
+    def __init__(self, rate: float = DOUBAN_RATE, capacity: int = DOUBAN_BURST):
+        """
+        :param rate: 每秒补充的令牌数（即平均请求速率）
+        :param capacity: 令牌桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        预约一个令牌
+        :return: 距离可以发起请求还需等待的秒数（0表示立即可用）
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= 1  # 令牌不足时记为负数，后续预约依次顺延
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        """获取一个令牌（不足时阻塞等待）"""
+        time.sleep(self.reserve())
+
+
+# 进程内共享的限流器：所有批量查询共用同一个豆瓣接口限额
+SHARED_BUCKET = TokenBucket()
+
 class DouBanApi:
 
     """
@@ -47,8 +104,15 @@ class DouBanApi:
         - 异常捕获（网络错误、解析错误、计算错误）
         - 连接复用（Session减少TCP握手开销）
     """    
-    def __init__(self):
-
+    def __init__(self, pool_size: int = DOUBAN_CONCURRENCY, cache: Optional[IsbnCache] = None,
+                 offline: bool = False):
+        """
+        :param pool_size: 连接池大小（并发查询时不小于并发数，连接可复用）
+        :param cache: 本地缓存（默认None，不使用缓存）
+        :param offline: 离线模式：只查缓存，不访问网络（过期数据照常返回）
+        """
+        self.cache = cache
+        self.offline = offline
         self.url_isbn = "https://api.douban.com/v2/book/isbn/"
         self.url_search = "https://api.douban.com/v2/book/search"
         self.key='0ab215a8b1977939201640fa14c66bab'
@@ -64,6 +128,12 @@ class DouBanApi:
             "User-Agent":
             "Mozilla/5.0 (iPhone; CPU iPhone OS 13_2_3 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/13.0.3 Mobile/15E148 Safari/604.1"
         } 
+        # 共享会话：复用长连接（keep-alive），可在多个线程中并发使用
+        self.session = requests.Session()
+        # pool_connections=2：API与封面图片分属不同主机，各保留一个连接池
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
             
             
     def _get_safe_value(self, data: Dict[str, Any], keys: List[str], default: Any = "") -> Any:
@@ -98,27 +168,17 @@ class DouBanApi:
 
     def _calculate_recommend(self, average: str, num_raters: str) -> int:
         """
-        计算图书推荐度（自定义公式，带全量容错）
+        计算图书推荐度（公式见bookrank.recommend，带全量容错）
         公式逻辑：
-            - (平均分 - 2.5)：过滤低分图书（平均分<2.5时推荐度为负/0）
+            - (平均分 - 2.5)：过滤低分图书（平均分<2.5时推荐度为0）
             - × ln(评价人数 + 1)：评价人数越多，权重越高（+1避免ln(0)异常）
             - round：四舍五入为整数，便于展示
         :param average: 豆瓣平均分（可能为字符串/空值/非数字）
         :param num_raters: 评价人数（可能为字符串/空值/非数字）
         :return: 推荐度（整数，异常时返回0）
         """
-        try:
-            avg = float(average) if average else 0.0
-            num = float(num_raters) if num_raters else 0.0
-            if avg < 2.5 or num < 0:
-                return 0
-            # 推荐度公式：(平均分 - 2.5) × ln(评价人数 + 1)
-            recommend = (avg - 2.5) * math.log(num + 1)
-            return round(recommend)
-        except (ValueError, math.DomainError):
-            LOG.error(f"计算推荐度失败：平均分={average}，评价人数={num_raters}")
-            return 0
-    
+        return round(recommend(average, num_raters))
+
     def get_bookinfo_by_isbn(self,isbn:str) -> Optional[List[str]]:
         """
         通过ISBN精准查询单本图书信息（核心方法）
@@ -145,14 +205,34 @@ class DouBanApi:
         if not isbn:
             LOG.warning("ISBN为空")
             return None
-        # 拼接完整请求URL：基础URL + ISBN（豆瓣ISBN接口要求ISBN拼在URL后）
+        if self.cache is None:
+            return self.fetch_bookinfo_by_isbn(isbn)
 
-        url = f"{self.url_isbn}{isbn}" 
-        try:
-            # 发送GET请求（豆瓣ISBN接口仅支持GET，原代码误用POST）
-            # 参数说明：params传递API Key，timeout避免网络卡死
+        # 缓存未过期（或离线模式）：直接返回缓存
+        bookinfo, fresh = self.cache.get(isbn)
+        if bookinfo is not None and (fresh or self.offline):
+            return bookinfo
+        if self.offline:
+            LOG.warning(f"离线模式：ISBN {isbn} 无缓存")
+            return None
+        # 缓存已过期：先返回过期数据，后台刷新（stale-while-revalidate）
+        if bookinfo is not None:
+            self.cache.revalidate(isbn, lambda: self.fetch_bookinfo_by_isbn(isbn),
+                                  lambda value: self.cache.put(isbn, value))
+            return bookinfo
+        bookinfo = self.fetch_bookinfo_by_isbn(isbn)
+        if bookinfo is not None:
+            self.cache.put(isbn, bookinfo)
+        return bookinfo
 
-            response = requests.post(url, data=self.payload_isbn, headers=self.headers)
+    def fetch_bookinfo_by_isbn(self, isbn: str) -> Optional[List[str]]:
+        """
+        访问豆瓣API查询单本图书信息（不使用缓存）
+        :param isbn: 图书ISBN编号
+        :return: 格式化图书信息列表（格式同get_bookinfo_by_isbn）/[]（数据残缺）/None（请求失败）
+        """
+        try:
+            response = self.request_isbn(isbn)
             # 解析JSON响应（豆瓣API返回UTF-8编码的JSON）
             book_dict = json.loads(response.text)
         except requests.exceptions.RequestException as e:
@@ -161,7 +241,26 @@ class DouBanApi:
         except json.JSONDecodeError:
             LOG.error(f"ISBN {isbn} 响应解析失败：{response.text}")
             return None
-        
+        return self.parse_isbn_book(isbn, book_dict)
+
+    def request_isbn(self, isbn: str, timeout: float = DOUBAN_TIMEOUT) -> requests.Response:
+        """
+        发送ISBN查询请求（通过共享会话，可在多个线程中并发调用）
+        :param isbn: 图书ISBN编号
+        :param timeout: 请求超时时间（秒），避免网络卡死
+        :return: HTTP响应
+        """
+        # 拼接完整请求URL：基础URL + ISBN（豆瓣ISBN接口要求ISBN拼在URL后）
+        url = f"{self.url_isbn}{isbn}"
+        return self.session.post(url, data=self.payload_isbn, headers=self.headers, timeout=timeout)
+
+    def parse_isbn_book(self, isbn: str, book_dict: Dict[str, Any]) -> List[str]:
+        """
+        将ISBN接口返回的图书字典格式化为图书信息列表
+        :param isbn: 图书ISBN编号
+        :param book_dict: 接口返回的JSON字典
+        :return: 图书信息列表（格式同get_bookinfo_by_isbn）/[]（数据残缺）
+        """
         bookinfo =[]
         
         # 过滤残缺数据：字段数<最小阈值 → 返回None 
@@ -195,8 +294,8 @@ class DouBanApi:
     
             # ===================== 7. 计算图书推荐度（自定义公式） =====================
             # 日志记录评分信息（便于调试推荐度计算）
-            LOG.info(f"ISBN {isbn} 评分信息：{rating}")
-            LOG.info(f"ISBN {isbn} 完整图书信息：{book_dict}")
+            LOG.debug(f"ISBN {isbn} 评分信息：{rating}")
+            LOG.debug(f"ISBN {isbn} 完整图书信息：{book_dict}")
             
             # 推荐度公式：(平均分 - 2.5) × ln(评价人数 + 1)
             # 设计逻辑：
@@ -221,7 +320,7 @@ class DouBanApi:
         
     def search_bookinfo_by_name(self, bookname:str)  -> Optional[List[str]]:
         """
-        通过书名模糊搜索多本图书信息
+        通过书名模糊搜索多本图书信息（使用缓存时，过期结果先返回、后台刷新）
         :param bookname: 图书名称（支持模糊匹配，如"Python编程"）
         :return: 图书信息列表的列表（每个子列表格式同get_bookinfo_by_isbn）
         """
@@ -229,33 +328,66 @@ class DouBanApi:
         if not bookname:
             LOG.warning("搜索书名为空")
             return []
-        
-        self.payload_search['q']= bookname
-        print(self.payload_search)
+        if self.cache is None:
+            return self.fetch_search_by_name(bookname) or []
+
+        books, fresh = self.cache.get_search(bookname)
+        if books is not None and (fresh or self.offline):
+            return books
+        if self.offline:
+            LOG.warning(f"离线模式：搜索书名 {bookname} 无缓存")
+            return []
+        if books is not None:
+            self.cache.revalidate('search:' + bookname, lambda: self.fetch_search_by_name(bookname),
+                                  lambda value: self.cache.put_search(bookname, value))
+            return books
+        books = self.fetch_search_by_name(bookname)
+        if books is None:
+            return []
+        self.cache.put_search(bookname, books)
+        return books
+
+    def fetch_search_by_name(self, bookname:str)  -> Optional[List[str]]:
+        """
+        访问豆瓣API按书名搜索（不使用缓存，只取第一页）
+        :param bookname: 图书名称
+        :return: 图书信息列表的列表 / None（请求失败）
+        """
+        page = self.fetch_search_page(bookname, 0, 20)
+        return page[1] if page is not None else None
+
+    def fetch_search_page(self, bookname: str, start: int = 0, count: int = SEARCH_PAGE,
+                          timeout: float = DOUBAN_TIMEOUT):
+        """
+        访问豆瓣API搜索一页（不使用缓存，可在多个线程中并发调用）
+        豆瓣返回格式：{"count": 20, "start": 0, "total": 3000, "books": [{}, {}, ...]}
+        :param bookname: 图书名称
+        :param start: 起始位置
+        :param count: 本页条数
+        :param timeout: 请求超时（秒）
+        :return: (结果总数, 图书信息列表的列表) / None（请求失败）
+        """
+        # 每次请求单独构造参数，不修改共享的self.payload_search
+        params = dict(self.payload_search, q=bookname, start=start, count=count)
         try:
             # 发送GET请求（豆瓣搜索接口仅支持GET）
-            response = requests.get(self.url_search, params=self.payload_search, headers=self.headers)
-            # 解析搜索结果（豆瓣返回格式：{"count":20, "start":0, "total":3000, "books":[...]}）
-            """
-            {
-              "count": 20,
-              "start": 0,
-              "total": 3000,
-              "books": [
-                  {},
-                  {},
-                  ....
-            }
-            """
-            # print(response.json())
-
-            booklist = response.json()['books']
+            response = self.session.get(self.url_search, params=params, headers=self.headers, timeout=timeout)
+            result = response.json()
+            booklist = result['books']
         except requests.exceptions.RequestException as e:
-            LOG.error(f"搜索书名 {bookname} 请求失败：{str(e)}")
-            return []
-        except json.JSONDecodeError:
-            LOG.error(f"搜索书名 {bookname} 响应解析失败：{response.text}")
-            return []
+            LOG.error(f"搜索书名 {bookname}（第{start}条起）请求失败：{str(e)}")
+            return None
+        except (ValueError, KeyError):
+            LOG.error(f"搜索书名 {bookname}（第{start}条起）响应解析失败：{response.text}")
+            return None
+        return int(result.get('total', len(booklist))), self.parse_search_books(booklist)
+
+    def parse_search_books(self, booklist: List[Dict[str, Any]]) -> List[List[Any]]:
+        """
+        解析搜索结果中的图书列表
+        :param booklist: 豆瓣返回的books列表
+        :return: 图书信息列表的列表（跳过无ISBN13的图书）
+        """
         books = []
         
         for book_dict in booklist:
@@ -263,9 +395,6 @@ class DouBanApi:
             bookinfo = []
             # 过滤无效数据（字段过少的图书）
             if len(book_dict) > 5:
-                # print('==='*30)
-                # print(book_dict)
-                # 过滤无ISBN13的图书（ISBN13是唯一标识，必须存在）
                 # 过滤无ISBN13的图书（ISBN13是唯一标识，必须存在）
                 if ('isbn13' not in book_dict):
                     LOG.debug(f"跳过无ISBN13的图书：书名={self._get_safe_value(book_dict, ['title'])}")
@@ -300,23 +429,227 @@ class DouBanApi:
                 books.append(bookinfo)        
         
         return books
-    def get_img_by_url(self, url:str)  -> Optional[ByteString]:    
-        ref = 'https://' + url.split('/')[2]
-        headers= self.headers
-        headers['Referer'] = ref
+    def search_page(self, bookname: str, start: int = 0, count: int = SEARCH_PAGE):
+        """
+        按书名搜索一页（使用缓存时未过期的页直接返回；请求失败时退回过期的缓存）
+        :param bookname: 图书名称
+        :param start: 起始位置
+        :param count: 本页条数
+        :return: (结果总数, 图书信息列表的列表) / None（请求失败且无缓存）
+        """
+        key = f'{bookname}#{start}:{count}'
+        cached, fresh = self.cache.get_search(key) if self.cache is not None else (None, False)
+        if cached is not None and (fresh or self.offline):
+            return tuple(cached)
+        if self.offline:
+            return None
+        page = self.fetch_search_page(bookname, start, count)
+        if page is None:
+            return tuple(cached) if cached is not None else None
+        if self.cache is not None:
+            self.cache.put_search(key, list(page))
+        return page
+
+    def iter_search(self, bookname: str, limit: int = SEARCH_LIMIT, count: int = SEARCH_PAGE,
+                    workers: int = SEARCH_WORKERS, stop: Optional[threading.Event] = None,
+                    bucket: TokenBucket = SHARED_BUCKET):
+        """
+        分页搜索：先取第一页得到结果总数，其余各页在线程池中并发请求（共享令牌桶限流），
+        按页顺序逐页产出（后面的页先完成时等待前面的页）；失败的页跳过
+        调用方中途停止迭代或设置stop时，尚未开始的页随即取消
+
+        :param bookname: 图书名称
+        :param limit: 最多获取的条数
+        :param count: 每页条数
+        :param workers: 同时请求的页数
+        :param stop: 停止事件（由其他线程设置）
+        :param bucket: 限流令牌桶
+        :return: 生成器，逐页产出 (结果总数（不超过limit）, 本页图书信息列表的列表)
+        """
+        stopped = lambda: stop is not None and stop.is_set()
+        time.sleep(bucket.reserve())
+        first = self.search_page(bookname, 0, count)
+        if first is None or stopped():
+            return
+        total = min(first[0], limit)
+        yield total, first[1]
+
+        def page(start):
+            if stopped():
+                return None
+            time.sleep(bucket.reserve())
+            return None if stopped() else self.search_page(bookname, start, count)
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = [executor.submit(page, start) for start in range(count, total, count)]
         try:
-            res = requests.get(url, headers=headers, timeout=5)
+            for future in futures:
+                result = future.result()
+                if stopped():
+                    break
+                if result is not None:
+                    yield total, result[1]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_img_by_url(self, url: str, timeout: float = 5) -> Optional[ByteString]:
+        """
+        下载图片（图书封面），可在多个线程中并发调用
+        :param url: 图片URL
+        :param timeout: 请求超时（秒）
+        :return: 图片数据，失败时返回None
+        """
+        # 豆瓣图片防盗链：Referer为图片所在域名；复制请求头，不修改共享的self.headers
+        headers = dict(self.headers, Referer='https://' + url.split('/')[2])
+        try:
+            res = self.session.get(url, headers=headers, timeout=timeout)
             if res.status_code == 200:
                 return res.content
-            else:
-                print(f'获取图书封面失败:{url}')
-        except Exception as  e:
-            
-            print(f'获取图书封面失败:{e}')
-        
+            LOG.warning(f'获取图书封面失败（HTTP {res.status_code}）:{url}')
+        except Exception as e:
+            LOG.warning(f'获取图书封面失败:{e}')
+        return None
+
     def __del__(self):
         pass
 
+
+class IsbnResolver:
+    """
+    批量ISBN并发查询（基于asyncio）
+    核心特性：
+        - 并发数可配置，所有请求复用DouBanApi的共享会话（keep-alive长连接）
+        - 共享令牌桶限流（默认进程内所有批量查询共用一个限额）
+        - 429/5xx及网络错误时指数退避重试（优先遵循Retry-After）
+        - 结果按完成顺序流式返回，无需等待整批完成
+        - DouBanApi带缓存时，未过期的ISBN直接返回缓存；请求失败时退回过期的缓存数据
+    说明：HTTP请求仍由requests在线程池中执行，asyncio负责并发调度、限流与重试
+    """
+    def __init__(self, api: Optional[DouBanApi] = None, concurrency: int = DOUBAN_CONCURRENCY,
+                 bucket: TokenBucket = SHARED_BUCKET, retries: int = 3, backoff: float = 1.0,
+                 timeout: float = DOUBAN_TIMEOUT):
+        """
+        :param api: DouBanApi实例（默认新建，连接池大小与并发数一致）；
+                    测试时可修改其url_isbn指向本地桩服务器
+        :param concurrency: 同时进行的请求数
+        :param bucket: 限流令牌桶
+        :param retries: 最大重试次数
+        :param backoff: 退避基准时间（秒），第n次重试等待 backoff * 2^n
+        :param timeout: 单次请求超时（秒）
+        """
+        self.api = api or DouBanApi(pool_size=concurrency)
+        self.concurrency = concurrency
+        self.bucket = bucket
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """计算重试前的等待时间：优先使用Retry-After，否则指数退避（附加少量随机抖动）"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+
+    async def _resolve_one(self, isbn: str, executor: ThreadPoolExecutor):
+        """
+        查询单个ISBN（先查缓存，再限流 + 重试访问网络）
+        :return: (ISBN, 图书信息列表/[]（数据残缺）/None（请求失败）)
+        """
+        cache = self.api.cache
+        cached, fresh = cache.get(isbn) if cache is not None else (None, False)
+        if cached is not None and (fresh or self.api.offline):
+            return isbn, cached
+        if self.api.offline:
+            return isbn, None
+        _, bookinfo = await self._fetch_one(isbn, executor)
+        if bookinfo is not None:
+            if cache is not None:
+                cache.put(isbn, bookinfo)
+            return isbn, bookinfo
+        # 请求失败（如持续被限流）时，退回过期的缓存数据
+        return isbn, cached
+
+    async def _fetch_one(self, isbn: str, executor: ThreadPoolExecutor):
+        """
+        访问网络查询单个ISBN（限流 + 重试）
+        :return: (ISBN, 图书信息列表/[]（数据残缺）/None（请求失败）)
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            await asyncio.sleep(self.bucket.reserve())
+            try:
+                response = await loop.run_in_executor(executor, self.api.request_isbn, isbn, self.timeout)
+            except requests.exceptions.RequestException as e:
+                LOG.warning(f"ISBN {isbn} 请求失败（第{attempt + 1}次）：{e}")
+                delay = self._retry_delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    try:
+                        return isbn, self.api.parse_isbn_book(isbn, response.json())
+                    except ValueError:
+                        LOG.error(f"ISBN {isbn} 响应解析失败：{response.text}")
+                        return isbn, None
+                LOG.warning(f"ISBN {isbn} 被限流/服务异常（HTTP {response.status_code}，第{attempt + 1}次）")
+                delay = self._retry_delay(attempt, response)
+            if attempt < self.retries:
+                await asyncio.sleep(delay)
+        LOG.error(f"ISBN {isbn} 重试{self.retries}次后仍失败")
+        return isbn, None
+
+    async def resolve(self, isbns: List[str]):
+        """
+        并发查询一批ISBN（异步生成器），按完成顺序产出结果
+        :param isbns: ISBN列表
+        :return: 异步生成器，逐个产出 (ISBN, 图书信息列表/[]/None)
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+        async def limited(isbn):
+            async with semaphore:
+                return await self._resolve_one(isbn, executor)
+
+        tasks = [asyncio.ensure_future(limited(isbn)) for isbn in isbns]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            # 提前结束（取消/中途退出）时，尚未开始的查询直接取消
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            executor.shutdown(wait=False)
+
+    def iter_resolve(self, isbns: List[str]):
+        """
+        同步接口（供QThread等子线程使用）：在当前线程运行事件循环，按完成顺序逐个产出结果；
+        调用方中途停止迭代时，未完成的查询随即取消
+        :param isbns: ISBN列表
+        :return: 生成器，逐个产出 (ISBN, 图书信息列表/[]/None)
+        """
+        loop = asyncio.new_event_loop()
+        agen = self.resolve(isbns)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(agen.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(agen.aclose())
+            loop.close()
+
+    def resolve_all(self, isbns: List[str]) -> Dict[str, Optional[List[str]]]:
+        """
+        查询一批ISBN并等待全部完成
+        :param isbns: ISBN列表
+        :return: {ISBN: 图书信息列表/[]/None}
+        """
+        return dict(self.iter_resolve(isbns))
+
+
 if __name__ == "__main__":
     # 初始化API实例
     douban_api = DouBanApi()    
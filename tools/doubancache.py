@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+豆瓣图书信息本地缓存
+功能：
+    1. 按ISBN缓存图书信息（SQLite持久化 + 内存LRU，重复查询无需访问网络）
+    2. 按字段分组设置有效期：评分/人数变化快，书名/作者等基本不变
+    3. 过期数据先返回、后台刷新（stale-while-revalidate），接口被限流时仍可使用
+    4. 缓存书名搜索结果
+依赖：
+    - sqlite3: 持久化存储（Python标准库）
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+LOG = logging.getLogger(__name__)
+
+CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'booklist', 'douban.sqlite')  # 默认缓存文件
+
+# 图书信息字段分组（图书信息列表的索引，见DouBanApi.get_bookinfo_by_isbn）
+FIELD_GROUPS = {
+    'rating': (5, 6, 11, 13),               # 平均分、评价人数、评分字典、推荐度
+    'detail': (1, 2, 3, 4, 9, 10, 12, 14),  # 书名、作者、出版社、价格、封面、出版日期、详情页、页数
+}
+# 各字段分组的有效期（秒）
+FIELD_TTL = {
+    'rating': 24 * 3600,        # 评分：1天
+    'detail': 30 * 24 * 3600,   # 基本信息：30天
+}
+MISSING_TTL = 24 * 3600   # 豆瓣无此书（返回数据残缺）的缓存有效期
+SEARCH_TTL = 24 * 3600    # 书名搜索结果的有效期
+MEMORY_SIZE = 4096        # 内存LRU缓存的最大条目数
+
+
+class IsbnCache:
+    """
+    ISBN图书信息缓存（线程安全）
+    SQLite中每本书保存图书信息列表及各字段分组的更新时间，查询时按所需字段分组判断是否过期
+    """
+    def __init__(self, db_file: str = CACHE_FILE, ttl: Optional[dict] = None, memory_size: int = MEMORY_SIZE):
+        """
+        :param db_file: SQLite缓存文件路径
+        :param ttl: 各字段分组的有效期（秒），默认FIELD_TTL
+        :param memory_size: 内存LRU缓存的最大条目数
+        """
+        self.db_file = db_file
+        self.ttl = dict(FIELD_TTL, **(ttl or {}))
+        self.memory_size = memory_size
+        self.memory = OrderedDict()  # {ISBN: (图书信息列表, {字段分组: 更新时间})}
+        self.lock = threading.Lock()
+        self.pending = set()  # 正在后台刷新的键
+        self.executor = ThreadPoolExecutor(max_workers=2)  # 后台刷新线程
+
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS books (isbn TEXT PRIMARY KEY, info TEXT, stamps TEXT)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS searches (query TEXT PRIMARY KEY, books TEXT, stamp REAL)')
+        self.conn.commit()
+
+    def close(self):
+        """关闭缓存（等待后台刷新结束）"""
+        self.executor.shutdown()
+        self.conn.close()
+
+    def _is_fresh(self, bookinfo: List[Any], stamps: dict, groups, now: float) -> bool:
+        """判断缓存记录在所需字段分组上是否均未过期"""
+        if not bookinfo:
+            return now - stamps.get('missing', 0) < MISSING_TTL
+        return all(now - stamps.get(group, 0) < self.ttl[group] for group in groups)
+
+    def get(self, isbn: str, groups=FIELD_TTL) -> Tuple[Optional[List[Any]], bool]:
+        """
+        查询缓存
+
+        :param isbn: 图书ISBN
+        :param groups: 需要的字段分组（默认全部），只按这些分组的有效期判断是否过期
+        :return: (图书信息列表（未缓存时为None，豆瓣无此书时为[]）, 是否未过期)
+        """
+        with self.lock:
+            entry = self.memory.get(isbn)
+            if entry is not None:
+                self.memory.move_to_end(isbn)
+            else:
+                row = self.conn.execute('SELECT info, stamps FROM books WHERE isbn = ?', (isbn,)).fetchone()
+                if row is None:
+                    return None, False
+                entry = (json.loads(row[0]), json.loads(row[1]))
+                self._remember(isbn, entry)
+        bookinfo, stamps = entry
+        # 返回副本，调用方修改列表不影响缓存
+        return list(bookinfo), self._is_fresh(bookinfo, stamps, groups, time.time())
+
+    def put(self, isbn: str, bookinfo: List[Any]):
+        """
+        写入缓存（所有字段分组的更新时间记为当前时间）
+
+        :param isbn: 图书ISBN
+        :param bookinfo: 图书信息列表，[]表示豆瓣无此书
+        """
+        now = time.time()
+        stamps = {group: now for group in FIELD_GROUPS} if bookinfo else {'missing': now}
+        entry = (list(bookinfo), stamps)
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO books VALUES (?, ?, ?)',
+                              (isbn, json.dumps(entry[0], ensure_ascii=False), json.dumps(stamps)))
+            self.conn.commit()
+            self._remember(isbn, entry)
+
+    def _remember(self, isbn: str, entry):
+        """写入内存LRU缓存（调用方持有锁）"""
+        self.memory[isbn] = entry
+        self.memory.move_to_end(isbn)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get_search(self, query: str) -> Tuple[Optional[List[List[Any]]], bool]:
+        """
+        查询书名搜索结果缓存
+
+        :param query: 搜索关键词
+        :return: (图书信息列表的列表（未缓存时为None）, 是否未过期)
+        """
+        with self.lock:
+            row = self.conn.execute('SELECT books, stamp FROM searches WHERE query = ?', (query,)).fetchone()
+        if row is None:
+            return None, False
+        return json.loads(row[0]), time.time() - row[1] < SEARCH_TTL
+
+    def put_search(self, query: str, books: List[List[Any]]):
+        """写入书名搜索结果缓存"""
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO searches VALUES (?, ?, ?)',
+                              (query, json.dumps(books, ensure_ascii=False), time.time()))
+            self.conn.commit()
+
+    def revalidate(self, key: str, fetch: Callable[[], Any], store: Callable[[Any], None]):
+        """
+        后台刷新过期数据（同一个键同时只刷新一次）
+
+        :param key: 缓存键（用于去重）
+        :param fetch: 获取最新数据的函数，失败时返回None
+        :param store: 保存数据的函数
+        """
+        with self.lock:
+            if key in self.pending:
+                return
+            self.pending.add(key)
+
+        def task():
+            try:
+                value = fetch()
+                if value is not None:
+                    store(value)
+            except Exception as e:
+                LOG.warning(f"后台刷新 {key} 失败：{e}")
+            finally:
+                with self.lock:
+                    self.pending.discard(key)
+
+        self.executor.submit(task)
+
+
+_caches = {}  # 进程内共享的缓存实例：{缓存文件: IsbnCache}
+
+
+def get_cache(db_file: str = CACHE_FILE) -> IsbnCache:
+    """
+    获取进程内共享的缓存实例（同一缓存文件只打开一次）
+
+    :param db_file: SQLite缓存文件路径
+    :return: IsbnCache
+    """
+    if db_file not in _caches:
+        _caches[db_file] = IsbnCache(db_file)
+    return _caches[db_file]
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+在线音乐下载管理
+功能：
+    1. 分块流式写入磁盘（不把整首歌读入内存），先写入 .part 文件，完成后再改名
+    2. 断点续传：.part 文件已存在时用 HTTP Range 请求剩余部分，服务器不支持时从头下载
+    3. 多首歌曲并行下载，同一文件的重复请求共用一个下载任务，连接中断时自动重试（续传）
+    4. 预下载播放队列中接下来的几首，切歌时文件已在本地
+    5. 下载进度回调 progress(文件名, 已下载字节, 总字节)，总大小未知时为0
+依赖：
+    - requests: HTTP 请求与连接池
+"""
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 64 * 1024   # 每次写入磁盘的块大小（字节）
+DOWNLOAD_WORKERS = 3     # 同时下载的歌曲数
+DOWNLOAD_RETRIES = 2     # 连接中断后的续传重试次数
+DOWNLOAD_TIMEOUT = 15    # 连接/读取超时（秒）
+PREFETCH = 2             # 预下载播放队列中接下来的歌曲数
+PART_SUFFIX = '.part'    # 未下载完成的临时文件后缀
+
+# 连接中断/超时：保留 .part 文件续传重试
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+LOG = logging.getLogger(os.path.basename(sys.argv[0]))
+
+
+def content_range(response):
+    """解析 Content-Range: bytes start-end/total → (start, total)，未知部分为None"""
+    value = response.headers.get('Content-Range', '')
+    try:
+        span, total = value.split(' ', 1)[1].split('/')
+        start = None if span == '*' else int(span.split('-')[0])
+        return start, None if total == '*' else int(total)
+    except (IndexError, ValueError):
+        return None, None
+
+
+def download(session, url, filename, chunk_size=CHUNK_SIZE, timeout=DOWNLOAD_TIMEOUT, progress=None, stop=None) -> bool:
+    """
+    下载单个文件（支持断点续传）
+
+    :param session: requests.Session
+    :param url: 下载地址
+    :param filename: 保存路径，已存在时直接返回
+    :param chunk_size: 分块大小（字节）
+    :param timeout: 连接/读取超时（秒）
+    :param progress: 可选回调 progress(已下载字节, 总字节)
+    :param stop: 可选的无参函数，返回True时停止下载（保留 .part 文件供下次续传）
+    :return: 下载完成返回True，被停止返回False
+    """
+    if os.path.exists(filename):
+        return True
+
+    part = filename + PART_SUFFIX
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as r:
+        if r.status_code == 416 and offset:
+            # 请求范围超出文件大小：已下载部分即完整文件，否则文件已变化，从头下载
+            total = content_range(r)[1]
+            if total == offset:
+                os.replace(part, filename)
+                return True
+            os.remove(part)
+            return download(session, url, filename, chunk_size, timeout, progress, stop)
+        r.raise_for_status()
+
+        start, total = content_range(r) if r.status_code == 206 else (0, None)
+        if start != offset:
+            # 服务器不支持 Range（返回200）或返回了其他范围，从头下载
+            offset = 0
+            if r.status_code == 206:
+                os.remove(part)
+                raise requests.ConnectionError(f"续传范围不符: {r.headers.get('Content-Range')}")
+        if total is None:
+            length = r.headers.get('Content-Length')
+            total = offset + int(length) if length and length.isdigit() else 0
+
+        done = offset
+        with open(part, 'ab' if offset else 'wb') as f:
+            for chunk in r.iter_content(chunk_size):
+                if stop is not None and stop():
+                    return False
+                f.write(chunk)
+                done += len(chunk)
+                if progress is not None:
+                    progress(done, total)
+
+    if total and done != total:
+        raise requests.ConnectionError(f"下载不完整: {done}/{total}")
+    os.replace(part, filename)
+    return True
+
+
+class DownloadManager:
+    """
+    并行下载管理
+    以保存路径标识下载任务，正在进行或排队中的任务被再次请求时返回同一个Future
+    """
+    def __init__(self, workers=DOWNLOAD_WORKERS, retries=DOWNLOAD_RETRIES, chunk_size=CHUNK_SIZE,
+                 timeout=DOWNLOAD_TIMEOUT, progress=None):
+        """
+        :param workers: 同时下载的文件数
+        :param retries: 连接中断后的续传重试次数
+        :param chunk_size: 分块大小（字节）
+        :param timeout: 连接/读取超时（秒）
+        :param progress: 可选回调 progress(文件名, 已下载字节, 总字节)，按百分比节流，在下载线程中调用
+        """
+        self.retries = retries
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.progress = progress
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='music-download')
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.lock = threading.Lock()
+        self.tasks = {}            # 保存路径 → Future
+        self.prefetching = set()   # 仅为预下载而排队的保存路径（可被取消）
+        self.closed = False
+
+    def _run(self, url, filename) -> bool:
+        """下载线程：失败后续传重试"""
+        last = [-1]
+
+        def report(done, total):
+            # 百分比变化（总大小未知时每256KB）才回调
+            step = done * 100 // total if total else done >> 18
+            if step != last[0]:
+                last[0] = step
+                self.progress(filename, done, total)
+
+        for attempt in range(self.retries + 1):
+            try:
+                return download(self.session, url, filename, self.chunk_size, self.timeout,
+                                report if self.progress is not None else None, lambda: self.closed)
+            except RETRY_ERRORS as e:
+                if attempt >= self.retries or self.closed:
+                    raise
+                LOG.warning(f"下载中断，续传重试({attempt + 1}): {filename} {e}")
+
+    def fetch(self, url, filename):
+        """
+        下载文件（已在下载中则返回原任务）
+
+        :param url: 下载地址
+        :param filename: 保存路径
+        :return: concurrent.futures.Future，结果为True（完成）/ False（管理器已关闭）
+        """
+        with self.lock:
+            self.prefetching.discard(filename)
+            future = self.tasks.get(filename)
+            if future is None or future.done():
+                future = self.tasks[filename] = self.executor.submit(self._run, url, filename)
+            return future
+
+    def prefetch(self, items):
+        """
+        预下载（本地已有或正在下载的跳过），之前排队但不再需要的预下载任务被取消
+
+        :param items: [(下载地址, 保存路径)]
+        """
+        wanted = {filename for _, filename in items}
+        queued = 0
+        with self.lock:
+            for filename in self.prefetching - wanted:
+                self.tasks[filename].cancel()
+            self.prefetching &= wanted
+            for url, filename in items:
+                future = self.tasks.get(filename)
+                if os.path.exists(filename) or (future is not None and not future.done()):
+                    continue
+                self.tasks[filename] = self.executor.submit(self._run, url, filename)
+                self.prefetching.add(filename)
+                queued += 1
+        LOG.info(f"预下载: 新增 {queued} 首")
+
+    def shutdown(self):
+        """停止所有下载（未完成部分保留为 .part 文件，下次续传）"""
+        self.closed = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+在线音乐并发搜索
+功能：
+    1. 所有搜索源 × 所有页同时发出请求，一次搜索只需一个往返时间（而不是 页数 × 源数 个）
+    2. 共享 requests.Session 连接池，重复搜索时复用已建立的连接
+    3. 按 歌名 + 歌手 去重（忽略大小写与多余空白），先返回的结果优先
+    4. 以生成器方式按请求完成顺序逐批返回新结果，界面可以边搜索边显示
+依赖：
+    - requests: HTTP 请求与连接池
+"""
+import logging
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SEARCH_PAGES = 2      # 每个搜索源请求的页数
+SEARCH_WORKERS = 16   # 并发请求数（不小于 源数 × 页数 时所有请求同时发出）
+SEARCH_TIMEOUT = 10   # 单个请求超时（秒），避免个别搜索源拖慢整个搜索
+STOP_POLL = 0.2       # 等待结果时检查停止标志的间隔（秒）
+HEADER = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.110.430.128 Safari/537.36',
+    'X-Requested-With': 'XMLHttpRequest'
+}
+
+LOG = logging.getLogger(os.path.basename(sys.argv[0]))
+
+
+def track_key(track) -> tuple:
+    """去重键：(歌名, 歌手)，忽略大小写与多余空白"""
+    title = ' '.join(str(track.get('title') or '').split()).casefold()
+    author = ' '.join(str(track.get('author') or '').split()).casefold()
+    return title, author
+
+
+class MusicSearch:
+    """
+    多源并发搜索
+    一个实例可被多次搜索共用（线程池与连接池在搜索之间保留）
+    """
+    def __init__(self, pages=SEARCH_PAGES, workers=SEARCH_WORKERS, timeout=SEARCH_TIMEOUT):
+        """
+        :param pages: 每个搜索源请求的页数
+        :param workers: 并发请求数，同时也是每个主机的连接池大小
+        :param timeout: 单个请求超时（秒）
+        """
+        self.pages = pages
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='music-search')
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(HEADER)
+
+    def fetch(self, url, keyword, sourcecode, page) -> list:
+        """
+        请求单个搜索源的一页结果
+
+        :param url: 搜索通道地址
+        :param keyword: 搜索文字
+        :param sourcecode: 搜索源代码（如 netease）
+        :param page: 页号
+        :return: 歌曲列表
+        """
+        params = {'input': keyword, 'filter': 'name',
+                  'type': sourcecode, 'page': page}
+        res = self.session.post(url, data=params, timeout=self.timeout)
+        html = res.json()
+        if html.get('code') != 200:
+            raise ValueError(f"返回码 {html.get('code')}")
+        return html.get('data') or []
+
+    def search(self, url, keyword, sources, stop=None):
+        """
+        并发搜索所有源的所有页，按完成顺序逐批返回去重后的新歌曲
+
+        :param url: 搜索通道地址
+        :param keyword: 搜索文字
+        :param sources: {搜索源名称: 搜索源代码}
+        :param stop: 可选的无参函数，返回True时停止搜索（未开始的请求被取消）
+        :return: 生成器，每次返回一批新歌曲（dict，附加 'source' 为搜索源名称）
+        """
+        futures = {}
+        for name, sourcecode in sources.items():
+            for page in range(self.pages):
+                future = self.executor.submit(self.fetch, url, keyword, sourcecode, page)
+                futures[future] = (name, page)
+
+        seen = set()
+        failed = 0
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=STOP_POLL, return_when=FIRST_COMPLETED)
+                if stop is not None and stop():
+                    LOG.info("搜索已取消")
+                    break
+                for future in done:
+                    name, page = futures[future]
+                    try:
+                        data = future.result()
+                    except (requests.RequestException, ValueError) as e:
+                        failed += 1
+                        LOG.warning(f"列表搜索失败！url:{url} 源:{name} 页:{page} {e}")
+                        continue
+
+                    batch = []
+                    for track in data:
+                        key = track_key(track)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        track['source'] = name
+                        batch.append(track)
+                    if batch:
+                        yield batch
+        finally:
+            for future in futures:
+                future.cancel()
+        LOG.info(f"列表搜索结束。 {len(seen)} 首，失败请求 {failed}/{len(futures)}")
@@ -10,11 +10,14 @@ from PyQt6.QtGui import QPixmap, QCloseEvent, QIcon, QAction
 
 
 from Ui_MusicPlayer_v3 import Ui_MusicPlayer
+from musicsearch import MusicSearch
+from musicdownload import DownloadManager, DOWNLOAD_TIMEOUT, PREFETCH
 import requests
 import os
 import sys
 import time
 import logging
+from concurrent.futures import CancelledError, wait
 from PIL import Image, ImageDraw, ImageFilter
 from pygame import mixer
 from eyed3 import load
@@ -23,7 +26,6 @@ from eyed3 import load
 # import ctypes
 
 
-qmut = QMutex()
 qmut_lrc = QMutex()
 
 global musicepath  # mp3 存储路径 /musicdata
@@ -54,6 +56,7 @@ seq = True
 global page
 global sourcelist
 page = 2
+allsource = '全部'  # 搜索频道：同时搜索 sourcelist 中的所有源
 sourcelist = {'网易云': 'netease', '酷我': 'kuwo', 'QQ': 'qq',
               '百度': 'baidu', '一听': 'yiting', '千千': 'tianhe', '咪咕': 'migu'}
 urllist = {'通道1': 'http://miss.qingchengkg.cn/', '通道2': 'http://tool.tesiber.com/music/', '通道3': 'https://music.haom.ren/',
@@ -72,11 +75,17 @@ logging.basicConfig(datefmt='%Y-%m-%d %H:%M:%S', format="%(asctime)s - %(name)s
 class GetListThread(QThread):
     # 自定义信号对象。参数str就代表这个信号可以传一个字符串
     trigger = pyqtSignal(str)
+    # 每收到一批去重后的新歌曲就发送一次，界面边搜索边显示
+    found = pyqtSignal(list)
 
-    def __init__(self):
+    def __init__(self, searcher, url, keyword, sources):
         # 初始化函数
         super(GetListThread, self).__init__()
         self.working = True
+        self.searcher = searcher
+        self.url = url
+        self.keyword = keyword
+        self.sources = sources
 
     def __del__(self):
         # 线程状态改变与线程终止
@@ -85,56 +94,39 @@ class GetListThread(QThread):
 
     def run(self):
         # 重写线程执行的run函数
-        # 触发自定义信号
-        global source
-        global search
-        global page
-        global myjson
-
-        sourcecode = sourcelist[source]
+        # 所有搜索源、所有页并发请求，结果按返回顺序逐批发送
+        if len(self.keyword) <= 0:
+            return
 
-        # urlss = ['http://miss.qingchengkg.cn/', 'http://www.xmsj.org/', 'http://y.yin2s.com/']
-        url = urllist[urls]
-        # url = urlss[0]
-        header = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.110.430.128 Safari/537.36',
-            'X-Requested-With': 'XMLHttpRequest'
-        }
-        myjson = []
+        total = 0
+        for batch in self.searcher.search(self.url, self.keyword, self.sources,
+                                          stop=lambda: not self.working):
+            total += len(batch)
+            self.found.emit(batch)
 
-        if len(search) <= 0:
+        if not self.working:
             return
+        self.trigger.emit("ok" if total > 0 else "err")
 
-        for i in range(page):
-            params = {'input': search, 'filter': 'name',
-                      'type': sourcecode, 'page': i}
-            res = requests.post(url, params, headers=header)
-            html = res.json()
-            LOG.info(html)
-            if html['code'] == 200:
-                myjson = myjson + html['data']
-
-                # for it in range(10):
-                #     # title = '('+ html['data'][it]['type']+')' + \
-                #     title = '(' + source + ')' + html['data'][it]['title'] + '-' + \
-                #             html['data'][it]['author']
-
-                self.trigger.emit("ok")
-            else:
-                self.trigger.emit("err")
-                LOG.warning(f"列表搜索失败！url:{url} params: {params}")
-        LOG.info(f"列表搜索结束。 {len(myjson)}")
-        return
+
+def songpath(track):
+    """歌曲 → (歌名-歌手, mp3 保存路径)"""
+    songname = track['title'] + '-' + track['author']
+    return songname, os.path.join(musicepath, songname) + '.mp3'
 
 
 class DownloadThread(QThread):
     # 自定义信号对象。参数str就代表这个信号可以传一个字符串
     trigger = pyqtSignal(str)
 
-    def __init__(self):
-        # 初始化函数
+    def __init__(self, downloader, track):
+        # 初始化函数，创建时记录要下载的歌曲（之后切歌不影响本线程）
         super(DownloadThread, self).__init__()
         self.working = True
+        self.downloader = downloader
+        self.pic = track['pic']
+        self.url = track['url']
+        self.songname, self.filename = songpath(track)
 
     def __del__(self):
         # 线程状态改变与线程终止
@@ -142,39 +134,36 @@ class DownloadThread(QThread):
         self.wait()
 
     def run(self):
-        qmut.lock()
-        global myjson
-        global curindex
-
-        global songname
-        global musicepath
-        global filename
-        LOG.info(f"进入DownloadThread线程: tab-{site} id-{curindex}")
-
-        # 下载图片
-        pic = myjson[curindex]['pic']
-        url = myjson[curindex]['url']
+        LOG.info(f"进入DownloadThread线程: tab-{site} {self.songname}")
 
-        songname = myjson[curindex]['title'] + \
-            '-' + myjson[curindex]['author']
-
-        if site == 'love':
-            pic = myjson_love[curindex]['pic']
-            url = myjson_love[curindex]['url']
-
-            songname = myjson_love[curindex]['title'] + \
-                '-' + myjson_love[curindex]['author']
+        # 已预下载或正在下载时共用同一任务；切歌后本线程退出，下载在后台继续
+        future = self.downloader.fetch(self.url, self.filename)
+        while self.working and not future.done():
+            wait([future], timeout=0.2)
+        if not self.working:
+            return
+        try:
+            future.result()
+        except (requests.RequestException, OSError, CancelledError) as e:
+            LOG.warning(f"下载失败: {self.songname} {e}")
+            self.trigger.emit('err')
+            return
 
-        filename = os.path.join(musicepath, songname) + '.mp3'
-        self.download_background(pic)
-        self.download_music(url, filename)
         self.trigger.emit('ok')
-        qmut.unlock()
+
+        # 先播放，再下载图片
+        try:
+            self.download_background(self.pic)
+        except Exception as e:
+            LOG.warning(f"图片下载失败: {self.pic} {e}")
+            return
+        if self.working:
+            self.trigger.emit('cover')
 
     def download_background(self, picurl):
         global background
         background = os.path.join(musicepath, "background.png")
-        with requests.get(picurl) as r:
+        with self.downloader.session.get(picurl, timeout=DOWNLOAD_TIMEOUT) as r:
             with open(background, "wb") as w:
                 w.write(r.content)
 
@@ -203,12 +192,6 @@ class DownloadThread(QThread):
         result.putalpha(mask)
         result.save(imgfile)
 
-    def download_music(self, url, filename):
-        if not os.path.exists(filename):
-            with requests.get(url) as r:
-                with open(filename, 'wb') as f:
-                    f.write(r.content)
-
     def last(self):
         LOG.info("这里会执行吗？.............不会！")
 
@@ -305,6 +288,8 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
     """
     Class documentation goes here.
     """
+    # 下载进度（文件名, 已下载字节, 总字节），由下载线程发出
+    download_progress = pyqtSignal(str, int, int)
 
     def __init__(self, parent=None):
         """
@@ -423,6 +408,17 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
 
         self.cbbox.addItems(['windows11', 'Fusion'])
 
+        # 搜索频道增加“全部”，默认同时搜索所有源；搜索引擎在多次搜索间复用连接
+        self.cb_list.insertItem(0, allsource)
+        self.cb_list.setCurrentIndex(0)
+        self.searcher = MusicSearch(pages=page)
+        self.getlistwork = None
+
+        # 下载管理：分块续传、并行下载、预下载播放队列中接下来的歌曲
+        self.downloader = DownloadManager(progress=self.download_progress.emit)
+        self.download_progress.connect(self.showprogress)
+        self.downloadwork = None
+
     def quitApp(self):
         self.trayIcon = None
         # app.quit()
@@ -474,18 +470,14 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
         if site == 'web':
 
             try:
-                self.downloadwork = DownloadThread()
-                self.downloadwork.start()
-                self.downloadwork.trigger.connect(self.beginplay)
+                self.startdownload()
                 self.lw_songs.setCurrentRow(curindex)
                 self.displaylrc()
             except:
                 pass
         elif site == 'love':
             try:
-                self.downloadwork = DownloadThread()
-                self.downloadwork.start()
-                self.downloadwork.trigger.connect(self.beginplay)
+                self.startdownload()
                 self.lw_lovesongs.setCurrentRow(curindex)
                 self.displaylrc()
             except:
@@ -592,13 +584,11 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
         site = "web"
 
         LOG.info(f"开始调用线程进行mp3下载: tab-{site}  id-{curindex}")
-        self.downloadwork = DownloadThread()
         lrc_status = False
 
         try:
             lrc_status = True
-            self.downloadwork.start()
-            self.downloadwork.trigger.connect(self.beginplay)
+            self.startdownload()
             self.displaylrc()
 
         except Exception as e:
@@ -642,11 +632,43 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
 
         return
 
+    def startdownload(self):
+        tracks = myjson_love if site == 'love' else myjson
+
+        # 切歌时上一首的下载线程退出（下载本身在后台继续，供以后播放）
+        if self.downloadwork is not None:
+            self.downloadwork.working = False
+        self.downloadwork = DownloadThread(self.downloader, tracks[curindex])
+        self.downloadwork.trigger.connect(self.beginplay)
+        self.downloadwork.start()
+        self.statusbar.showMessage("开始下载 ... " + self.downloadwork.songname)
+
+        # 顺序播放时预下载接下来的几首
+        if seq:
+            ll = len(tracks)
+            upcoming = [tracks[(curindex + i) % ll] for i in range(1, min(PREFETCH, ll - 1) + 1)]
+            self.downloader.prefetch([(it['url'], songpath(it)[1]) for it in upcoming])
+
+    def showprogress(self, name, done, total):
+        if self.downloadwork is None or name != self.downloadwork.filename:
+            return
+        if total > 0:
+            self.statusbar.showMessage(
+                f"下载中 ... {self.downloadwork.songname}  {done * 100 // total}%")
+        else:
+            self.statusbar.showMessage(
+                f"下载中 ... {self.downloadwork.songname}  {done // 1024} KB")
+
     def beginplay(self, str):
         LOG.info(f"线程返回值： {str}")
+        if self.sender() is not self.downloadwork:
+            return
 
         global songname
+        global filename
         global background
+        songname = self.downloadwork.songname
+        filename = self.downloadwork.filename
         if str == 'ok':
             self.pb_pause.setText("||")
             self.statusbar.showMessage("下载完毕 ... " + songname)
@@ -654,6 +676,7 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
             self.playmusic(filename)
             self.lab_songname.setText(songname)
 
+        elif str == 'cover':
             pix = QPixmap(background)
 
             self.lab_background.setPixmap(pix.scaled(
@@ -715,21 +738,8 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
         Slot documentation goes here.
         """
 
-        global source
-        global search
-        global urls
-
-        source = self.cb_list.currentText().strip('-').strip()
-        urls = self.cb_urls.currentText().strip()
-        search = self.le_search.text().strip()
-        if len(search) <= 0:
-            self.statusbar.showMessage('搜索中 ...  寂寞啊~~~')
-        else:
-            self.statusbar.showMessage('搜索中 ...')
-            self.getlistwork = GetListThread()
-            self.getlistwork.trigger.connect(self.displaylist)
-            self.getlistwork.start()
-            self.tabWidget.setCurrentIndex(0)
+        self.startsearch()
+        self.tabWidget.setCurrentIndex(0)
 
         # sourcecode = self.sourcelist[source]
 
@@ -765,33 +775,53 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
 
     @pyqtSlot()
     def on_le_search_returnPressed(self):
+        self.startsearch()
+
+    def startsearch(self):
         global source
         global search
+        global urls
+        global myjson
 
         source = self.cb_list.currentText().strip('-').strip()
+        urls = self.cb_urls.currentText().strip()
         search = self.le_search.text().strip()
         if len(search) <= 0:
             self.statusbar.showMessage('搜索中 ...  寂寞啊~~~')
-        else:
-            self.statusbar.showMessage('搜索中 ...')
-            self.getlistwork = GetListThread()
-            self.getlistwork.trigger.connect(self.displaylist)
-            self.getlistwork.start()
+            return
 
-    def displaylist(self, status):
-        global source
-        global myjson
+        # 停止上一次搜索，其尚未显示的结果被丢弃
+        if self.getlistwork is not None:
+            self.getlistwork.working = False
+
+        sources = sourcelist if source == allsource else {source: sourcelist[source]}
+        myjson = []
         self.lw_songs.clear()
+        self.statusbar.showMessage('搜索中 ...')
+        self.getlistwork = GetListThread(
+            self.searcher, urllist[urls], search, sources)
+        self.getlistwork.found.connect(self.appendlist)
+        self.getlistwork.trigger.connect(self.displaylist)
+        self.getlistwork.start()
+
+    def appendlist(self, batch):
+        if self.sender() is not self.getlistwork:
+            return
+        global myjson
+        myjson.extend(batch)
+        for it in batch:
+            title = '(' + it['source'] + ')   ' + \
+                it['title'] + '-' + it['author']
+            self.lw_songs.addItem(title)
+        self.statusbar.showMessage(f'搜索中 ...  已找到 {len(myjson)} 首')
+
+    def displaylist(self, status):
+        if self.sender() is not self.getlistwork:
+            return
         if status == 'ok':
-            ll = len(myjson)
-            if ll > 1:
-                for it in range(ll):
-                    title = '(' + source + ')   ' + \
-                        myjson[it]['title'] + '-' + myjson[it]['author']
-                    self.lw_songs.addItem(title)
-                    self.statusbar.showMessage('资源搜索完毕 ...')
-            else:
-                self.statusbar.showMessage('资源搜索失败，通道试试！！！   (┬＿┬) ')
+            self.statusbar.showMessage(f'资源搜索完毕 ...  共 {len(myjson)} 首')
+        else:
+            self.statusbar.showMessage('资源搜索失败，通道试试！！！   (┬＿┬) ')
 
     @pyqtSlot()
     def on_pb_back_clicked(self):
@@ -814,11 +844,8 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
             return
 
         if site == 'web':
-            self.downloadwork = DownloadThread()
-
             try:
-                self.downloadwork.start()
-                self.downloadwork.trigger.connect(self.beginplay)
+                self.startdownload()
                 self.displaylrc()
             except:
                 pass
@@ -828,11 +855,8 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
             self.lw_songs.setCurrentRow(curindex)
         elif site == 'love':
 
-            self.downloadwork = DownloadThread()
-
             try:
-                self.downloadwork.start()
-                self.downloadwork.trigger.connect(self.beginplay)
+                self.startdownload()
                 self.displaylrc()
             except:
                 pass
@@ -916,11 +940,8 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
             return
 
         if site == 'web':
-            self.downloadwork = DownloadThread()
-
             try:
-                self.downloadwork.start()
-                self.downloadwork.trigger.connect(self.beginplay)
+                self.startdownload()
                 self.displaylrc()
             except:
                 pass
@@ -929,11 +950,8 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
             self.pause = False
             self.lw_songs.setCurrentRow(curindex)
         elif site == 'love':
-            self.downloadwork = DownloadThread()
-
             try:
-                self.downloadwork.start()
-                self.downloadwork.trigger.connect(self.beginplay)
+                self.startdownload()
                 self.displaylrc()
             except:
                 pass
@@ -976,8 +994,9 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
         lrc_status = False
         self.lrcwork.terminate()
 
-        if hasattr(self, 'downloadwork'):
-            self.downloadwork.quit()
+        if self.downloadwork is not None:
+            self.downloadwork.working = False
+        self.downloader.shutdown()
 
         mixer.music.stop()
         mixer.quit()
@@ -1066,11 +1085,8 @@ class myMusicPlayer(QMainWindow, Ui_MusicPlayer):
         curindex = self.lw_lovesongs.currentRow()
 
         LOG.info(f"开始调用线程进行mp3下载: tab-{site} id-{curindex}")
-        self.downloadwork = DownloadThread()
-
         try:
-            self.downloadwork.start()
-            self.downloadwork.trigger.connect(self.beginplay)
+            self.startdownload()
             self.displaylrc()
         except:
             pass
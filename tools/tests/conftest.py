@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共配置：tools 下的模块按同级模块导入（与各工具脚本的运行方式一致）
+运行：在 tools 目录下执行 python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+
+TOOLS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (TOOLS, os.path.join(TOOLS, 'TXT2EPUB')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# 部分模块导入时在当前目录创建日志文件（如doubanapi的douban_book_api.log），测试在临时目录中运行
+WORKDIR = tempfile.TemporaryDirectory(prefix='tools-tests-', ignore_cleanup_errors=True)
+os.chdir(WORKDIR.name)
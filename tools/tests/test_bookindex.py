@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""bookindex：检索结果与逐行 str.contains 一致（含空目录、整列为空）"""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bookindex import FIELDS, BookIndex, normalize
+
+
+def brute(frame, term, fields=FIELDS):
+    """逐行 str.contains（规范化后）：作为检索结果的对照"""
+    term = normalize(term)
+    hit = np.zeros(len(frame), dtype=bool)
+    for field in fields:
+        texts = frame[field].map(normalize)
+        hit |= texts.str.contains(term, regex=False).to_numpy(dtype=bool)
+    return np.flatnonzero(hit)
+
+
+def build(frame):
+    index = BookIndex()
+    index.build({field: frame[field].tolist() for field in FIELDS})
+    return index
+
+
+def test_empty_catalogue():
+    frame = pd.DataFrame({field: [] for field in FIELDS}, dtype=str)
+    index = build(frame)
+    assert index.search('鲁迅').tolist() == []
+    assert index.search('') is None
+
+
+@pytest.mark.parametrize('term', ['鲁', '鲁迅', '呐喊', '978', 'x'])
+def test_blank_column(term):
+    # 作者列整列为空（单行目录即可触发）
+    frame = pd.DataFrame({'ISBN': ['9787020024759'], '书名': ['呐喊'], '作者': [''],
+                          '出版': ['人民文学出版社'], '分类': ['']})
+    index = build(frame)
+    assert index.search(term).tolist() == brute(frame, term).tolist()
+    assert index.search(f'作者:{term}').tolist() == []
+
+
+def test_all_blank():
+    frame = pd.DataFrame({field: ['', ''] for field in FIELDS})
+    index = build(frame)
+    assert index.search('a').tolist() == []
+    index.update(2, {'书名': '新书'})
+    assert index.search('新书').tolist() == [2]
+
+
+def test_random_against_contains():
+    rng = random.Random(7)
+    chars = '鲁迅呐喊彷徨人民文学出版社ABab12 '
+    frame = pd.DataFrame({field: [''.join(rng.choice(chars) for _ in range(rng.randint(0, 8)))
+                                  for _ in range(300)] for field in FIELDS})
+    index = build(frame)
+    for _ in range(200):
+        term = ''.join(rng.choice(chars.strip()) for _ in range(rng.randint(1, 4)))
+        assert index.search(term).tolist() == brute(frame, term).tolist(), term
+
+
+def test_dirty_rows():
+    frame = pd.DataFrame({field: ['鲁迅', '巴金', ''] for field in FIELDS})
+    index = build(frame)
+    index.update(1, {'作者': '鲁迅全集'})
+    index.update(3, {'书名': '鲁迅'})
+    assert index.search('鲁迅').tolist() == [0, 1, 3]
+    assert index.search('巴金').tolist() == [1]
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""bookmerge.normalize_isbns：与逐个校验的参考实现一致"""
+import random
+
+import numpy as np
+
+from bookmerge import isbn13, normalize_isbns
+
+
+def check13(body):
+    """ISBN-13前12位 → 校验码"""
+    return str((10 - sum(int(c) * (3 if i % 2 else 1) for i, c in enumerate(body)) % 10) % 10)
+
+
+def reference(code):
+    """逐个字符校验的ISBN-13规范化（参考实现）"""
+    if code is None or code != code:
+        return ''
+    code = str(code).upper().replace('-', '')
+    code = ''.join(code.split())
+    for prefix in ('ISBN:', 'ISBN：', 'ISBN'):
+        if code.startswith(prefix):
+            code = code[len(prefix):]
+            break
+    if len(code) == 10:
+        if not (code[:9].isascii() and code[:9].isdigit()) or code[9] not in '0123456789X':
+            return ''
+        values = [int(c) for c in code[:9]] + [10 if code[9] == 'X' else int(code[9])]
+        if sum(v * w for v, w in zip(values, range(10, 0, -1))) % 11:
+            return ''
+        body = '978' + code[:9]
+    elif len(code) == 13:
+        if not (code.isascii() and code.isdigit()) or code[:3] not in ('978', '979'):
+            return ''
+        body = code[:12]
+    else:
+        return ''
+    check = check13(body)
+    if len(code) == 13 and code[12] != check:
+        return ''
+    return body + check
+
+
+def isbn10(rnd):
+    digits = [rnd.randint(0, 9) for _ in range(9)]
+    check = -sum(d * w for d, w in zip(digits, range(10, 1, -1))) % 11
+    return ''.join(map(str, digits)) + ('X' if check == 10 else str(check))
+
+
+def random_code(rnd):
+    """随机ISBN：有效/校验码错误/前缀错误/长度错误，随机加连字符、空格、前缀与小写x"""
+    kind = rnd.random()
+    if kind < 0.35:
+        code = isbn10(rnd)
+    elif kind < 0.7:
+        code = reference(isbn10(rnd))
+        if rnd.random() < 0.3:
+            code = '979' + code[3:-1]
+            code += check13(code)
+    else:
+        length = rnd.choice([9, 10, 12, 13, 14])
+        code = ''.join(rnd.choice('0123456789X') for _ in range(length))
+        if length == 13 and rnd.random() < 0.5:
+            code = rnd.choice(['977', '978', '979']) + code[3:]
+    if rnd.random() < 0.2:
+        position = rnd.randrange(len(code))
+        code = code[:position] + rnd.choice('0123456789Xa０') + code[position + 1:]
+    if rnd.random() < 0.3:
+        code = '-'.join(code[i:i + 3] for i in range(0, len(code), 3))
+    if rnd.random() < 0.2:
+        code = rnd.choice(['ISBN ', 'ISBN:', 'isbn：', ' ']) + code + rnd.choice(['', ' ', '\t'])
+    if rnd.random() < 0.1:
+        code = code.lower()
+    return code
+
+
+def test_known_codes():
+    codes = ['0-8044-2957-X', '080442957x', 'ISBN 978-0-8044-2957-3', '9780804429573',
+             '9780804429574', '9771234567890', '979-10-90636-07-1', '0306406152', '',
+             None, float('nan'), '０306406152']
+    isbns, numbers = normalize_isbns(codes)
+    assert isbns.tolist() == [reference(code) for code in codes]
+    assert isbns[:4].tolist() == ['9780804429573'] * 4
+    assert isbns[4:8].tolist() == ['', '', '9791090636071', '9780306406157']
+    assert numbers.tolist() == [int(isbn) if isbn else -1 for isbn in isbns]
+
+
+def test_random_against_reference():
+    rnd = random.Random(0)
+    codes = [random_code(rnd) for _ in range(5000)]
+    isbns, numbers = normalize_isbns(codes)
+    expected = [reference(code) for code in codes]
+    assert isbns.tolist() == expected
+    assert numbers.dtype == np.int64
+    assert numbers.tolist() == [int(isbn) if isbn else -1 for isbn in expected]
+    # 有效与无效各占相当比例，两类都被覆盖
+    assert 0.2 < np.mean(numbers >= 0) < 0.8
+    assert [isbn13(code) for code in codes[:200]] == expected[:200]
+
+
+def test_empty():
+    isbns, numbers = normalize_isbns([])
+    assert len(isbns) == 0 and len(numbers) == 0
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""bookrank：向量化推荐度与单本计算一致，top与order的前N行一致"""
+import random
+
+import numpy as np
+import pytest
+
+from bookrank import BookRanker, recommend, recommend_scores, to_numbers
+
+AVERAGES = ['', None, 'abc', '-1', '0', '2.4', '2.5', '7.9', '9.0', 8.3, 10, float('nan'), ' 8.5 ']
+RATERS = ['', None, 'x', '-5', '0', '1', '37', '152717', 200, 3.0, float('nan'), 'inf']
+
+
+def test_scores_match_scalar():
+    rnd = random.Random(0)
+    average = [rnd.choice(AVERAGES) for _ in range(2000)] + [f'{rnd.uniform(0, 10):.1f}' for _ in range(2000)]
+    raters = [rnd.choice(RATERS) for _ in range(2000)] + [str(rnd.randint(0, 10 ** 6)) for _ in range(2000)]
+    scores = recommend_scores(to_numbers(average), to_numbers(raters))
+    expected = [recommend(a, n) for a, n in zip(average, raters)]
+    np.testing.assert_allclose(scores, expected, rtol=1e-12, atol=0)
+
+
+def test_to_numbers():
+    assert to_numbers(['1.5', '', None, 'x', '-2', 'inf', 3]).tolist() == [1.5, 0, 0, 0, 0, 0, 3]
+
+
+def ranker(count, seed):
+    rnd = random.Random(seed)
+    # 评分取值少，推荐度大量并列，检验并列时的顺序
+    return BookRanker([rnd.choice(['', '2.0', '6.5', '8.0', '9.1']) for _ in range(count)],
+                      [rnd.choice(['', '0', '10', '1000']) for _ in range(count)])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_top_matches_order(seed):
+    books = ranker(500, seed)
+    rows = np.array(sorted(random.Random(seed).sample(range(500), 200)))
+    order = books.order()
+    assert sorted(order.tolist()) == list(range(500))
+    # 推荐度从高到低，并列时行号升序
+    scores = books.scores()[order]
+    assert (np.diff(scores) <= 0).all()
+    assert all(a < b for a, b, s, t in zip(order, order[1:], scores, scores[1:]) if s == t)
+    for count in (0, 1, 7, 50, 199, 200, 500, 600):
+        assert books.top(count).tolist() == order[:count].tolist()
+        assert books.top(count, rows).tolist() == books.order(rows)[:count].tolist()
+    assert books.order(rows).tolist() == [row for row in order.tolist() if row in set(rows.tolist())]
+
+
+def test_update_extends_and_invalidates():
+    books = ranker(10, 0)
+    books.order()
+    books.update([3, 12], ['9.9', '9.8'], ['100000', '100000'])
+    assert len(books) == 13
+    assert books.order()[:2].tolist() == [3, 12]
+    assert books.scores()[10:12].tolist() == [0.0, 0.0]
+    assert books.top(2).tolist() == [3, 12]
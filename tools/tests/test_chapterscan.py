@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""ChapterScanner：流式切分结果与 re.split 一致，章节标题不跨行"""
+import random
+import re
+
+import pytest
+
+from ChapterDetect import CHAPTER_REGS, ChapterDetect
+from Conver2epub import ChapterScanner
+
+LINES = ('卷一', '卷二 ', '第一卷', '第三章 相遇', '第十二回', '卷三 第四章 离别', '卷一\t第一章 开始',
+         '序章', '番外 一', '1、开端', '12.', '3', '．说明', 'Chapter 5', 'Chapter', 'chapter IV the end',
+         'Part', 'Two', 'Book 2', '正文内容。', '  他说：“第一章不是标题。”', '', '', '   ', '　　缩进正文')
+
+
+def expected(content, reg):
+    parts = re.split(reg, content, flags=re.M)
+    return list(zip(parts[1::2], parts[2::2]))
+
+
+def scan(tmp_path, content, reg, block_size):
+    path = tmp_path / 'book.txt'
+    path.write_text(content, encoding='utf-8')
+    return list(ChapterScanner(str(path), reg, block_size=block_size))
+
+
+@pytest.mark.parametrize('name,reg', CHAPTER_REGS)
+def test_matches_re_split(tmp_path, name, reg):
+    rng = random.Random(name)
+    for _ in range(150):
+        content = '\n'.join(rng.choice(LINES) for _ in range(rng.randint(0, 40))) + rng.choice(['', '\n'])
+        for block_size in (1, 17, 1 << 20):
+            assert scan(tmp_path, content, reg, block_size) == expected(content, reg), (name, content)
+
+
+@pytest.mark.parametrize('name,reg', CHAPTER_REGS)
+def test_title_single_line(tmp_path, name, reg):
+    content = '卷一\n第一章 开始\n正文\n1\n、正文\nChapter\n5 正文\nPart\nTwo\n'
+    for title, _ in scan(tmp_path, content, reg, 1 << 20):
+        assert '\n' not in title.strip('\r\n'), (name, title)
+
+
+def test_score_volume_chapter():
+    lines = []
+    for volume in '一二三四':
+        lines.append(f'卷{volume} 第一章 开始\n')
+        lines.extend(['正文内容。\n'] * 30)
+    assert ChapterDetect().score(lines)[0][0] == '卷X 第X章'
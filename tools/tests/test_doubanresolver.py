@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""IsbnResolver：本地桩服务器上的退避重试与共享限流"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from doubanapi import DouBanApi, IsbnResolver, TokenBucket
+
+
+def book_dict(isbn):
+    """豆瓣ISBN接口的模拟返回（字段与v2接口一致）"""
+    return {
+        'title': f'书{isbn[-6:]}', 'author': ['作者'], 'translator': [], 'publisher': '出版社',
+        'price': '30.00元', 'rating': {'max': 10, 'numRaters': 100, 'average': '8.0', 'min': 0},
+        'images': {'small': f'http://127.0.0.1/cover/{isbn}.jpg'}, 'pubdate': '2020-1',
+        'alt': f'https://book.douban.com/subject/{isbn[-8:]}/', 'pages': '100', 'isbn13': isbn,
+    }
+
+
+class StubDouban:
+    """
+    本地豆瓣桩服务器（ISBN接口），用法：with StubDouban(failures) as stub: ...
+    failures：{ISBN: 返回429的次数}，次数为None时一直返回503
+    """
+    def __init__(self, failures=None, latency=0.0):
+        self.failures = dict(failures or {})
+        self.requests = []   # [(时间, ISBN)]
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                isbn = self.path.rstrip('/').rsplit('/', 1)[-1]
+                with stub.lock:
+                    stub.requests.append((time.monotonic(), isbn))
+                    left = stub.failures.get(isbn, 0)
+                    if left:
+                        stub.failures[isbn] = left - 1
+                if latency:
+                    time.sleep(latency)
+                if left is None:
+                    self.reply(503, b'{}')
+                elif left:
+                    self.reply(429, b'{}', {'Retry-After': '0'})
+                else:
+                    self.reply(200, json.dumps(book_dict(isbn)).encode('utf-8'))
+
+            def reply(self, status, body, headers=()):
+                self.send_response(status)
+                for name, value in dict(headers).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+
+    def count(self, isbn):
+        return sum(1 for _, requested in self.requests if requested == isbn)
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def resolver(stub, bucket=None, **kwargs):
+    api = DouBanApi(pool_size=4)
+    api.url_isbn = f'http://127.0.0.1:{stub.server.server_port}/v2/book/isbn/'
+    return IsbnResolver(api, concurrency=4, bucket=bucket or TokenBucket(rate=1000, capacity=1000),
+                        backoff=0.01, timeout=5, **kwargs)
+
+
+def isbns(count):
+    return [str(9787000000000 + i) for i in range(count)]
+
+
+def test_resolves_all():
+    codes = isbns(20)
+    with StubDouban() as stub:
+        result = resolver(stub).resolve_all(codes)
+    assert sorted(result) == codes
+    assert all(result[isbn][0] == isbn and result[isbn][1] == f'书{isbn[-6:]}' for isbn in codes)
+    assert len(stub.requests) == len(codes)
+
+
+def test_retries_throttled_requests():
+    codes = isbns(6)
+    with StubDouban({codes[0]: 2, codes[1]: 3, codes[2]: None}) as stub:
+        result = resolver(stub, retries=3).resolve_all(codes)
+    # 429后重试直至成功：第3、第4次请求成功
+    assert result[codes[0]][0] == codes[0] and stub.count(codes[0]) == 3
+    assert result[codes[1]][0] == codes[1] and stub.count(codes[1]) == 4
+    # 一直503：重试3次后放弃，返回None
+    assert result[codes[2]] is None and stub.count(codes[2]) == 4
+    assert all(result[isbn] and stub.count(isbn) == 1 for isbn in codes[3:])
+
+
+def test_gives_up_after_retries():
+    codes = isbns(1)
+    with StubDouban({codes[0]: 5}) as stub:
+        result = resolver(stub, retries=2).resolve_all(codes)
+    assert result == {codes[0]: None}
+    assert stub.count(codes[0]) == 3
+
+
+@pytest.mark.parametrize('rate, capacity', [(20, 1), (40, 5)])
+def test_rate_limit(rate, capacity):
+    # 第n个请求（从0计）不早于 (n + 1 - 容量) / 速率 秒，含重试的请求同样受限
+    codes = isbns(16)
+    bucket = TokenBucket(rate=rate, capacity=capacity)
+    with StubDouban({codes[0]: 2}) as stub:
+        start = time.monotonic()
+        result = resolver(stub, bucket).resolve_all(codes)
+    assert all(result.values())
+    times = sorted(stamp - start for stamp, _ in stub.requests)
+    assert len(times) == len(codes) + 2
+    for n, elapsed in enumerate(times):
+        assert elapsed >= (n + 1 - capacity) / rate - 0.01, (n, elapsed)
+
+
+def test_bucket_shared_between_resolvers():
+    # 两个查询共用一个令牌桶时，总请求速率仍受限
+    codes = isbns(20)
+    bucket = TokenBucket(rate=50, capacity=1)
+    with StubDouban() as stub:
+        start = time.monotonic()
+        threads = [threading.Thread(target=resolver(stub, bucket).resolve_all, args=(part,))
+                   for part in (codes[:10], codes[10:])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    times = sorted(stamp - start for stamp, _ in stub.requests)
+    assert len(times) == len(codes)
+    assert times[-1] >= (len(codes) - 1) / 50 - 0.01
+
+
+def test_stop_early_cancels_pending():
+    codes = isbns(40)
+    with StubDouban(latency=0.05) as stub:
+        results = resolver(stub).iter_resolve(codes)
+        first = next(results)
+        results.close()
+        time.sleep(0.2)
+    assert first[0] in codes
+    # 并发数为4：停止时只有已发出的请求完成，其余不再发出
+    assert len(stub.requests) < len(codes) // 2
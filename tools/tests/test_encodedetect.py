@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""EncodeDetect：BOM、纯ASCII、UTF-8及中文编码的检测结果可完整解码原文"""
+import random
+
+import pytest
+
+from EncodeDetect import EncodeDetect
+
+SIMPLIFIED = '第一章 风起云涌\n　　天色渐暗，城门口的守卫换了一班，远处传来马蹄声。他抬头望向北方，心中暗暗盘算着明日的行程。\n'
+TRADITIONAL = '第一章 風起雲湧\n　　天色漸暗，城門口的守衛換了一班，遠處傳來馬蹄聲。他抬頭望向北方，心中暗暗盤算著明日的行程。\n'
+
+
+def text(paragraph, size, seed=0, tail=''):
+    """由段落随机拼接、约size字符的文本，可在末尾附加特殊字符"""
+    rnd = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        part = paragraph.replace('一', rnd.choice('一二三四五六七八九十'))
+        parts.append(part)
+        length += len(part)
+    return ''.join(parts) + tail
+
+
+@pytest.fixture
+def detector():
+    # 小窗口：较小的文件即覆盖多窗口抽样
+    EncodeDetect._cache.clear()
+    return EncodeDetect(window=1024, random_windows=4)
+
+
+@pytest.mark.parametrize('encoding, expected', [
+    ('utf-8-sig', 'utf-8-sig'), ('utf-16', 'utf-16'), ('utf-32', 'utf-32'),
+])
+def test_bom(detector, tmp_path, encoding, expected):
+    path = tmp_path / 'bom.txt'
+    path.write_bytes(text(SIMPLIFIED, 500).encode(encoding))
+    assert detector.detect(str(path))['encoding'] == expected
+
+
+def test_ascii(detector):
+    assert detector.detect_bytes(b'Chapter 1\nhello world\n' * 500)['encoding'] == 'utf-8'
+    assert detector.detect_bytes(b'')['encoding'] == 'utf-8'
+
+
+@pytest.mark.parametrize('size', [200, 5000, 50000])
+@pytest.mark.parametrize('paragraph, encoding', [
+    (SIMPLIFIED, 'utf-8'), (SIMPLIFIED, 'gbk'), (SIMPLIFIED, 'gb18030'), (TRADITIONAL, 'big5'),
+])
+def test_roundtrip(detector, tmp_path, paragraph, encoding, size):
+    # 检测结果能完整解码全文且与原文一致
+    original = text(paragraph, size)
+    path = tmp_path / 'book.txt'
+    path.write_bytes(original.encode(encoding))
+    result = detector.detect(str(path))
+    assert path.read_bytes().decode(result['encoding']) == original, result
+
+
+def test_gbk_superset_late_in_file(detector, tmp_path):
+    # GB2312之外的字符只出现在文件尾部：按超集GB18030解码
+    original = text(SIMPLIFIED, 50000, tail='€㐀𠀀\n')
+    path = tmp_path / 'book.txt'
+    path.write_bytes(original.encode('gb18030'))
+    result = detector.detect(str(path))
+    assert result['encoding'] == 'gb18030'
+    assert path.read_bytes().decode(result['encoding']) == original
+
+
+def test_cache_file(tmp_path):
+    EncodeDetect._cache.clear()
+    cache_file = str(tmp_path / 'cache.json')
+    data = text(SIMPLIFIED, 20000).encode('gbk')
+    first = EncodeDetect(window=1024, cache_file=cache_file).detect_bytes(data)
+    EncodeDetect._cache.clear()
+    detector = EncodeDetect(window=1024, cache_file=cache_file)
+    assert len(detector._cache) == 1
+    assert detector.detect_bytes(data) == first
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""EpubIndex.rename：目标文件已存在时不覆盖，也不删除其索引记录"""
+import os
+import zipfile
+
+from EpubIndex import EpubIndex
+
+CONTAINER = '''<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>'''
+OPF = '''<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:title>{title}</dc:title><dc:creator>{creator}</dc:creator>
+  </metadata>
+</package>'''
+
+
+def make_epub(path, title, creator, extra=b''):
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('META-INF/container.xml', CONTAINER)
+        zf.writestr('OEBPS/content.opf', OPF.format(title=title, creator=creator))
+        zf.writestr('extra', extra)
+
+
+def test_rename_keeps_existing_target(tmp_path):
+    make_epub(tmp_path / '书名_作者.epub', '书名（第二版）', '作者', b'first')
+    make_epub(tmp_path / 'b.epub', '书名（修订版）', '作者', b'second')
+    make_epub(tmp_path / 'c.epub', '另一本', '作者')
+    index = EpubIndex(str(tmp_path / 'index.sqlite'), workers=1)
+    try:
+        index.update(str(tmp_path))
+        renamed, failed = index.rename(str(tmp_path))
+
+        target = str(tmp_path / '书名_作者.epub')
+        assert renamed == 1
+        assert failed == [str(tmp_path / 'b.epub')]
+        # 原有文件与两条记录都保留
+        with zipfile.ZipFile(target) as zf:
+            assert zf.read('extra') == b'first'
+        assert index.get(target)['title'] == '书名（第二版）'
+        assert index.get(str(tmp_path / 'b.epub'))['title'] == '书名（修订版）'
+        assert os.path.exists(tmp_path / '另一本_作者.epub')
+        assert index.get(str(tmp_path / '另一本_作者.epub'))['title'] == '另一本'
+        assert index.update(str(tmp_path)) == {'total': 3, 'updated': 0, 'removed': 0}
+    finally:
+        index.close()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""musicdownload：本地Range桩服务器上的完整下载、断点续传、416、不支持Range与中断重试"""
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from musicdownload import PART_SUFFIX, DownloadManager, download
+
+BODY = os.urandom(300 * 1024 + 123)
+
+
+class StubRange:
+    """
+    本地下载桩服务器，用法：with StubRange() as stub: ...
+    ranges：是否支持Range；drops：前几次请求只发送一半正文后断开连接
+    """
+    def __init__(self, body=BODY, ranges=True, drops=0):
+        self.body = body
+        self.ranges = ranges
+        self.drops = drops
+        self.requests = []   # 每次请求的Range头（无则为None）
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                header = self.headers.get('Range')
+                stub.requests.append(header)
+                body, size = stub.body, len(stub.body)
+                match = re.fullmatch(r'bytes=(\d+)-', header or '')
+                if stub.ranges and match:
+                    start = int(match.group(1))
+                    if start >= size:
+                        self.send_response(416)
+                        self.send_header('Content-Range', f'bytes */{size}')
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{size - 1}/{size}')
+                    body = body[start:]
+                else:
+                    self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if stub.drops:
+                    stub.drops -= 1
+                    self.wfile.write(body[:len(body) // 2])
+                    self.wfile.flush()
+                    self.connection.shutdown(2)
+                    return
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}/song.mp3'
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def session():
+    with requests.Session() as session:
+        yield session
+
+
+def test_full_download(session, tmp_path):
+    filename = str(tmp_path / 'song.mp3')
+    progress = []
+    with StubRange() as stub:
+        assert download(session, stub.url, filename, chunk_size=8192, progress=lambda *p: progress.append(p))
+        # 文件已存在时不再请求
+        assert download(session, stub.url, filename)
+    assert open(filename, 'rb').read() == BODY
+    assert not os.path.exists(filename + PART_SUFFIX)
+    assert stub.requests == [None]
+    assert progress[-1] == (len(BODY), len(BODY))
+    assert all(a[0] < b[0] for a, b in zip(progress, progress[1:]))
+
+
+@pytest.mark.parametrize('offset', [1, 4096, len(BODY) - 1])
+def test_resume(session, tmp_path, offset):
+    filename = str(tmp_path / 'song.mp3')
+    with open(filename + PART_SUFFIX, 'wb') as f:
+        f.write(BODY[:offset])
+    progress = []
+    with StubRange() as stub:
+        assert download(session, stub.url, filename, progress=lambda *p: progress.append(p))
+    assert stub.requests == [f'bytes={offset}-']
+    assert open(filename, 'rb').read() == BODY
+    assert progress[0][0] > offset and progress[-1] == (len(BODY), len(BODY))
+
+
+def test_416_complete_part(session, tmp_path):
+    # .part已是完整文件：416且总大小一致，直接改名
+    filename = str(tmp_path / 'song.mp3')
+    with open(filename + PART_SUFFIX, 'wb') as f:
+        f.write(BODY)
+    with StubRange() as stub:
+        assert download(session, stub.url, filename)
+    assert stub.requests == [f'bytes={len(BODY)}-']
+    assert open(filename, 'rb').read() == BODY
+
+
+def test_416_changed_file(session, tmp_path):
+    # .part比服务器上的文件还大（文件已变化）：删除后从头下载
+    filename = str(tmp_path / 'song.mp3')
+    with open(filename + PART_SUFFIX, 'wb') as f:
+        f.write(b'x' * (len(BODY) + 10))
+    with StubRange() as stub:
+        assert download(session, stub.url, filename)
+    assert stub.requests == [f'bytes={len(BODY) + 10}-', None]
+    assert open(filename, 'rb').read() == BODY
+
+
+def test_server_without_range(session, tmp_path):
+    # 服务器忽略Range返回200：从头下载，不追加到已有的.part
+    filename = str(tmp_path / 'song.mp3')
+    with open(filename + PART_SUFFIX, 'wb') as f:
+        f.write(b'stale' * 100)
+    with StubRange(ranges=False) as stub:
+        assert download(session, stub.url, filename)
+    assert stub.requests == ['bytes=500-']
+    assert open(filename, 'rb').read() == BODY
+
+
+def test_stop_keeps_part(session, tmp_path):
+    filename = str(tmp_path / 'song.mp3')
+    chunks = []
+    with StubRange() as stub:
+        assert not download(session, stub.url, filename, chunk_size=8192,
+                            progress=lambda done, total: chunks.append(done), stop=lambda: len(chunks) >= 3)
+        assert os.path.getsize(filename + PART_SUFFIX) == 3 * 8192
+        assert not os.path.exists(filename)
+        assert download(session, stub.url, filename)
+    assert stub.requests == [None, f'bytes={3 * 8192}-']
+    assert open(filename, 'rb').read() == BODY
+
+
+def test_interrupted_raises(session, tmp_path):
+    filename = str(tmp_path / 'song.mp3')
+    with StubRange(drops=1) as stub:
+        with pytest.raises((requests.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+            download(session, stub.url, filename)
+    assert 0 < os.path.getsize(filename + PART_SUFFIX) < len(BODY)
+    assert not os.path.exists(filename)
+
+
+def test_manager_retries_with_resume(tmp_path):
+    filename = str(tmp_path / 'song.mp3')
+    manager = DownloadManager(workers=2, retries=2, timeout=5)
+    try:
+        with StubRange(drops=2) as stub:
+            assert manager.fetch(stub.url, filename).result(timeout=30)
+            # 同一文件的重复请求共用下载结果，不再发起请求
+            assert manager.fetch(stub.url, filename).result(timeout=30)
+        assert open(filename, 'rb').read() == BODY
+        # 第一次从头下载，之后两次都从已下载的位置续传
+        assert stub.requests[0] is None
+        assert len(stub.requests) == 3 and all(header.startswith('bytes=') for header in stub.requests[1:])
+    finally:
+        manager.shutdown()
+
+
+def test_manager_gives_up(tmp_path):
+    filename = str(tmp_path / 'song.mp3')
+    manager = DownloadManager(workers=1, retries=1, timeout=5)
+    try:
+        with StubRange(drops=5) as stub:
+            future = manager.fetch(stub.url, filename)
+            with pytest.raises((requests.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+                future.result(timeout=30)
+        assert len(stub.requests) == 2
+        assert os.path.exists(filename + PART_SUFFIX) and not os.path.exists(filename)
+    finally:
+        manager.shutdown()